@@ -0,0 +1,431 @@
+"""Static server for the tray designer.
+
+Serves the app from the repository root (index.html, sw.js, src/ and the
+verification HTML pages; every other path is a 404) over HTTP/1.1 with keep-alive and concurrent connections on asyncio, stdlib only:
+
+- gzip and (with the optional `brotli` package) br variants of text assets,
+  compressed once at startup for index.html, sw.js and src/, on first request
+  for the verification pages, and again whenever a file changes on disk
+  (off the event loop, on a worker thread)
+- strong ETags per representation, If-None-Match -> 304
+- Cache-Control: unversioned URLs must revalidate (cheap 304s, never stale);
+  URLs carrying a ?v= version are served as immutable for a year
+
+    python serve.py                  # http://localhost:8000
+    python serve.py --port 8080 --quiet
+
+Playwright scripts can use it as a fixture instead of an ad-hoc server:
+
+    from serve import serving
+    with serving() as base_url:      # free port, background thread
+        page.goto(base_url)
+"""
+import argparse
+import asyncio
+import contextlib
+import email.utils
+import fnmatch
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Paths under the root that are served at all (fnmatch patterns, "/"-separated)
+PUBLIC = ["index.html", "sw.js", "src/*", "verification/*.html"]
+# Compressed at startup; other public files are built on first request
+PRECOMPRESS = ["index.html", "sw.js", "src"]
+COMPRESSIBLE = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".map", ".obj"}
+MIN_COMPRESS_SIZE = 256
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".mjs": "text/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".webp": "image/webp",
+    ".stl": "model/stl",
+}
+
+CACHE_REVALIDATE = "no-cache"
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+
+KEEP_ALIVE_TIMEOUT = 15
+MAX_HEADERS = 100
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           414: "URI Too Long", 431: "Request Header Fields Too Large"}
+
+
+class Asset:
+    """One file: identity body plus precompressed variants, keyed by content coding."""
+
+    __slots__ = ("stamp", "etag", "content_type", "last_modified", "bodies")
+
+    def __init__(self, path, stamp):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        ext = os.path.splitext(path)[1].lower()
+        self.stamp = stamp
+        self.etag = hashlib.sha256(data).hexdigest()[:20]
+        self.content_type = CONTENT_TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.last_modified = email.utils.formatdate(stamp[0], usegmt=True)
+        self.bodies = {"identity": data}
+
+        if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+            # mtime=0 keeps the gzip bytes (and so the ETag) stable across restarts
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                self.bodies["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    self.bodies["br"] = compressed
+
+    def tag(self, coding):
+        # Strong validators must differ between representations
+        return f'"{self.etag}"' if coding == "identity" else f'"{self.etag}-{coding}"'
+
+
+class AssetStore:
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+        self.assets = {}  # file path -> Asset
+        self.pending = {}  # (file path, stamp) -> future of an Asset being built
+
+    def resolve(self, url_path):
+        """URL path -> file path under the root, or None (missing, hidden, outside or not public)."""
+        parts = [p for p in unquote(url_path).split("/") if p]
+        if any(p.startswith(".") for p in parts):
+            return None
+        path = os.path.realpath(os.path.join(self.root, *parts))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if not self.is_public(path):
+            return None
+        return path if os.path.isfile(path) else None
+
+    def is_public(self, path):
+        relative = os.path.relpath(path, self.root).replace(os.sep, "/")
+        return any(fnmatch.fnmatchcase(relative, pattern) for pattern in PUBLIC)
+
+    def load(self, path):
+        """Asset for a file path, rebuilt when the file changed on disk."""
+        stamp = file_stamp(path)
+        if stamp is None:
+            return None
+        asset = self.assets.get(path)
+        if asset is None or asset.stamp != stamp:
+            asset = Asset(path, stamp)
+            self.assets[path] = asset
+        return asset
+
+    async def get(self, path):
+        """load() for the event loop: reading and compressing run on a worker thread,
+        and concurrent requests for the same file share one build."""
+        stamp = file_stamp(path)
+        if stamp is None:
+            return None
+        asset = self.assets.get(path)
+        if asset is not None and asset.stamp == stamp:
+            return asset
+
+        key = (path, stamp)
+        future = self.pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(None, Asset, path, stamp)
+            self.pending[key] = future
+            future.add_done_callback(lambda done: self.built(key, done))
+        try:
+            # A handler cancelled while waiting must not cancel the shared build
+            return await asyncio.shield(future)
+        except OSError:
+            return None
+
+    def built(self, key, future):
+        del self.pending[key]
+        if not future.cancelled() and future.exception() is None:
+            self.assets[key[0]] = future.result()
+
+    def preload(self, entries=PRECOMPRESS):
+        count = 0
+        for entry in entries:
+            base = os.path.join(self.root, entry)
+            if os.path.isfile(base):
+                self.load(base)
+                count += 1
+            for dirpath, dirnames, filenames in os.walk(base):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for name in filenames:
+                    if not name.startswith("."):
+                        self.load(os.path.join(dirpath, name))
+                        count += 1
+        return count
+
+
+def file_stamp(path):
+    """(mtime, size) of a file, or None when it cannot be read."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size)
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding -> {coding: q}."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header, bodies):
+    accepted = parse_accept_encoding(header or "")
+    wildcard = accepted.get("*", 0.0)
+    for coding in ("br", "gzip"):
+        if coding in bodies and accepted.get(coding, wildcard) > 0:
+            return coding
+    return "identity"
+
+
+def etag_matches(header, etag):
+    """If-None-Match uses the weak comparison."""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class StaticServer:
+    def __init__(self, root=ROOT, quiet=False):
+        self.store = AssetStore(root)
+        self.quiet = quiet
+        self.connections = {}  # handler task -> writer, while the connection is open
+
+    async def start(self, host=None, port=8000):
+        return await asyncio.start_server(self.handle, host or None, port)
+
+    async def shutdown(self, listener, timeout=5):
+        """Stop accepting, close the open (keep-alive) connections and wait for their handlers."""
+        listener.close()
+        for writer in list(self.connections.values()):
+            writer.close()
+        tasks = list(self.connections)
+        if tasks:
+            # Closed connections read EOF and end on their own; cancel the stragglers
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await listener.wait_closed()
+
+    async def handle(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        client = peer[0] if peer else "-"
+        self.connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except (ValueError, asyncio.LimitOverrunError):
+                    # Longer than the stream limit (64 KiB)
+                    self.send(writer, 414, keep_alive=False)
+                    self.log(client, "-", 414)
+                    break
+                if not line:
+                    break
+
+                request_line = line.decode("latin-1").rstrip("\r\n")
+                parts = request_line.split()
+                if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+                    self.send(writer, 400, keep_alive=False)
+                    self.log(client, request_line, 400)
+                    break
+                method, target, version = parts
+
+                headers = {}
+                try:
+                    while True:
+                        header = await reader.readline()
+                        if header in (b"\r\n", b"\n", b""):
+                            break
+                        if len(headers) >= MAX_HEADERS:
+                            continue
+                        name, _, value = header.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                except (ValueError, asyncio.LimitOverrunError):
+                    self.send(writer, 431, keep_alive=False)
+                    self.log(client, request_line, 431)
+                    break
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                if method not in ("GET", "HEAD"):
+                    # A request body may follow; do not try to read past it
+                    keep_alive = False
+
+                status = await self.respond(writer, method, target, headers, keep_alive)
+                self.log(client, request_line, status)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Only shutdown cancels handlers; nothing to report
+            pass
+        finally:
+            self.connections.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def respond(self, writer, method, target, headers, keep_alive):
+        if method not in ("GET", "HEAD"):
+            self.send(writer, 405, {"Allow": "GET, HEAD"}, keep_alive=keep_alive)
+            return 405
+
+        url = urlsplit(target)
+        path = self.store.resolve(url.path)
+        asset = await self.store.get(path) if path else None
+        if asset is None:
+            self.send(writer, 404, keep_alive=keep_alive)
+            return 404
+
+        coding = negotiate(headers.get("accept-encoding"), asset.bodies)
+        etag = asset.tag(coding)
+        response_headers = {
+            "ETag": etag,
+            "Cache-Control": CACHE_IMMUTABLE if "v" in parse_qs(url.query, keep_blank_values=True) else CACHE_REVALIDATE,
+            "Last-Modified": asset.last_modified,
+        }
+        if len(asset.bodies) > 1:
+            response_headers["Vary"] = "Accept-Encoding"
+
+        if etag_matches(headers.get("if-none-match", ""), etag):
+            self.send(writer, 304, response_headers, keep_alive=keep_alive)
+            return 304
+
+        body = asset.bodies[coding]
+        response_headers["Content-Type"] = asset.content_type
+        if coding != "identity":
+            response_headers["Content-Encoding"] = coding
+        self.send(writer, 200, response_headers, body, keep_alive=keep_alive, head=method == "HEAD")
+        return 200
+
+    def send(self, writer, status, headers=None, body=b"", keep_alive=True, head=False):
+        if status >= 400 and not body:
+            body = f"{status} {REASONS[status]}\n".encode()
+            headers = {**(headers or {}), "Content-Type": "text/plain; charset=utf-8"}
+
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}",
+                 f"Date: {email.utils.formatdate(usegmt=True)}",
+                 "Server: tray-serve",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        if status != 304:
+            lines.append(f"Content-Length: {len(body)}")
+
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if body and not head and status != 304:
+            writer.write(body)
+
+    def log(self, client, request_line, status):
+        if self.quiet:
+            return
+        stamp = time.strftime("%d/%b/%Y %H:%M:%S")
+        sys.stderr.write(f'{client} - - [{stamp}] "{request_line}" {status} -\n')
+
+
+@contextlib.contextmanager
+def serving(root=ROOT, host="127.0.0.1", port=0, quiet=True):
+    """Run the server on a background thread for the duration of the block; yields the base URL."""
+    started = threading.Event()
+    state = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            server = StaticServer(root, quiet=quiet)
+            server.store.preload()
+            listener = loop.run_until_complete(server.start(host, port))
+            state["port"] = listener.sockets[0].getsockname()[1]
+        except Exception as e:
+            state["error"] = e
+            started.set()
+            loop.close()
+            return
+        state["loop"] = loop
+        started.set()
+
+        loop.run_forever()
+        loop.run_until_complete(server.shutdown(listener))
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait(30)
+    if "error" in state:
+        raise state["error"]
+    if "loop" not in state:
+        raise RuntimeError("Static server did not start")
+
+    try:
+        yield f"http://{host}:{state['port']}"
+    finally:
+        state["loop"].call_soon_threadsafe(state["loop"].stop)
+        thread.join(5)
+
+
+async def main(args):
+    server = StaticServer(args.root, quiet=args.quiet)
+    count = server.store.preload()
+    codings = "gzip, br" if brotli is not None else "gzip (pip install brotli for br)"
+    listener = await server.start(args.host, args.port)
+    print(f"Serving {server.store.root} on port {args.port}: {count} assets precompressed ({codings})")
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tray designer static server")
+    parser.add_argument("--host", default="", help="bind address (default: all interfaces)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--root", default=ROOT)
+    parser.add_argument("--quiet", action="store_true", help="no request log")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,122 @@
+// src/core/Design.js
+import { WallState } from './WallState.js';
+
+// Smallest distance between neighbouring dividers (or a divider and the wall)
+export function getMinSegmentSize(totalSize, dividers) {
+    const points = [-totalSize/2, ...[...dividers].sort((a,b)=>a-b), totalSize/2];
+    let minSize = totalSize;
+    for(let i = 0; i < points.length - 1; i++) {
+        const dist = points[i+1] - points[i];
+        if (dist < minSize) minSize = dist;
+    }
+    return minSize;
+}
+
+// Plain design description for the geometry pipeline, built from Store state.
+// The corner radius is clamped so it always fits the smallest compartment.
+export function designFromState(state, quality = 'full') {
+    const { l, w, h, radius, wallThickness } = state.dimensions;
+    const { x: dX, z: dZ } = state.dividers;
+
+    const minSegX = getMinSegmentSize(l, dX);
+    const minSegZ = getMinSegmentSize(w, dZ);
+    const minSegment = Math.min(minSegX, minSegZ);
+    const maxSafeRadius = (minSegment / 2) - 0.5;
+    const effectiveR = Math.max(1, Math.min(radius, maxSafeRadius));
+
+    return {
+        l, h, w,
+        r: effectiveR,
+        wallThickness,
+        dividers: { x: [...dX], z: [...dZ] },
+        walls: state.walls.serialize(),
+        quality
+    };
+}
+
+// Dimensions assumed for fields an order spec leaves out (the app's defaults)
+export const SPEC_DEFAULTS = { l: 120, w: 120, h: 40, radius: 8, wallThickness: 2 };
+
+// Design from a plain order spec, as received outside the app:
+//   { dimensions: { l, w, h, radius, wallThickness }, dividers: { x: [], z: [] },
+//     hiddenSegments: { 'X_0_1': true, ... } }
+// Divider arrays may be unsorted; hiddenSegments uses the legacy raw-index keys.
+// A serialized `walls` (from designFromState) is accepted instead of hiddenSegments.
+export function designFromSpec(spec, quality = 'full') {
+    const dimensions = { ...SPEC_DEFAULTS, ...(spec.dimensions || {}) };
+    const raw = {
+        x: ((spec.dividers && spec.dividers.x) || []).map(Number),
+        z: ((spec.dividers && spec.dividers.z) || []).map(Number)
+    };
+    const walls = wallsFromDesign({ dividers: raw, walls: spec.walls, hiddenSegments: spec.hiddenSegments });
+    const dividers = { x: [...raw.x].sort((a, b) => a - b), z: [...raw.z].sort((a, b) => a - b) };
+    return designFromState({ dimensions, dividers, walls }, quality);
+}
+
+// Bump when the geometry builders change output, so persisted caches miss
+export const GEOMETRY_VERSION = 2;
+
+// Lengths are compared at 1/10000 mm so float noise does not split cache entries
+const round = (v) => Math.round(v * 10000) / 10000;
+
+// WallState of a design, in sorted divider order. Accepts the serialized `walls`
+// produced by designFromState, or a legacy { 'X_raw_seg': true } hiddenSegments
+// map whose line numbers index the (possibly unsorted) divider arrays.
+export function wallsFromDesign(design) {
+    if (design.walls) return WallState.from(design.walls);
+
+    const rank = (values) => {
+        const order = values.map((v, i) => i).sort((a, b) => values[a] - values[b] || a - b);
+        const sortedIndex = new Map();
+        order.forEach((raw, k) => sortedIndex.set(raw, k));
+        return sortedIndex;
+    };
+    const rankX = rank(design.dividers.x);
+    const rankZ = rank(design.dividers.z);
+    const walls = new WallState(design.dividers.x.length, design.dividers.z.length);
+
+    const hidden = design.hiddenSegments || {};
+    Object.keys(hidden).forEach(key => {
+        if (!hidden[key]) return;
+        const [axis, raw, seg] = key.split('_');
+        const line = (axis === 'X' ? rankX : rankZ).get(Number(raw));
+        if (line !== undefined) walls.setHidden(axis, line, Number(seg), true);
+    });
+    return walls;
+}
+
+// Stable string form of a design: fixed field order, rounded lengths, sorted
+// dividers, hidden segments listed by sorted line and spatial segment index.
+export function serializeDesign(design) {
+    const sortAxis = (values) => values.map(round).sort((a, b) => a - b);
+    const hidden = [];
+    wallsFromDesign(design).forEachHidden((axis, line, seg) => hidden.push(`${axis}${line}.${seg}`));
+
+    return JSON.stringify([
+        GEOMETRY_VERSION,
+        round(design.l), round(design.w), round(design.h), round(design.r), round(design.wallThickness),
+        sortAxis(design.dividers.x), sortAxis(design.dividers.z),
+        hidden,
+        design.quality || 'full',
+        design.wallMode || 'auto'
+    ]);
+}
+
+// 53-bit string hash (cyrb53), as 14 hex digits
+export function hashString(str, seed = 0) {
+    let h1 = 0xdeadbeef ^ seed;
+    let h2 = 0x41c6ce57 ^ seed;
+    for (let i = 0; i < str.length; i++) {
+        const ch = str.charCodeAt(i);
+        h1 = Math.imul(h1 ^ ch, 2654435761);
+        h2 = Math.imul(h2 ^ ch, 1597334677);
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return (4294967296 * (2097151 & h2) + (h1 >>> 0)).toString(16).padStart(14, '0');
+}
+
+// Content address of a design: equal geometry inputs give equal hashes
+export function hashDesign(design) {
+    return hashString(serializeDesign(design));
+}
@@ -10,9 +10,46 @@ export class EventBus {
         this.listeners[event].push(callback);
     }
 
+    // Subscribe with "latest state per frame" delivery: any number of emits
+    // within one animation frame result in a single call with the last payload.
+    // Accepts an array of events to coalesce several event types into one call.
+    onFrame(events, callback) {
+        let scheduled = false;
+        let latest;
+
+        const wrapper = (data) => {
+            latest = data;
+            if (scheduled) return;
+            scheduled = true;
+            requestAnimationFrame(() => {
+                scheduled = false;
+                if (!EventBus.record) {
+                    callback(latest);
+                    return;
+                }
+                const start = performance.now();
+                callback(latest);
+                EventBus.record(`frame:${[].concat(events).join('+')}`, performance.now() - start);
+            });
+        };
+        wrapper.original = callback;
+
+        [].concat(events).forEach(event => this.on(event, wrapper));
+    }
+
+    // Subscribe for a single delivery
+    once(event, callback) {
+        const wrapper = (data) => {
+            this.off(event, wrapper);
+            callback(data);
+        };
+        wrapper.original = callback;
+        this.on(event, wrapper);
+    }
+
     off(event, callback) {
         if (!this.listeners[event]) return;
-        this.listeners[event] = this.listeners[event].filter(cb => cb !== callback);
+        this.listeners[event] = this.listeners[event].filter(cb => cb !== callback && cb.original !== callback);
     }
 
     emit(event, data) {
@@ -20,3 +57,27 @@ export class EventBus {
         this.listeners[event].forEach(callback => callback(data));
     }
 }
+
+// Timing hook (see Perf.js). With a recorder installed, emit is replaced by a
+// version that times every event and listener; without one the plain emit is
+// restored, so disabled instrumentation costs nothing per event.
+EventBus.record = null;
+const plainEmit = EventBus.prototype.emit;
+
+function timedEmit(event, data) {
+    const listeners = this.listeners[event];
+    if (!listeners) return;
+    const record = EventBus.record;
+    const start = performance.now();
+    listeners.forEach((callback, i) => {
+        const t0 = performance.now();
+        callback(data);
+        record(`listener:${event}:${(callback.original || callback).name || i}`, performance.now() - t0);
+    });
+    record(`event:${event}`, performance.now() - start);
+}
+
+EventBus.instrument = (record) => {
+    EventBus.record = record;
+    EventBus.prototype.emit = record ? timedEmit : plainEmit;
+};
@@ -0,0 +1,47 @@
+// src/core/OrderNaming.js
+
+// Export file names: OrderCode_Color_Time_Deadline.<ext>, e.g.
+// K3X9QA_Brown_20260201-0615_20260204.stl. Shared by the in-app export and
+// the headless batch pipeline, so files from both sort and parse the same way.
+
+const ORDER_CODE_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789';
+
+// Days from order to print deadline
+export const DEADLINE_DAYS = 3;
+
+export function generateOrderCode() {
+    let result = '';
+    for (let i = 0; i < 6; i++) {
+        result += ORDER_CODE_CHARS.charAt(Math.floor(Math.random() * ORDER_CODE_CHARS.length));
+    }
+    return result;
+}
+
+// yyyymmdd, or yyyymmdd-HHMM (local time)
+export function formatDate(date, includeTime = false) {
+    const yyyy = date.getFullYear();
+    const mm = String(date.getMonth() + 1).padStart(2, '0');
+    const dd = String(date.getDate()).padStart(2, '0');
+
+    let str = `${yyyy}${mm}${dd}`;
+    if (includeTime) {
+        const HH = String(date.getHours()).padStart(2, '0');
+        const MM = String(date.getMinutes()).padStart(2, '0');
+        str += `-${HH}${MM}`;
+    }
+    return str;
+}
+
+export function capitalize(str) {
+    if (!str) return '';
+    return str.charAt(0).toUpperCase() + str.slice(1);
+}
+
+// Missing fields get a fresh order code, the current time and the default deadline
+export function exportFileName({ orderCode = generateOrderCode(), theme = 'brown', orderTime = new Date(), deadline = null, extension = 'stl' } = {}) {
+    if (!deadline) {
+        deadline = new Date(orderTime);
+        deadline.setDate(deadline.getDate() + DEADLINE_DAYS);
+    }
+    return `${orderCode}_${capitalize(theme)}_${formatDate(orderTime, true)}_${formatDate(deadline, false)}.${extension}`;
+}
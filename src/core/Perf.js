@@ -0,0 +1,239 @@
+// src/core/Perf.js
+import { EventBus } from './EventBus.js';
+
+// Opt-in performance instrumentation. Disabled by default and free when off:
+// event dispatch is only swapped for a timed version while enabled, and every
+// other probe is a single `if (perf.enabled)` check around performance.now().
+//
+// Enable with ?perf (?perf=hud adds the on-screen HUD), with
+// localStorage.trayPerf = '1' | 'hud', or at runtime through window.__trayPerf:
+//   __trayPerf.enable({ hud: true, persist: true })
+//   __trayPerf.snapshot()   -> { timings: { name: { count, mean, p50, p95, max, total } }, frames, longTasks }
+//   __trayPerf.reset()
+//   __trayPerf.disable()
+// Module is DOM-free so the geometry worker can record spans too (see drain/merge).
+
+// Histogram bucket upper bounds in ms
+const BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33, 50, 100, 250, 500, 1000, Infinity];
+
+class Histogram {
+    constructor() {
+        this.counts = new Uint32Array(BUCKETS.length);
+        this.count = 0;
+        this.total = 0;
+        this.max = 0;
+    }
+
+    add(ms) {
+        let b = 0;
+        while (ms > BUCKETS[b]) b++;
+        this.counts[b]++;
+        this.count++;
+        this.total += ms;
+        if (ms > this.max) this.max = ms;
+    }
+
+    // Upper bound of the bucket holding the q-quantile, capped at the max seen
+    quantile(q) {
+        const rank = Math.ceil(q * this.count);
+        let seen = 0;
+        for (let b = 0; b < BUCKETS.length; b++) {
+            seen += this.counts[b];
+            if (seen >= rank) return Math.min(BUCKETS[b], this.max);
+        }
+        return this.max;
+    }
+
+    summary() {
+        const round = (v) => Math.round(v * 1000) / 1000;
+        return {
+            count: this.count,
+            mean: round(this.count ? this.total / this.count : 0),
+            p50: round(this.quantile(0.5)),
+            p95: round(this.quantile(0.95)),
+            max: round(this.max),
+            total: round(this.total)
+        };
+    }
+}
+
+export class Perf {
+    constructor() {
+        this.enabled = false;
+        this.histograms = new Map();
+        this.samples = []; // [name, ms] pairs not yet drained (worker -> page)
+        this.longTasks = 0;
+        this.frameHandle = 0;
+        this.lastFrame = 0;
+        this.observer = null;
+        this.hudEl = null;
+        this.hudTimer = null;
+    }
+
+    now() {
+        return performance.now();
+    }
+
+    enable({ hud = false, persist = false } = {}) {
+        if (persist && typeof localStorage !== 'undefined') localStorage.setItem('trayPerf', hud ? 'hud' : '1');
+        if (hud) this.showHud();
+        if (this.enabled) return;
+        this.enabled = true;
+
+        EventBus.instrument((name, ms) => this.record(name, ms));
+        this.startFrameTimer();
+        this.observeLongTasks();
+    }
+
+    disable() {
+        if (typeof localStorage !== 'undefined') localStorage.removeItem('trayPerf');
+        this.hideHud();
+        if (!this.enabled) return;
+        this.enabled = false;
+
+        EventBus.instrument(null);
+        if (this.frameHandle) cancelAnimationFrame(this.frameHandle);
+        this.frameHandle = 0;
+        if (this.observer) this.observer.disconnect();
+        this.observer = null;
+    }
+
+    record(name, ms) {
+        let histogram = this.histograms.get(name);
+        if (!histogram) {
+            histogram = new Histogram();
+            this.histograms.set(name, histogram);
+        }
+        histogram.add(ms);
+        this.samples.push(name, ms);
+        if (this.samples.length > 2048) this.samples.splice(0, 1024);
+    }
+
+    // Close a span opened with perf.now(); also shows up in the DevTools timeline
+    measure(name, start, end = performance.now()) {
+        this.record(name, end - start);
+        if (typeof performance.measure === 'function') {
+            try {
+                performance.measure(name, { start, end });
+            } catch (e) {
+                // User Timing L2 only (no options object): the histogram still has it
+            }
+        }
+    }
+
+    // Samples recorded since the last drain, as a flat [name, ms, ...] list for postMessage
+    drain() {
+        const samples = this.samples;
+        this.samples = [];
+        return samples;
+    }
+
+    // Fold drained samples from another thread in under a prefix
+    merge(samples, prefix) {
+        for (let i = 0; i < samples.length; i += 2) this.record(prefix + samples[i], samples[i + 1]);
+    }
+
+    startFrameTimer() {
+        if (typeof requestAnimationFrame === 'undefined') return;
+        this.lastFrame = 0;
+        const tick = (t) => {
+            if (this.lastFrame) this.record('frame', t - this.lastFrame);
+            this.lastFrame = t;
+            this.frameHandle = requestAnimationFrame(tick);
+        };
+        this.frameHandle = requestAnimationFrame(tick);
+    }
+
+    observeLongTasks() {
+        if (typeof PerformanceObserver === 'undefined') return;
+        try {
+            this.observer = new PerformanceObserver(list => {
+                list.getEntries().forEach(entry => {
+                    this.longTasks++;
+                    this.record('longtask', entry.duration);
+                });
+            });
+            this.observer.observe({ type: 'longtask', buffered: false });
+        } catch (e) {
+            this.observer = null; // Long task API not supported (Firefox, Safari)
+        }
+    }
+
+    snapshot() {
+        const timings = {};
+        this.histograms.forEach((histogram, name) => { timings[name] = histogram.summary(); });
+        const frame = timings.frame;
+        return {
+            enabled: this.enabled,
+            timings,
+            frames: frame ? { count: frame.count, fps: frame.mean ? Math.round(1000 / frame.mean) : 0, p95: frame.p95 } : null,
+            longTasks: this.longTasks
+        };
+    }
+
+    reset() {
+        this.histograms.clear();
+        this.samples = [];
+        this.longTasks = 0;
+        if (typeof performance.clearMeasures === 'function') performance.clearMeasures();
+    }
+
+    // Small fixed overlay: frame rate, long tasks and the most expensive timings
+    showHud() {
+        if (this.hudEl || typeof document === 'undefined') return;
+
+        const el = document.createElement('div');
+        el.id = 'perf-hud';
+        el.style.cssText = `
+            position: fixed; right: 8px; bottom: 8px; z-index: 10005;
+            background: rgba(0,0,0,0.75); color: #a1a1aa; pointer-events: none;
+            font: 10px/1.4 monospace; padding: 6px 8px; border-radius: 6px;
+            white-space: pre;
+        `;
+        document.body.appendChild(el);
+        this.hudEl = el;
+
+        const update = () => {
+            const s = this.snapshot();
+            const top = Object.entries(s.timings)
+                .filter(([name]) => name !== 'frame')
+                .sort((a, b) => b[1].total - a[1].total)
+                .slice(0, 8)
+                .map(([name, t]) => `${name.padEnd(32).slice(0, 32)} ${t.p50.toFixed(2).padStart(7)} ${t.p95.toFixed(2).padStart(7)} ${String(t.count).padStart(6)}`);
+            const frames = s.frames ? `${s.frames.fps} fps  p95 ${s.frames.p95.toFixed(1)}ms` : 'no frames';
+            el.textContent = `${frames}  long tasks ${s.longTasks}\n` +
+                             `${'timing'.padEnd(32)} ${'p50'.padStart(7)} ${'p95'.padStart(7)} ${'n'.padStart(6)}\n` +
+                             top.join('\n');
+        };
+        update();
+        this.hudTimer = setInterval(update, 500);
+    }
+
+    hideHud() {
+        if (!this.hudEl) return;
+        clearInterval(this.hudTimer);
+        this.hudEl.remove();
+        this.hudEl = null;
+        this.hudTimer = null;
+    }
+
+    // window.__trayPerf, and auto-enable from the URL or a persisted flag
+    exposeGlobal() {
+        if (typeof window === 'undefined') return;
+        window.__trayPerf = {
+            enable: (options) => this.enable(options),
+            disable: () => this.disable(),
+            snapshot: () => this.snapshot(),
+            reset: () => this.reset(),
+            hud: (show = true) => (show ? this.showHud() : this.hideHud())
+        };
+
+        const param = new URLSearchParams(window.location.search).get('perf');
+        const stored = typeof localStorage !== 'undefined' ? localStorage.getItem('trayPerf') : null;
+        const mode = param !== null ? param : stored;
+        if (mode !== null) this.enable({ hud: mode === 'hud' });
+    }
+}
+
+// One instance per thread
+export const perf = new Perf();
@@ -0,0 +1,82 @@
+// src/core/Plate.js
+import { hashDesign, hashString } from './Design.js';
+import { packRects } from '../utils/RectPacker.js';
+
+// Build plate: several trays (each a design plus color) packed onto one
+// printer bed. Trays with equal design hashes share one geometry, drawn as
+// instances in the viewport and written from the same buffers on export.
+// World layout: the bed is centered on the origin, width along x, depth along z.
+
+export const BED_PRESETS = {
+    'bambu-x1': { name: 'Bambu X1 / P1 (256 x 256)', width: 256, depth: 256 },
+    'prusa-mk4': { name: 'Prusa MK4 (250 x 210)', width: 250, depth: 210 },
+    'ender-3': { name: 'Ender 3 (220 x 220)', width: 220, depth: 220 },
+    'large': { name: 'Large format (350 x 350)', width: 350, depth: 350 }
+};
+
+export const PLATE_DEFAULTS = {
+    bed: { preset: 'bambu-x1', width: 256, depth: 256 },
+    spacing: 5,  // gap between trays
+    margin: 5    // kept free along the bed edges
+};
+
+// Packs the plate's trays onto its bed:
+// -> { placements: [{ id, hash, x, y, z, rotated, w, d }], unplaced: [id], groups: Map(hash -> design) }
+// x, z are tray centers; y lifts the tray (centered on its height) onto the bed
+// at y = 0; w, d are the footprint on the bed (after rotation).
+export function layoutPlate(plate) {
+    const { bed, spacing, margin } = plate;
+    const groups = new Map();
+    const hashes = new Map();
+    const rects = plate.items.map(item => {
+        const hash = hashDesign(item.design);
+        hashes.set(item.id, hash);
+        if (!groups.has(hash)) groups.set(hash, item.design);
+        return { id: item.id, w: item.design.l, h: item.design.w };
+    });
+
+    const usableW = bed.width - 2 * margin;
+    const usableD = bed.depth - 2 * margin;
+    const { placed, unplaced } = packRects(rects, usableW, usableD, { spacing });
+
+    const designs = new Map(plate.items.map(item => [item.id, item.design]));
+    const placements = placed.map(p => ({
+        id: p.id,
+        hash: hashes.get(p.id),
+        x: p.x + p.w / 2 - usableW / 2,
+        y: designs.get(p.id).h / 2,
+        z: p.y + p.h / 2 - usableD / 2,
+        rotated: p.rotated,
+        w: p.w,
+        d: p.h
+    }));
+    return { placements, unplaced, groups };
+}
+
+// Column-major 4x4 (THREE.Matrix4 elements) placing a tray: quarter turn about +y
+// when rotated, then the move to its center. Shared by the viewport and the export.
+export function placementMatrix({ x, y = 0, z, rotated }) {
+    const c = rotated ? 0 : 1;
+    const s = rotated ? 1 : 0;
+    return [c, 0, -s, 0, 0, 1, 0, 0, s, 0, c, 0, x, y, z, 1];
+}
+
+// Export description of a laid-out plate: unique designs once, placements by hash
+export function plateExportDesign(plate, layout, toExportDesign = (design) => design) {
+    const designs = {};
+    layout.groups.forEach((design, hash) => { designs[hash] = toExportDesign(design); });
+    return {
+        plate: {
+            bed: { width: plate.bed.width, depth: plate.bed.depth },
+            designs,
+            placements: layout.placements.map(({ hash, x, y, z, rotated }) => ({ hash, x, y, z, rotated }))
+        }
+    };
+}
+
+// Content address of a plate export: designs and rounded placements, in placement order
+export function hashPlateExport(exportDesign) {
+    const { designs, placements } = exportDesign.plate;
+    const parts = placements.map(p => `${hashDesign(designs[p.hash])}@${p.x.toFixed(3)},${p.y.toFixed(3)},${p.z.toFixed(3)},${p.rotated ? 1 : 0}`);
+    return hashString(`plate;${parts.join(';')}`);
+}
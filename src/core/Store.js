@@ -1,4 +1,6 @@
 import { EventBus } from './EventBus.js';
+import { WallState } from './WallState.js';
+import { PLATE_DEFAULTS } from './Plate.js';
 
 export class Store extends EventBus {
     constructor() {
@@ -15,13 +17,62 @@ export class Store extends EventBus {
                 x: [],
                 z: []
             },
-            hiddenSegments: {},
+            walls: new WallState(), // hidden wall segments, one bitset row per divider line
             isEditing: false,
+            isInteracting: false, // true during a divider drag or slider scrub (preview geometry)
             mobileView: '3d', // '3d' or 'top'
             tutorialStep: 0,
             colorTheme: 'brown', // 'brown' or 'white'
-            logo: null // { type: 'image'|'text', data: string, x: number, z: number, scale: number }
+            logo: null, // { type: 'image'|'text', data: Blob|string, x: number, z: number, scale: number }
+            // Build plate (see Plate.js); items are { id, design, theme } snapshots of the editor
+            plate: {
+                enabled: false,
+                bed: { ...PLATE_DEFAULTS.bed },
+                spacing: PLATE_DEFAULTS.spacing,
+                margin: PLATE_DEFAULTS.margin,
+                items: []
+            }
         };
+        this.nextPlateItemId = 1;
+
+        // Transaction state: while batchDepth > 0, emits are queued and merged per event type
+        this.batchDepth = 0;
+        this.pendingEvents = new Map();
+    }
+
+    // Run several mutations as one transaction. Each event type is delivered
+    // at most once on commit, carrying the latest payload.
+    batch(fn) {
+        this.beginBatch();
+        try {
+            fn();
+        } finally {
+            this.commitBatch();
+        }
+    }
+
+    beginBatch() {
+        this.batchDepth++;
+    }
+
+    commitBatch() {
+        if (this.batchDepth === 0) return;
+        this.batchDepth--;
+        if (this.batchDepth > 0) return;
+
+        const pending = this.pendingEvents;
+        this.pendingEvents = new Map();
+        pending.forEach((data, event) => super.emit(event, data));
+    }
+
+    emit(event, data) {
+        if (this.batchDepth > 0) {
+            // Re-insert so delivery order follows the last mutation of each type
+            this.pendingEvents.delete(event);
+            this.pendingEvents.set(event, data);
+            return;
+        }
+        super.emit(event, data);
     }
 
     setColorTheme(theme) {
@@ -68,21 +119,43 @@ export class Store extends EventBus {
         // Prevent duplicates (tolerance 0.1)
         if (arr.some(v => Math.abs(v - pos) < 0.1)) return;
 
-        arr.push(pos);
-        arr.sort((a, b) => a - b);
+        // Insert at the sorted position; the wall rows shift with it
+        let k = 0;
+        while (k < arr.length && arr[k] < pos) k++;
+        arr.splice(k, 0, pos);
+        this.state.walls.insertLine(axis === 'x' ? 'X' : 'Z', k);
         this.emit('dividersChanged', this.state.dividers);
     }
 
+    // newDividers is the current line list with edited values (same order as the
+    // state), or a completely new list. Edited lines keep their hidden segments
+    // through re-sorting; lines merged as duplicates are removed from the walls.
     updateDividers(axis, newDividers) {
+        const wallAxis = axis === 'x' ? 'X' : 'Z';
+        const walls = this.state.walls;
+        const order = newDividers.map((v, i) => i).sort((a, b) => newDividers[a] - newDividers[b] || a - b);
+
         // Filter duplicates
-        const sorted = [...newDividers].sort((a, b) => a - b);
         const unique = [];
-        sorted.forEach(v => {
+        const dropped = [];
+        order.forEach((i, sortedIdx) => {
+            const v = newDividers[i];
             if (unique.length === 0 || Math.abs(v - unique[unique.length - 1]) >= 0.1) {
                 unique.push(v);
+            } else {
+                dropped.push(sortedIdx);
             }
         });
 
+        if (newDividers.length === walls.lineCount(wallAxis)) {
+            walls.permuteLines(wallAxis, order);
+            for (let d = dropped.length - 1; d >= 0; d--) walls.removeLine(wallAxis, dropped[d]);
+        } else {
+            // Unrelated list: start this axis over with every segment visible
+            while (walls.lineCount(wallAxis) > 0) walls.removeLine(wallAxis, walls.lineCount(wallAxis) - 1);
+            unique.forEach((v, k) => walls.insertLine(wallAxis, k));
+        }
+
         if (axis === 'x') {
             this.state.dividers.x = unique;
         } else {
@@ -91,9 +164,23 @@ export class Store extends EventBus {
         this.emit('dividersChanged', this.state.dividers);
     }
 
-    setHiddenSegments(segments) {
-        this.state.hiddenSegments = segments;
-        this.emit('hiddenSegmentsChanged', this.state.hiddenSegments);
+    // Remove the divider at sorted index k, merging the wall segments it split
+    removeDivider(axis, k) {
+        const arr = axis === 'x' ? this.state.dividers.x : this.state.dividers.z;
+        if (k < 0 || k >= arr.length) return;
+        arr.splice(k, 1);
+        this.state.walls.removeLine(axis === 'x' ? 'X' : 'Z', k);
+        this.emit('dividersChanged', this.state.dividers);
+    }
+
+    setSegmentHidden(axis, line, seg, hidden = true) {
+        if (!this.state.walls.setHidden(axis, line, seg, hidden)) return;
+        this.emit('hiddenSegmentsChanged', this.state.walls);
+    }
+
+    setWalls(walls) {
+        this.state.walls = walls;
+        this.emit('hiddenSegmentsChanged', this.state.walls);
     }
 
     setEditing(isEditing) {
@@ -101,11 +188,55 @@ export class Store extends EventBus {
         this.emit('editingStateChanged', this.state.isEditing);
     }
 
+    setInteracting(isInteracting) {
+        if (this.state.isInteracting === isInteracting) return;
+        this.state.isInteracting = isInteracting;
+        this.emit('interactionChanged', this.state.isInteracting);
+    }
+
     setMobileView(view) {
         this.state.mobileView = view;
         this.emit('mobileViewChanged', this.state.mobileView);
     }
 
+    setPlateMode(enabled) {
+        if (this.state.plate.enabled === enabled) return;
+        this.state.plate.enabled = enabled;
+        this.emit('plateModeChanged', enabled);
+    }
+
+    // Adds `count` copies of a design (from designFromState) in a color theme
+    addPlateItems(design, theme, count = 1) {
+        for (let k = 0; k < count; k++) {
+            this.state.plate.items.push({ id: this.nextPlateItemId++, design, theme });
+        }
+        this.emit('plateChanged', this.state.plate);
+    }
+
+    removePlateItem(id) {
+        const items = this.state.plate.items;
+        const k = items.findIndex(item => item.id === id);
+        if (k === -1) return;
+        items.splice(k, 1);
+        this.emit('plateChanged', this.state.plate);
+    }
+
+    clearPlate() {
+        this.state.plate.items = [];
+        this.emit('plateChanged', this.state.plate);
+    }
+
+    // bed: { preset, width, depth }; spacing and margin in mm
+    setPlateLayout({ bed, spacing, margin }) {
+        const plate = this.state.plate;
+        if (bed) plate.bed = { ...plate.bed, ...bed };
+        plate.bed.width = Math.max(50, Math.min(1000, plate.bed.width));
+        plate.bed.depth = Math.max(50, Math.min(1000, plate.bed.depth));
+        if (spacing !== undefined) plate.spacing = Math.max(0, Math.min(50, spacing));
+        if (margin !== undefined) plate.margin = Math.max(0, Math.min(50, margin));
+        this.emit('plateChanged', plate);
+    }
+
     getState() {
         return this.state;
     }
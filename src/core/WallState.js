@@ -0,0 +1,216 @@
+// src/core/WallState.js
+
+// Hidden wall segments as one bitset row per divider line.
+// Lines are indexed in sorted divider order (the Store keeps dividers sorted).
+//   X line k has zLines + 1 segments (spatial index along Z)
+//   Z line k has xLines + 1 segments (spatial index along X)
+// Rows are stored back to back in one Uint32Array per axis with a fixed word
+// stride, so the whole state is a few typed arrays that clone/transfer cheaply.
+export class WallState {
+    constructor(xLines = 0, zLines = 0) {
+        this.xLines = xLines;
+        this.zLines = zLines;
+        this.x = new Uint32Array(xLines * WallState.words(zLines + 1));
+        this.z = new Uint32Array(zLines * WallState.words(xLines + 1));
+    }
+
+    static words(bits) {
+        return (bits + 31) >>> 5;
+    }
+
+    lineCount(axis) {
+        return axis === 'X' ? this.xLines : this.zLines;
+    }
+
+    segmentCount(axis) {
+        return axis === 'X' ? this.zLines + 1 : this.xLines + 1;
+    }
+
+    stride(axis) {
+        return WallState.words(this.segmentCount(axis));
+    }
+
+    rows(axis) {
+        return axis === 'X' ? this.x : this.z;
+    }
+
+    isHidden(axis, line, seg) {
+        if (line < 0 || line >= this.lineCount(axis) || seg < 0 || seg >= this.segmentCount(axis)) return false;
+        return ((this.rows(axis)[line * this.stride(axis) + (seg >>> 5)] >>> (seg & 31)) & 1) === 1;
+    }
+
+    setHidden(axis, line, seg, hidden = true) {
+        if (line < 0 || line >= this.lineCount(axis) || seg < 0 || seg >= this.segmentCount(axis)) return false;
+        const rows = this.rows(axis);
+        const word = line * this.stride(axis) + (seg >>> 5);
+        const mask = 1 << (seg & 31);
+        const before = rows[word];
+        rows[word] = hidden ? (before | mask) : (before & ~mask);
+        return rows[word] !== before;
+    }
+
+    toggle(axis, line, seg) {
+        this.setHidden(axis, line, seg, !this.isHidden(axis, line, seg));
+    }
+
+    // Every segment of the line hidden (the divider can be removed)
+    isLineHidden(axis, line) {
+        const stride = this.stride(axis);
+        const rows = this.rows(axis);
+        const segments = this.segmentCount(axis);
+        const base = line * stride;
+        for (let w = 0; w < stride; w++) {
+            const bits = Math.min(32, segments - w * 32);
+            const full = bits === 32 ? 0xFFFFFFFF : (1 << bits) - 1;
+            if ((rows[base + w] >>> 0) !== (full >>> 0)) return false;
+        }
+        return true;
+    }
+
+    hiddenCount() {
+        let count = 0;
+        [this.x, this.z].forEach(rows => {
+            for (let w = 0; w < rows.length; w++) {
+                let v = rows[w];
+                while (v) { v &= v - 1; count++; }
+            }
+        });
+        return count;
+    }
+
+    // Rebuild the cross-axis rows with a new segment count.
+    // mapBit(row, newSeg) returns the hidden bit for the new segment.
+    remapCross(axis, newSegments, mapBit) {
+        const cross = axis === 'X' ? 'Z' : 'X';
+        const lines = this.lineCount(cross);
+        const oldStride = this.stride(cross);
+        const oldRows = this.rows(cross);
+        const newStride = WallState.words(newSegments);
+        const newRows = new Uint32Array(lines * newStride);
+
+        for (let line = 0; line < lines; line++) {
+            const read = (seg) => (oldRows[line * oldStride + (seg >>> 5)] >>> (seg & 31)) & 1;
+            for (let seg = 0; seg < newSegments; seg++) {
+                if (mapBit(read, seg)) newRows[line * newStride + (seg >>> 5)] |= 1 << (seg & 31);
+            }
+        }
+
+        if (cross === 'X') this.x = newRows;
+        else this.z = newRows;
+    }
+
+    // New divider at sorted index k: an empty row, and the cross segment it
+    // lands in is split in two (both halves keep its hidden bit)
+    insertLine(axis, k) {
+        const segments = this.segmentCount(axis === 'X' ? 'Z' : 'X') + 1;
+        this.remapCross(axis, segments, (read, seg) => read(seg <= k ? seg : seg - 1));
+
+        const stride = this.stride(axis);
+        const rows = this.rows(axis);
+        const next = new Uint32Array(rows.length + stride);
+        next.set(rows.subarray(0, k * stride));
+        next.set(rows.subarray(k * stride), (k + 1) * stride);
+
+        if (axis === 'X') { this.x = next; this.xLines++; }
+        else { this.z = next; this.zLines++; }
+    }
+
+    // Remove the divider at sorted index k: its row is dropped, and the two
+    // cross segments on either side merge (hidden only if both were hidden)
+    removeLine(axis, k) {
+        const segments = this.segmentCount(axis === 'X' ? 'Z' : 'X') - 1;
+        this.remapCross(axis, segments, (read, seg) => {
+            if (seg < k) return read(seg);
+            if (seg === k) return read(k) & read(k + 1);
+            return read(seg + 1);
+        });
+
+        const stride = this.stride(axis);
+        const rows = this.rows(axis);
+        const next = new Uint32Array(rows.length - stride);
+        next.set(rows.subarray(0, k * stride));
+        next.set(rows.subarray((k + 1) * stride), k * stride);
+
+        if (axis === 'X') { this.x = next; this.xLines--; }
+        else { this.z = next; this.zLines--; }
+    }
+
+    // Reorder rows: order[newIndex] = oldIndex
+    permuteLines(axis, order) {
+        const stride = this.stride(axis);
+        const rows = this.rows(axis);
+        const next = new Uint32Array(rows.length);
+        order.forEach((oldIndex, newIndex) => {
+            next.set(rows.subarray(oldIndex * stride, (oldIndex + 1) * stride), newIndex * stride);
+        });
+        if (axis === 'X') this.x = next;
+        else this.z = next;
+    }
+
+    // Hidden flags expanded to one byte per segment, in RoomTopology's layout:
+    //   xHidden[k * (zLines + 1) + j], zHidden[k * (xLines + 1) + i]
+    toFlags() {
+        const expand = (axis) => {
+            const lines = this.lineCount(axis);
+            const segments = this.segmentCount(axis);
+            const stride = this.stride(axis);
+            const rows = this.rows(axis);
+            const flags = new Uint8Array(lines * segments);
+            for (let line = 0; line < lines; line++) {
+                for (let seg = 0; seg < segments; seg++) {
+                    flags[line * segments + seg] = (rows[line * stride + (seg >>> 5)] >>> (seg & 31)) & 1;
+                }
+            }
+            return flags;
+        };
+        return { xHidden: expand('X'), zHidden: expand('Z') };
+    }
+
+    // Visit every hidden segment as (axis, line, seg), X lines first
+    forEachHidden(callback) {
+        ['X', 'Z'].forEach(axis => {
+            const lines = this.lineCount(axis);
+            const segments = this.segmentCount(axis);
+            for (let line = 0; line < lines; line++) {
+                for (let seg = 0; seg < segments; seg++) {
+                    if (this.isHidden(axis, line, seg)) callback(axis, line, seg);
+                }
+            }
+        });
+    }
+
+    // Legacy { 'X_line_seg': true } map
+    toKeys() {
+        const keys = {};
+        this.forEachHidden((axis, line, seg) => { keys[`${axis}_${line}_${seg}`] = true; });
+        return keys;
+    }
+
+    static fromKeys(hiddenSegments, xLines, zLines) {
+        const walls = new WallState(xLines, zLines);
+        Object.keys(hiddenSegments || {}).forEach(key => {
+            if (!hiddenSegments[key]) return;
+            const [axis, line, seg] = key.split('_');
+            walls.setHidden(axis, Number(line), Number(seg), true);
+        });
+        return walls;
+    }
+
+    clone() {
+        return WallState.from(this.serialize());
+    }
+
+    // Plain object for postMessage / structured clone
+    serialize() {
+        return { xLines: this.xLines, zLines: this.zLines, x: this.x.slice(), z: this.z.slice() };
+    }
+
+    static from(data) {
+        const walls = new WallState(0, 0);
+        walls.xLines = data.xLines;
+        walls.zLines = data.zLines;
+        walls.x = Uint32Array.from(data.x);
+        walls.z = Uint32Array.from(data.z);
+        return walls;
+    }
+}
@@ -1,11 +1,35 @@
 // src/features/DividerSystem.js
 import { store } from '../core/Store.js';
+import { WallState } from '../core/WallState.js';
+
+// Number of values in a sorted array strictly below v
+function countBelow(sorted, v) {
+    let lo = 0, hi = sorted.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >>> 1;
+        if (sorted[mid] < v) lo = mid + 1;
+        else hi = mid;
+    }
+    return lo;
+}
+
+// Index of the value in a sorted array closest to v (-1 if empty)
+function nearestIndex(sorted, v) {
+    if (sorted.length === 0) return -1;
+    const k = countBelow(sorted, v);
+    if (k === 0) return 0;
+    if (k === sorted.length) return k - 1;
+    return (v - sorted[k - 1] <= sorted[k] - v) ? k - 1 : k;
+}
 
 export class DividerSystem {
-    constructor() {
+    constructor(sceneManager) {
+        this.sceneManager = sceneManager;
         this.draggingDivider = null;
         this.pendingAction = null;
         this.selectedForRemoval = null;
+        this.hoveredSegment = null;
+        this.highlightKey = '';
         this.isTouchInteracting = false;
 
         // UI Elements
@@ -66,9 +90,11 @@ export class DividerSystem {
         // Clear Button
         if (this.clearBtn) {
             this.clearBtn.addEventListener('click', () => {
-                store.updateDividers('x', []);
-                store.updateDividers('z', []);
-                store.setHiddenSegments({});
+                store.batch(() => {
+                    store.updateDividers('x', []);
+                    store.updateDividers('z', []);
+                    store.setWalls(new WallState());
+                });
             });
         }
     }
@@ -79,7 +105,7 @@ export class DividerSystem {
         }
     }
 
-    onMove({ world, client }) {
+    onMove({ world, client, rect }) {
         const state = store.getState();
         const { l, w } = state.dimensions;
 
@@ -91,17 +117,14 @@ export class DividerSystem {
             const limit = (this.draggingDivider.type === 'X' ? l : w) / 2 - 2;
             const val = Math.max(-limit, Math.min(limit, this.draggingDivider.type === 'X' ? world.x : world.z));
 
-            // Update
-            const divs = state.dividers;
-            if (this.draggingDivider.type === 'X') {
-                const newX = [...divs.x];
-                newX[this.draggingDivider.index] = val;
-                store.updateDividers('x', newX);
-            } else {
-                const newZ = [...divs.z];
-                newZ[this.draggingDivider.index] = val;
-                store.updateDividers('z', newZ);
-            }
+            // Update. Dividers are re-sorted on every change, so follow the
+            // dragged line to its new index (its hidden segments move with it).
+            const axis = this.draggingDivider.type === 'X' ? 'x' : 'z';
+            const next = [...state.dividers[axis]];
+            next[this.draggingDivider.index] = val;
+            store.updateDividers(axis, next);
+            this.draggingDivider.index = nearestIndex(store.getState().dividers[axis], val);
+            this.updateHighlight({ axis: this.draggingDivider.type, lineIdx: this.draggingDivider.index, segIdx: this.draggingDivider.segment });
 
             this.updateIndicator(client, '↔', 'active move');
             return;
@@ -110,6 +133,7 @@ export class DividerSystem {
         // Stop if outside or touching UI
         if (!world.isInside) {
             this.hideUI();
+            this.updateHighlight(null);
             return;
         }
 
@@ -125,7 +149,10 @@ export class DividerSystem {
 
             this.updateIndicator(client, '-', 'active' + (isConfirming ? ' remove-confirm' : ' move'));
             this.previewLine.style.display = 'none';
+            this.updateHighlight(hit);
         } else {
+            this.updateHighlight(null);
+
             // Check Add Preview
             const margin = 25;
             const isInsideW = Math.abs(world.x) < (l/2 - 2);
@@ -133,10 +160,10 @@ export class DividerSystem {
             const isNearH = Math.abs(world.z - w/2) < margin || Math.abs(world.z + w/2) < margin;
             const isNearV = Math.abs(world.x - l/2) < margin || Math.abs(world.x + l/2) < margin;
 
-            const rect = document.getElementById('view-top-placeholder').getBoundingClientRect();
-            const aspect = rect.width / rect.height;
-            const frustum = Math.max(w, l/aspect) * 1.4;
-            const pxPerUnit = rect.height / frustum;
+            // The preview spans the tray in the top view's own projection
+            const transform = this.sceneManager.topTransform;
+            const pxPerUnit = transform.scale(rect);
+            const corner = transform.toScreen(-l/2, -w/2, rect);
 
             if (isNearH && isInsideW) {
                 this.pendingAction = { type: 'addX', pos: world.x };
@@ -146,7 +173,7 @@ export class DividerSystem {
                 this.previewLine.style.width = '2px';
                 this.previewLine.style.height = `${w * pxPerUnit}px`;
                 this.previewLine.style.left = `${client.x}px`;
-                this.previewLine.style.top = `${rect.top + rect.height/2 - (w * pxPerUnit)/2}px`;
+                this.previewLine.style.top = `${corner.y}px`;
 
             } else if (isNearV && isInsideD) {
                 this.pendingAction = { type: 'addZ', pos: world.z };
@@ -156,7 +183,7 @@ export class DividerSystem {
                 this.previewLine.style.height = '2px';
                 this.previewLine.style.width = `${l * pxPerUnit}px`;
                 this.previewLine.style.top = `${client.y}px`;
-                this.previewLine.style.left = `${rect.left + rect.width/2 - (l * pxPerUnit)/2}px`;
+                this.previewLine.style.left = `${corner.x}px`;
 
             } else {
                 this.hideUI();
@@ -177,9 +204,11 @@ export class DividerSystem {
             // Start Drag
             this.draggingDivider = { type: hit.axis, index: hit.lineIdx, segment: hit.segIdx, hasMoved: false };
             document.body.style.cursor = 'grabbing';
+            store.setInteracting(true);
         } else {
             if (this.selectedForRemoval) {
                 this.selectedForRemoval = null;
+                this.updateHighlight(this.hoveredSegment);
             }
 
             if (!isTouch && this.pendingAction && (this.pendingAction.type === 'addX' || this.pendingAction.type === 'addZ')) {
@@ -205,12 +234,13 @@ export class DividerSystem {
                     this.selectedForRemoval.lineIdx === hit.lineIdx &&
                     this.selectedForRemoval.segIdx === hit.segIdx) {
 
-                    const key = `${hit.axis}_${hit.lineIdx}_${hit.segIdx}`;
-                    const newHidden = { ...store.getState().hiddenSegments, [key]: true };
-                    store.setHiddenSegments(newHidden);
+                    store.batch(() => {
+                        store.setSegmentHidden(hit.axis, hit.lineIdx, hit.segIdx, true);
+                        this.cleanupDividers();
+                    });
 
                     this.selectedForRemoval = null;
-                    this.cleanupDividers();
+                    this.hoveredSegment = null;
 
                 } else {
                     this.selectedForRemoval = hit;
@@ -219,6 +249,8 @@ export class DividerSystem {
                 this.selectedForRemoval = null;
             }
             this.draggingDivider = null;
+            store.setInteracting(false);
+            this.updateHighlight(this.hoveredSegment);
 
         } else if (this.isTouchInteracting) {
             if (this.pendingAction && (this.pendingAction.type === 'addX' || this.pendingAction.type === 'addZ')) {
@@ -230,34 +262,34 @@ export class DividerSystem {
         }
     }
 
+    // Dividers are kept sorted by the Store, so the nearest line and the
+    // segment under the pointer are both binary searches
     checkHit(wx, wz, l, w, dividers) {
         const hitMargin = 10;
 
-        for (let i = 0; i < dividers.x.length; i++) {
-            if (Math.abs(wx - dividers.x[i]) < hitMargin && Math.abs(wz) < w/2) {
-                const sortedZ = [-w/2, ...[...dividers.z].sort((a,b)=>a-b), w/2];
-                for(let j=0; j<sortedZ.length-1; j++) {
-                    if(wz >= sortedZ[j] && wz <= sortedZ[j+1]) {
-                        return { axis: 'X', lineIdx: i, segIdx: j };
-                    }
-                }
-            }
+        const xi = nearestIndex(dividers.x, wx);
+        if (xi !== -1 && Math.abs(wx - dividers.x[xi]) < hitMargin && Math.abs(wz) < w/2) {
+            return { axis: 'X', lineIdx: xi, segIdx: countBelow(dividers.z, wz) };
         }
 
-        for (let i = 0; i < dividers.z.length; i++) {
-            if (Math.abs(wz - dividers.z[i]) < hitMargin && Math.abs(wx) < l/2) {
-                 const sortedX = [-l/2, ...[...dividers.x].sort((a,b)=>a-b), l/2];
-                 for(let j=0; j<sortedX.length-1; j++) {
-                     if(wx >= sortedX[j] && wx <= sortedX[j+1]) {
-                         return { axis: 'Z', lineIdx: i, segIdx: j };
-                     }
-                 }
-            }
+        const zi = nearestIndex(dividers.z, wz);
+        if (zi !== -1 && Math.abs(wz - dividers.z[zi]) < hitMargin && Math.abs(wx) < l/2) {
+            return { axis: 'Z', lineIdx: zi, segIdx: countBelow(dividers.x, wx) };
         }
 
         return null;
     }
 
+    // Hovered and selected segments, drawn by the 2D top view; emitted only on change
+    updateHighlight(hover) {
+        this.hoveredSegment = hover;
+        const key = (seg) => (seg ? `${seg.axis}${seg.lineIdx}.${seg.segIdx}` : '');
+        const next = `${key(hover)}|${key(this.selectedForRemoval)}`;
+        if (next === this.highlightKey) return;
+        this.highlightKey = next;
+        store.emit('dividerHighlightChanged', { hover, selected: this.selectedForRemoval });
+    }
+
     updateIndicator(client, text, classes) {
         this.indicator.style.left = `${client.x - 18}px`;
         this.indicator.style.top = `${client.y - 18}px`;
@@ -289,86 +321,17 @@ export class DividerSystem {
         this.indicator.className = '';
     }
 
+    // Remove dividers whose segments are all hidden. Removing a line merges the
+    // cross segments it split (hidden only if both halves were), which never
+    // completes another line, so one pass per axis is enough.
     cleanupDividers() {
-        let changed = true;
-        const state = store.getState();
-        let { x: dX, z: dZ } = state.dividers;
-        let hidden = { ...state.hiddenSegments };
-
-        const updateHiddenMap = (removedAxis, removedArrIdx, removedSpatialIdx) => {
-            const newHidden = {};
-            for (let key in hidden) {
-                const parts = key.split('_');
-                const axis = parts[0];
-                const lineIdx = parseInt(parts[1]);
-                const segIdx = parseInt(parts[2]);
-
-                if (axis === removedAxis) {
-                    if (lineIdx < removedArrIdx) newHidden[key] = true;
-                    else if (lineIdx > removedArrIdx) newHidden[`${axis}_${lineIdx - 1}_${segIdx}`] = true;
-                } else {
-                    if (segIdx < removedSpatialIdx) newHidden[key] = true;
-                    else if (segIdx > removedSpatialIdx + 1) newHidden[`${axis}_${lineIdx}_${segIdx - 1}`] = true;
-                }
-            }
-
-            // Check for merged segments that should remain hidden
-            const crossAxis = removedAxis === 'X' ? 'Z' : 'X';
-            const crossDividers = removedAxis === 'X' ? dZ : dX;
-
-            for (let i = 0; i < crossDividers.length; i++) {
-                const k1 = `${crossAxis}_${i}_${removedSpatialIdx}`;
-                const k2 = `${crossAxis}_${i}_${removedSpatialIdx + 1}`;
-                if (hidden[k1] && hidden[k2]) {
-                    newHidden[`${crossAxis}_${i}_${removedSpatialIdx}`] = true;
-                }
-            }
-
-            return newHidden;
-        };
-
-        while(changed) {
-            changed = false;
-            // Check X
-            for(let i=0; i<dX.length; i++) {
-                let allHidden = true;
-                for(let j=0; j <= dZ.length; j++) {
-                    if(!hidden[`X_${i}_${j}`]) { allHidden = false; break; }
-                }
-                if(allHidden) {
-                    const val = dX[i];
-                    const sortedX = [...dX].sort((a,b)=>a-b);
-                    const spatialIdx = sortedX.indexOf(val);
-
-                    dX.splice(i, 1);
-                    hidden = updateHiddenMap('X', i, spatialIdx);
-                    changed = true;
-                    break;
-                }
-            }
-            if(changed) continue;
-
-            // Check Z
-            for(let i=0; i<dZ.length; i++) {
-                let allHidden = true;
-                for(let j=0; j <= dX.length; j++) {
-                    if(!hidden[`Z_${i}_${j}`]) { allHidden = false; break; }
+        store.batch(() => {
+            const { dividers, walls } = store.getState();
+            [['x', 'X'], ['z', 'Z']].forEach(([axis, wallAxis]) => {
+                for (let k = dividers[axis].length - 1; k >= 0; k--) {
+                    if (walls.isLineHidden(wallAxis, k)) store.removeDivider(axis, k);
                 }
-                if(allHidden) {
-                    const val = dZ[i];
-                    const sortedZ = [...dZ].sort((a,b)=>a-b);
-                    const spatialIdx = sortedZ.indexOf(val);
-
-                    dZ.splice(i, 1);
-                    hidden = updateHiddenMap('Z', i, spatialIdx);
-                    changed = true;
-                    break;
-                }
-            }
-        }
-
-        store.updateDividers('x', dX);
-        store.updateDividers('z', dZ);
-        store.setHiddenSegments(hidden);
+            });
+        });
     }
 }
@@ -1,5 +1,6 @@
 // src/features/EditSystem.js
 import { store } from '../core/Store.js';
+import { OverlayRecord } from '../systems/OverlayLayer.js';
 
 export class EditSystem {
     constructor(sceneManager) {
@@ -8,6 +9,10 @@ export class EditSystem {
         this.currentCallback = null;
         this.current3DPos = null;
 
+        // Same cached projection/style path as the 3D dimension labels
+        this.inputRecord = new OverlayRecord();
+        this.inputRecord.el = this.input;
+
         this.bindEvents();
     }
 
@@ -37,13 +42,13 @@ export class EditSystem {
         store.setEditing(true);
         this.currentCallback = cb;
         this.current3DPos = worldPos3D;
+        this.inputRecord.worldPos = worldPos3D;
 
-        this.input.style.display = 'block';
+        this.inputRecord.setVisible(true);
         this.input.value = val;
 
         // Position at click target (or initial 3D projection)
-        this.input.style.left = `${x}px`;
-        this.input.style.top = `${y}px`;
+        this.inputRecord.setPosition(x, y);
 
         this.input.focus();
         this.input.select();
@@ -68,7 +73,8 @@ export class EditSystem {
     cleanup() {
         store.setEditing(false);
         this.current3DPos = null;
-        this.input.style.display = 'none';
+        this.inputRecord.worldPos = null;
+        this.inputRecord.setVisible(false);
         this.currentCallback = null;
     }
 
@@ -76,23 +82,8 @@ export class EditSystem {
         if (!store.getState().isEditing || !this.current3DPos) return;
         if (rect3D.width === 0 || rect3D.height === 0) return;
 
-        const vector = new THREE.Vector3(this.current3DPos.x, this.current3DPos.y, this.current3DPos.z);
-
         // Apply rotation
         const boxGroup = this.sceneManager.boxGroup;
-        if (boxGroup) vector.applyQuaternion(boxGroup.quaternion);
-
-        vector.project(camera);
-
-        const x = (vector.x * 0.5 + 0.5) * rect3D.width;
-        const y = (-(vector.y) * 0.5 + 0.5) * rect3D.height;
-
-        if (vector.z < 1) {
-             this.input.style.display = 'block';
-             this.input.style.left = `${rect3D.left + x}px`;
-             this.input.style.top = `${rect3D.top + y}px`;
-        } else {
-             this.input.style.display = 'none';
-        }
+        this.inputRecord.project(camera, rect3D, boxGroup ? boxGroup.quaternion : null);
     }
 }
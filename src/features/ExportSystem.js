@@ -1,15 +1,56 @@
 // src/features/ExportSystem.js
 import { store } from '../core/Store.js';
+import { designFromState, hashDesign } from '../core/Design.js';
+import { layoutPlate, plateExportDesign, hashPlateExport } from '../core/Plate.js';
+import { geometryCache } from '../systems/GeometryCache.js';
+import { ExportPool } from '../systems/ExportPool.js';
+import { OrderIntake } from '../systems/OrderIntake.js';
+import { buildExportFile, exportExtension } from '../utils/ExportBuilder.js';
+import { exportFileName, generateOrderCode } from '../core/OrderNaming.js';
+import { perf } from '../core/Perf.js';
 
 const ENABLE_EXPORT = true;
 
+// Exports build on a small worker pool, so the customizer stays responsive
+const EXPORT_WORKERS = 2;
+
+// Bar position at the start of each stage; the upload fills the rest
+const STAGE_PROGRESS = { cache: 0.05, queued: 0.1, mesh: 0.15, write: 0.7, upload: 0.8, done: 1 };
+const STAGE_LABELS = {
+    cache: 'Reading cache',
+    queued: 'Queued',
+    mesh: 'Building solid',
+    write: 'Writing file',
+    upload: 'Uploading',
+    done: 'Done',
+    failed: 'Failed',
+    cancelled: 'Cancelled',
+    superseded: 'Replaced by newer design'
+};
+const ACTIVE_STAGES = ['cache', 'queued', 'mesh', 'write', 'upload'];
+
+// How long finished jobs stay in the list
+const DONE_LINGER_MS = 4000;
+
 export class ExportSystem {
     constructor(sceneManager) {
         this.sceneManager = sceneManager;
         this.btn = document.getElementById('export-btn');
+        this.formatSelect = document.getElementById('export-format');
+        this.list = document.getElementById('export-jobs');
+        this.lastReport = null;
+
+        this.pool = null; // created on first export
+        this.jobs = [];
+        this.nextJobId = 1;
+
+        // ?intake=<url> posts finished files to an order-intake endpoint
+        const intake = new URLSearchParams(window.location.search).get('intake');
+        this.intake = intake ? new OrderIntake(intake) : null;
 
         if (!ENABLE_EXPORT) {
             if (this.btn) this.btn.style.display = 'none';
+            if (this.formatSelect) this.formatSelect.style.display = 'none';
         } else {
             this.bindEvents();
         }
@@ -17,86 +58,279 @@ export class ExportSystem {
 
     bindEvents() {
         if (this.btn) {
-            this.btn.addEventListener('click', () => this.exportSTL());
+            this.btn.addEventListener('click', () => this.exportModel(this.formatSelect ? this.formatSelect.value : 'stl'));
         }
+        document.getElementById('plate-export-btn')?.addEventListener('click', () => {
+            this.exportPlate(this.formatSelect ? this.formatSelect.value : 'stl');
+        });
     }
 
-    generateOrderCode() {
-        const chars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789';
-        let result = '';
-        for (let i = 0; i < 6; i++) {
-            result += chars.charAt(Math.floor(Math.random() * chars.length));
-        }
-        return result;
+    // Formats are described in ExportBuilder.
+    // Queues an export and resolves when its file has been downloaded (and uploaded).
+    // Repeated clicks on an unchanged design join the running job; a job for an
+    // older design is cancelled. Finished files are cached by design hash, so
+    // re-exporting the same design is instant.
+    exportModel(format = 'stl') {
+        // Export uses its own, finer tessellation rather than the on-screen mesh,
+        // and always the exact traced room outlines. The geometry is already in
+        // tray space, so the live scene is never touched.
+        const state = store.getState();
+        const design = { ...designFromState(state, 'export'), wallMode: 'shape' };
+        return this.enqueue({ kind: 'tray', design, hash: hashDesign(design), format, theme: state.colorTheme });
     }
 
-    formatDate(date, includeTime = false) {
-        const yyyy = date.getFullYear();
-        const mm = String(date.getMonth() + 1).padStart(2, '0');
-        const dd = String(date.getDate()).padStart(2, '0');
+    // The whole build plate as one file, each distinct tray built once
+    exportPlate(format = 'stl') {
+        const plate = store.getState().plate;
+        const layout = layoutPlate(plate);
+        if (!layout.placements.length) return Promise.resolve();
+        if (layout.unplaced.length) console.warn(`${layout.unplaced.length} trays do not fit on the bed and are left out`);
 
-        let str = `${yyyy}${mm}${dd}`;
-        if (includeTime) {
-            const HH = String(date.getHours()).padStart(2, '0');
-            const MM = String(date.getMinutes()).padStart(2, '0');
-            str += `-${HH}${MM}`;
-        }
-        return str;
+        const design = plateExportDesign(plate, layout, (tray) => ({ ...tray, quality: 'export', wallMode: 'shape' }));
+        const placed = new Set(layout.placements.map(p => p.id));
+        const themes = new Set(plate.items.filter(item => placed.has(item.id)).map(item => item.theme));
+        const theme = themes.size === 1 ? [...themes][0] : 'mixed';
+        return this.enqueue({ kind: 'plate', design, hash: hashPlateExport(design), format, theme, label: `Plate x${layout.placements.length}` });
     }
 
-    capitalize(str) {
-        if (!str) return '';
-        return str.charAt(0).toUpperCase() + str.slice(1);
+    // Jobs of the same kind (tray or plate) for an older design are superseded
+    enqueue({ kind, design, hash, format, theme, label = null }) {
+        const key = `${format}:${hash}`;
+
+        const running = this.jobs.find(job => job.key === key && this.isActive(job));
+        if (running) {
+            running.theme = theme;
+            this.flash(running);
+            return running.promise;
+        }
+
+        this.jobs
+            .filter(job => job.kind === kind && job.hash !== hash && this.isActive(job))
+            .forEach(job => this.cancel(job, 'superseded'));
+        this.jobs.filter(job => job.stage === 'failed').forEach(job => this.removeJob(job));
+
+        const job = {
+            id: this.nextJobId++,
+            kind,
+            key,
+            hash,
+            format,
+            design,
+            theme,
+            label: label ? `${label} ${format.toUpperCase()}` : format.toUpperCase(),
+            stage: 'queued',
+            progress: STAGE_PROGRESS.queued,
+            controller: new AbortController(),
+            startedAt: perf.enabled ? perf.now() : 0,
+            el: null,
+            parts: null
+        };
+        this.jobs.push(job);
+        this.renderJob(job);
+        job.promise = this.runJob(job);
+        return job.promise;
     }
 
-    exportSTL() {
-        if (!this.sceneManager || !this.sceneManager.boxGroup) {
-            console.warn('Nothing to export');
-            return;
+    async runJob(job) {
+        const { signal } = job.controller;
+        const cacheKey = `export:${job.key}`;
+
+        try {
+            this.setStage(job, 'cache');
+            let data = await geometryCache.get(cacheKey);
+            if (!data) {
+                data = await this.buildFile(job);
+                geometryCache.put(cacheKey, data);
+            }
+            throwIfAborted(signal);
+
+            const extension = exportExtension(job.format);
+            const orderCode = generateOrderCode();
+            const fileName = exportFileName({ orderCode, theme: job.theme, extension });
+            this.download(data, fileName, extension);
+            if (perf.enabled) perf.measure(`export:${job.format}`, job.startedAt);
+
+            if (this.intake) {
+                this.setStage(job, 'upload');
+                const metadata = { orderCode, kind: job.kind, theme: job.theme, format: job.format, designHash: job.hash, design: job.design };
+                await this.intake.upload(data, fileName, {
+                    metadata,
+                    signal,
+                    onProgress: (fraction) => this.setProgress(job, STAGE_PROGRESS.upload + (1 - STAGE_PROGRESS.upload) * fraction)
+                });
+            }
+            this.setStage(job, 'done');
+        } catch (err) {
+            if (err.name === 'AbortError') {
+                this.setStage(job, job.cancelReason || 'cancelled');
+            } else {
+                console.error('Export failed', err);
+                this.setStage(job, 'failed');
+            }
         }
+        this.finish(job);
+    }
+
+    // Builds on the worker pool, or on the main thread where workers are unavailable
+    async buildFile(job) {
+        const pool = this.getPool();
+        if (!pool) return this.buildOnMainThread(job);
 
-        // We assume THREE.STLExporter is available globally via the script tag in index.html
-        // In a bundler environment we would import it.
-        if (typeof THREE.STLExporter === 'undefined') {
-            console.error('THREE.STLExporter is not loaded');
-            return;
+        let result;
+        try {
+            result = await pool.run(job.design, job.format, {
+                signal: job.controller.signal,
+                onProgress: (stage) => this.setStage(job, stage)
+            });
+        } catch (err) {
+            if (err.name === 'AbortError' || pool.workers.length) throw err;
+            console.warn('Export workers unavailable, building on main thread', err.message);
+            pool.terminate();
+            this.pool = false;
+            return this.buildOnMainThread(job);
         }
 
-        const exporter = new THREE.STLExporter();
-        const boxGroup = this.sceneManager.boxGroup;
+        if (perf.enabled) perf.record(`export:build:${job.format}`, result.ms);
+        this.logReport(result.report);
+        return result.data;
+    }
+
+    buildOnMainThread(job) {
+        const t0 = perf.enabled ? perf.now() : 0;
+        const { data, report } = buildExportFile(job.design, job.format, (stage) => this.setStage(job, stage));
+        if (perf.enabled) perf.measure(`export:build:${job.format}`, t0);
+        this.logReport(report);
+        return data;
+    }
+
+    getPool() {
+        if (this.pool === null) {
+            try {
+                this.pool = typeof Worker === 'undefined' ? false : new ExportPool(EXPORT_WORKERS);
+            } catch (e) {
+                console.warn('Export workers unavailable, building on main thread', e);
+                this.pool = false;
+            }
+        }
+        return this.pool || null;
+    }
 
-        // Reset rotation for export
-        const currentRotation = boxGroup.rotation.y;
-        boxGroup.rotation.y = 0;
-        boxGroup.updateMatrixWorld();
+    logReport(report) {
+        if (!report) return;
+        this.lastReport = report;
+        if (!report.manifold) {
+            console.warn('Exported solid is not manifold', report);
+        } else {
+            console.info(`Exported solid: ${report.triangles} triangles, ${(report.volume / 1000).toFixed(1)} cm3`);
+        }
+    }
 
-        const result = exporter.parse(boxGroup, { binary: true });
+    isActive(job) {
+        return ACTIVE_STAGES.includes(job.stage);
+    }
 
-        // Restore rotation
-        boxGroup.rotation.y = currentRotation;
-        boxGroup.updateMatrixWorld();
+    cancel(job, reason = 'cancelled') {
+        if (!this.isActive(job)) return;
+        job.cancelReason = reason;
+        job.controller.abort();
+    }
 
-        const blob = new Blob([result], { type: 'application/octet-stream' });
+    download(data, fileName, extension) {
+        const blob = new Blob([data], { type: extension === 'obj' ? 'text/plain' : 'application/octet-stream' });
         const link = document.createElement('a');
         link.style.display = 'none';
         document.body.appendChild(link);
         link.href = URL.createObjectURL(blob);
 
-        // Filename: OrderCode_Color_Time_Deadline.stl
-        const orderCode = this.generateOrderCode();
-        const now = new Date();
-        const orderTimeStr = this.formatDate(now, true);
+        // Filename: OrderCode_Color_Time_Deadline.<ext>
+        link.download = fileName;
 
-        const deadlineDate = new Date(now);
-        deadlineDate.setDate(deadlineDate.getDate() + 3);
-        const deadlineStr = this.formatDate(deadlineDate, false);
+        link.click();
+        document.body.removeChild(link);
+        setTimeout(() => URL.revokeObjectURL(link.href), 0);
+    }
 
-        const theme = store.getState().colorTheme; // 'brown', 'white', 'red', 'blue'
-        const colorStr = this.capitalize(theme);
+    setStage(job, stage) {
+        if (!this.isActive(job)) return; // Late progress from a cancelled build
+        job.stage = stage;
+        if (stage in STAGE_PROGRESS) job.progress = STAGE_PROGRESS[stage];
+        this.renderJob(job);
+    }
 
-        link.download = `${orderCode}_${colorStr}_${orderTimeStr}_${deadlineStr}.stl`;
+    setProgress(job, progress) {
+        job.progress = progress;
+        this.renderJob(job);
+    }
 
-        link.click();
-        document.body.removeChild(link);
+    // Finished jobs fade out; failed ones stay until dismissed or the next export
+    finish(job) {
+        this.renderJob(job);
+        if (job.stage !== 'failed') setTimeout(() => this.removeJob(job), DONE_LINGER_MS);
+    }
+
+    removeJob(job) {
+        this.jobs = this.jobs.filter(other => other !== job);
+        if (job.el) job.el.remove();
+        if (this.list && !this.jobs.length) this.list.classList.add('hidden');
     }
+
+    // --- Sidebar job list ---
+
+    renderJob(job) {
+        if (!this.list) return;
+        if (!job.el) {
+            job.parts = this.createJobElement(job);
+            job.el = job.parts.el;
+            this.list.appendChild(job.el);
+            this.list.classList.remove('hidden');
+        }
+
+        const { label, bar, action } = job.parts;
+        const active = this.isActive(job);
+        label.textContent = `${job.label} - ${STAGE_LABELS[job.stage] || job.stage}`;
+        bar.style.width = `${Math.round(job.progress * 100)}%`;
+        bar.classList.toggle('bg-red-500', job.stage === 'failed');
+        bar.classList.toggle('bg-zinc-600', !active && job.stage !== 'done' && job.stage !== 'failed');
+        action.setAttribute('aria-label', active ? 'Cancel export' : 'Dismiss');
+        action.title = active ? 'Cancel' : 'Dismiss';
+    }
+
+    createJobElement(job) {
+        const el = document.createElement('div');
+        el.className = 'flex items-center gap-2 text-[10px] text-zinc-400 transition-colors';
+        el.setAttribute('role', 'status');
+
+        const body = document.createElement('div');
+        body.className = 'flex-1 min-w-0';
+        const label = document.createElement('div');
+        label.className = 'truncate font-bold mb-1';
+        const track = document.createElement('div');
+        track.className = 'h-1 rounded-full bg-zinc-800 overflow-hidden';
+        const bar = document.createElement('div');
+        bar.className = 'h-full bg-[#2A9D8F] transition-all duration-300';
+        track.appendChild(bar);
+        body.append(label, track);
+
+        const action = document.createElement('button');
+        action.className = 'w-5 h-5 shrink-0 rounded-full text-zinc-500 hover:text-white hover:bg-zinc-700 transition-colors';
+        action.textContent = '×';
+        action.addEventListener('click', () => {
+            if (this.isActive(job)) this.cancel(job);
+            else this.removeJob(job);
+        });
+
+        el.append(body, action);
+        return { el, label, bar, action };
+    }
+
+    // A repeated click on an unchanged design points at the running job
+    flash(job) {
+        if (!job.el) return;
+        job.el.classList.add('text-white');
+        setTimeout(() => job.el && job.el.classList.remove('text-white'), 400);
+    }
+}
+
+function throwIfAborted(signal) {
+    if (signal.aborted) throw new DOMException('Export cancelled', 'AbortError');
 }
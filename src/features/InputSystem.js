@@ -1,98 +1,122 @@
 // src/features/InputSystem.js
 import { store } from '../core/Store.js';
 
+// One pointer pipeline for both viewports (mouse, pen and touch alike).
+// - Listeners sit on the viewport elements, not on window. A press captures the
+//   pointer, so a drag keeps reaching its viewport after leaving it.
+// - Moves are coalesced: the latest sample is dispatched once per animation
+//   frame. Down/up flush a pending move first, so handlers see them in order.
+// - Events are routed by viewport. The top view emits POINTER_* with world
+//   coordinates; the 3D view emits VIEW3D_POINTER_* with NDC and gets moves only
+//   while a press is active (nothing there reacts to hover).
+// - Viewport rects come from SceneManager's cache, not from layout reads.
+// - Nothing is dispatched while a label is being edited or in plate mode
+//   (the viewports then show the build plate, not the editable tray).
+const ROUTES = {
+    viewTop: { down: 'POINTER_DOWN', move: 'POINTER_MOVE', up: 'POINTER_UP', hover: true },
+    view3D: { down: 'VIEW3D_POINTER_DOWN', move: 'VIEW3D_POINTER_MOVE', up: 'VIEW3D_POINTER_UP', hover: false }
+};
+
 export class InputSystem {
-    constructor(sceneManager, container) {
+    constructor(sceneManager) {
         this.sceneManager = sceneManager;
-        this.container = container;
+        this.elements = {
+            viewTop: sceneManager.viewTopContainer,
+            view3D: sceneManager.view3DContainer
+        };
+
+        this.active = null; // { view, pointerId } while a pointer is pressed
+        this.pending = null; // Latest undispatched move
+        this.frameRequested = false;
+        this.flush = this.flush.bind(this);
 
         this.bindEvents();
     }
 
     bindEvents() {
-        this.container.addEventListener('mousedown', (e) => this.onMouseDown(e));
-        window.addEventListener('mousemove', (e) => this.onMouseMove(e));
-        window.addEventListener('mouseup', (e) => this.onMouseUp(e));
-
-        this.container.addEventListener('touchstart', (e) => this.onTouchStart(e));
-        this.container.addEventListener('touchmove', (e) => this.onTouchMove(e));
-        this.container.addEventListener('touchend', (e) => this.onTouchEnd(e));
+        Object.keys(ROUTES).forEach(view => {
+            const el = this.elements[view];
+            if (!el) return;
+            // The page must not pan or zoom while dragging inside a viewport
+            el.style.touchAction = 'none';
+
+            el.addEventListener('pointerdown', (e) => this.onPointerDown(view, e));
+            el.addEventListener('pointermove', (e) => this.onPointerMove(view, e));
+            el.addEventListener('pointerup', (e) => this.onPointerUp(view, e));
+            el.addEventListener('pointercancel', (e) => this.onPointerUp(view, e));
+            // One last hover sample outside the view lets listeners hide their UI
+            // (touch has no hover; its leave follows every lift)
+            el.addEventListener('pointerleave', (e) => {
+                if (e.pointerType !== 'touch') this.onPointerMove(view, e);
+            });
+        });
     }
 
-    getCoords(e) {
-        if (e.touches && e.touches.length > 0) {
-            return { clientX: e.touches[0].clientX, clientY: e.touches[0].clientY };
-        }
-        return { clientX: e.clientX, clientY: e.clientY };
+    blocked() {
+        const state = store.getState();
+        return state.isEditing || state.plate.enabled;
     }
 
-    getWorldCoords(e) {
-        const { clientX, clientY } = this.getCoords(e);
-        return this.sceneManager.getTopWorldCoords(clientX, clientY);
+    payload(view, e, samples = 1) {
+        const rect = this.sceneManager.getViewRect(view);
+        const client = { x: e.clientX, y: e.clientY };
+        const data = { client, rect, samples, isTouch: e.pointerType === 'touch', originalEvent: e };
+
+        if (view === 'viewTop') {
+            data.world = this.sceneManager.getTopWorldCoords(client.x, client.y, rect);
+        } else {
+            data.ndc = {
+                x: ((client.x - rect.left) / rect.width) * 2 - 1,
+                y: -((client.y - rect.top) / rect.height) * 2 + 1
+            };
+        }
+        return data;
     }
 
-    onMouseDown(e) {
-        if (store.getState().isEditing) return;
-        const world = this.getWorldCoords(e);
-        const { clientX, clientY } = this.getCoords(e);
-
-        store.emit('POINTER_DOWN', {
-            world,
-            client: { x: clientX, y: clientY },
-            originalEvent: e
-        });
-    }
+    onPointerDown(view, e) {
+        if (!e.isPrimary || this.blocked()) return;
+        this.flush();
 
-    onMouseMove(e) {
-        if (store.getState().isEditing) return;
-        // Optimization: Only calc world coords if we are interacting or over the container
-        // But for drag, we need global move.
-        // We can just emit client coords globally, and let listeners ask for world if needed?
-        // Or checking target?
-        // Let's rely on SceneManager logic inside the event handler.
-
-        const { clientX, clientY } = this.getCoords(e);
-        // Note: SceneManager.getTopWorldCoords works based on container bounding rect.
-        const world = this.sceneManager.getTopWorldCoords(clientX, clientY);
-
-        store.emit('POINTER_MOVE', {
-            world,
-            client: { x: clientX, y: clientY },
-            originalEvent: e
-        });
+        this.active = { view, pointerId: e.pointerId };
+        try {
+            this.elements[view].setPointerCapture(e.pointerId);
+        } catch (err) {
+            // Pointer already gone (e.g. a synthetic event); the drag still works inside the view
+        }
+        store.emit(ROUTES[view].down, this.payload(view, e));
     }
 
-    onMouseUp(e) {
-        store.emit('POINTER_UP', { originalEvent: e });
-    }
+    onPointerMove(view, e) {
+        if (!e.isPrimary) return;
+        if (this.active ? this.active.view !== view : !ROUTES[view].hover) return;
 
-    onTouchStart(e) {
-        if (store.getState().isEditing) return;
-        // e.preventDefault(); // Prevent scroll? Maybe handled by CSS touch-action
-        const world = this.getWorldCoords(e);
-        const { clientX, clientY } = this.getCoords(e);
+        // A 1000 Hz mouse delivers several samples per frame; only the newest is dispatched
+        const coalesced = e.getCoalescedEvents ? e.getCoalescedEvents() : [];
+        const samples = (this.pending && this.pending.view === view ? this.pending.samples : 0) + Math.max(1, coalesced.length);
+        this.pending = { view, event: coalesced.length ? coalesced[coalesced.length - 1] : e, samples };
 
-        store.emit('POINTER_DOWN', {
-            world,
-            client: { x: clientX, y: clientY },
-            isTouch: true
-        });
+        if (!this.frameRequested) {
+            this.frameRequested = true;
+            requestAnimationFrame(this.flush);
+        }
     }
 
-    onTouchMove(e) {
-        if (store.getState().isEditing) return;
-        // e.preventDefault();
-        const world = this.getWorldCoords(e);
-        const { clientX, clientY } = this.getCoords(e);
+    // Dispatch the pending move, if any (rAF callback, or before a down/up)
+    flush() {
+        this.frameRequested = false;
+        if (!this.pending) return;
+        const { view, event, samples } = this.pending;
+        this.pending = null;
 
-        store.emit('POINTER_MOVE', {
-            world,
-            client: { x: clientX, y: clientY },
-            isTouch: true
-        });
+        if (this.blocked()) return;
+        store.emit(ROUTES[view].move, this.payload(view, event, samples));
     }
 
-    onTouchEnd(e) {
-        store.emit('POINTER_UP', { isTouch: true });
+    onPointerUp(view, e) {
+        if (!this.active || this.active.pointerId !== e.pointerId) return;
+        this.flush();
+
+        this.active = null;
+        store.emit(ROUTES[view].up, this.payload(view, e));
     }
 }
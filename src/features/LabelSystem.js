@@ -1,5 +1,6 @@
 // src/features/LabelSystem.js
 import { store } from '../core/Store.js';
+import { OverlayLayer } from '../systems/OverlayLayer.js';
 
 export class LabelSystem {
     constructor(sceneManager) {
@@ -8,19 +9,22 @@ export class LabelSystem {
         this.dimContainer3D = document.getElementById('dim-container-3d'); // 3D View
         this.lastState = null;
 
+        // Pooled label nodes: reused across divider count changes instead of rebuilt
+        this.topLayer = new OverlayLayer(this.dimContainer, (record) => this.createEditableLabel(record));
+        this.layer3D = new OverlayLayer(this.dimContainer3D, (record) => this.createEditableLabel(record, true));
+
         this.bindEvents();
         this.updateVisibility();
     }
 
     bindEvents() {
-        store.on('dimensionsChanged', () => this.updateLabels());
-        store.on('dividersChanged', () => this.updateLabels());
+        store.onFrame(['dimensionsChanged', 'dividersChanged'], () => this.updateLabels());
 
         // Listen for frustum changes to update label positions (Auto-Zoom fix)
         store.on('frustumChanged', () => this.updateLabels());
 
         // Listen to frame update for positioning
-        // SceneManager emits this every frame
+        // SceneManager emits this whenever the 3D view is redrawn
         store.on('update3DOverlay', ({ camera, rect }) => {
             this.update3DPositions(camera, rect);
         });
@@ -29,6 +33,9 @@ export class LabelSystem {
             setTimeout(() => this.updateVisibility(), 0);
         });
 
+        // Tray dimensions mean nothing over the build plate
+        store.on('plateModeChanged', () => this.updateVisibility());
+
         window.addEventListener('resize', () => {
             setTimeout(() => this.updateVisibility(), 0);
         });
@@ -36,9 +43,12 @@ export class LabelSystem {
 
     updateVisibility() {
         const isMobile = window.innerWidth < 768;
-        const mobileView = store.getState().mobileView;
+        const { mobileView, plate } = store.getState();
 
-        if (!isMobile) {
+        if (plate.enabled) {
+            this.dimContainer.style.display = 'none';
+            this.dimContainer3D.style.display = 'none';
+        } else if (!isMobile) {
             this.dimContainer.style.display = 'block';
             this.dimContainer3D.style.display = 'block';
         } else {
@@ -54,28 +64,15 @@ export class LabelSystem {
         this.updateLabels();
     }
 
-    createEditableLabel(text, cb, worldPos3D = null) {
+    // Label node bound to a pooled record; the record carries the current value,
+    // edit callback and (for 3D labels) the cached world position.
+    createEditableLabel(record, is3D = false) {
         const el = document.createElement('div');
         el.className = 'dim-label';
-        el.innerText = text;
-
-        // Simple click handler - in a full refactor, this might dispatch an EDIT_START action
-        // For now, we reuse the prompt logic or simple input swap?
-        // The original code used a complex `startEditing` global function.
-        // We should probably replicate `startEditing` logic here or in a separate EditSystem.
-        // For simplicity, let's just make them display-only or use a simple prompt for now to restore VISUAL parity.
-        // To restore full functionality, we need the Edit logic.
-        // I'll assume we want at least visual parity first.
-
-        // Let's implement a basic click-to-edit if needed, but the main goal is rendering.
-        // To support editing, I'd need to bring back `startEditing` logic which was in `index.html`.
-        // Let's create a minimal handler that emits an event `REQUEST_EDIT`.
-        // But we don't have an EditSystem.
-        // Let's stick to visual rendering.
-
-        if (worldPos3D) {
-            el.dataset.worldPos = JSON.stringify(worldPos3D);
+
+        if (is3D) {
             el.classList.add('dim-label-3d');
+            record.worldPos = new THREE.Vector3();
         }
 
         // Edit Handler
@@ -87,9 +84,9 @@ export class LabelSystem {
             store.emit('REQUEST_EDIT', {
                 x: r.left + r.width/2,
                 y: r.top + r.height/2,
-                value: parseFloat(text),
-                callback: cb,
-                worldPos3D: worldPos3D
+                value: parseFloat(record.text),
+                callback: record.onEdit,
+                worldPos3D: record.worldPos
             });
         };
         el.addEventListener('mousedown', handler);
@@ -102,7 +99,7 @@ export class LabelSystem {
         const state = store.getState();
         const { l, w, h } = state.dimensions;
         const { x: dX, z: dZ } = state.dividers;
-        const rect = document.getElementById('view-top-placeholder').getBoundingClientRect();
+        const rect = this.sceneManager.getViewRect('viewTop');
 
         // Check if update is needed to avoid jitter from DOM recreation
         // Include frustumSize in check
@@ -136,18 +133,15 @@ export class LabelSystem {
             frustum
         };
 
-        this.dimContainer.innerHTML = '';
-        this.dimContainer3D.innerHTML = '';
-
         // --- Top View Labels ---
+        this.topLayer.begin();
 
         // Only generate Top View labels if visible
         if (rect.width > 0) {
-            const aspect = rect.width / rect.height;
-            const frustum = this.sceneManager.frustumSize;
-
-            const w2pX = (wx) => rect.left + rect.width/2 + (wx / (frustum * aspect / 2)) * (rect.width/2);
-            const w2pZ = (wz) => rect.top + rect.height/2 + (wz / (frustum / 2)) * (rect.height/2);
+            // Same world -> screen mapping as the top camera and pointer picking
+            const transform = this.sceneManager.topTransform;
+            const w2pX = (wx) => transform.toScreen(wx, 0, rect).x;
+            const w2pZ = (wz) => transform.toScreen(0, wz, rect).y;
 
             const sortedX = [-l/2, ...[...dX].sort((a,b) => a-b), l/2];
             for(let i=0; i < sortedX.length - 1; i++) {
@@ -157,24 +151,26 @@ export class LabelSystem {
                 const segmentStart = sortedX[i];
                 const segmentEnd = sortedX[i+1];
 
-                const cb = (nd) => {
+                const record = this.topLayer.next();
+                record.onEdit = (nd) => {
                     const diff = nd - dist;
-                    store.setDimensions({ l: l + diff });
-
                     const newX = dX.map(d => {
                         if (d <= segmentStart + 0.001) return d - diff/2;
                         if (d >= segmentEnd - 0.001) return d + diff/2;
                         return d;
                     });
-                    store.updateDividers('x', newX);
+
+                    store.batch(() => {
+                        store.setDimensions({ l: l + diff });
+                        store.updateDividers('x', newX);
+                    });
                     store.emit('dimensionsCommitted');
                 };
 
-                const el = this.createEditableLabel(Math.round(dist), cb);
-                el.style.left = `${w2pX((sortedX[i] + sortedX[i+1]) / 2)}px`;
-                el.style.top = `${w2pZ(-w/2) - 25}px`;
-                el.style.transform = 'translateX(-50%)';
-                this.dimContainer.appendChild(el);
+                record.setText(String(Math.round(dist)));
+                record.setPosition(w2pX((sortedX[i] + sortedX[i+1]) / 2), w2pZ(-w/2) - 25);
+                record.setTransform('translateX(-50%)');
+                record.setVisible(true);
             }
 
             const sortedZ = [-w/2, ...[...dZ].sort((a,b) => a-b), w/2];
@@ -185,75 +181,62 @@ export class LabelSystem {
                 const segmentStart = sortedZ[i];
                 const segmentEnd = sortedZ[i+1];
 
-                const cb = (nd) => {
+                const record = this.topLayer.next();
+                record.onEdit = (nd) => {
                     const diff = nd - dist;
-                    store.setDimensions({ w: w + diff });
-
                     const newZ = dZ.map(d => {
                         if (d <= segmentStart + 0.001) return d - diff/2;
                         if (d >= segmentEnd - 0.001) return d + diff/2;
                         return d;
                     });
-                    store.updateDividers('z', newZ);
+
+                    store.batch(() => {
+                        store.setDimensions({ w: w + diff });
+                        store.updateDividers('z', newZ);
+                    });
                     store.emit('dimensionsCommitted');
                 };
 
-                const el = this.createEditableLabel(Math.round(dist), cb);
-                el.style.left = `${w2pX(-l/2) - 35}px`;
-                el.style.top = `${w2pZ((sortedZ[i] + sortedZ[i+1]) / 2)}px`;
-                el.style.transform = 'translateY(-50%)';
-                this.dimContainer.appendChild(el);
+                record.setText(String(Math.round(dist)));
+                record.setPosition(w2pX(-l/2) - 35, w2pZ((sortedZ[i] + sortedZ[i+1]) / 2));
+                record.setTransform('translateY(-50%)');
+                record.setVisible(true);
             }
         }
 
+        this.topLayer.end();
+
         // --- 3D View Labels ---
         // Labels for L, W, H
         const labels3D = [
-            { text: Math.round(l), pos: new THREE.Vector3(0, -h/2 - 10, w/2 + 10), axis: 'l' },
-            { text: Math.round(w), pos: new THREE.Vector3(l/2 + 15, -h/2 - 10, 0), axis: 'w' },
-            { text: Math.round(h), pos: new THREE.Vector3(-l/2 - 15, 0, w/2 + 15), axis: 'h' }
+            { text: Math.round(l), x: 0, y: -h/2 - 10, z: w/2 + 10, axis: 'l' },
+            { text: Math.round(w), x: l/2 + 15, y: -h/2 - 10, z: 0, axis: 'w' },
+            { text: Math.round(h), x: -l/2 - 15, y: 0, z: w/2 + 15, axis: 'h' }
         ];
 
+        this.layer3D.begin();
         labels3D.forEach((info) => {
-            const cb = (nv) => {
+            const record = this.layer3D.next();
+            record.el.id = `label-3d-${info.axis}`;
+            record.onEdit = (nv) => {
                 store.setDimensions({ [info.axis]: nv });
                 store.emit('dimensionsCommitted');
             };
-            const el = this.createEditableLabel(info.text, cb, info.pos);
-            el.id = `label-3d-${info.axis}`;
-            this.dimContainer3D.appendChild(el);
+            record.setText(String(info.text));
+            record.setTransform('translate(-50%, -50%)');
+            record.worldPos.set(info.x, info.y, info.z);
         });
+        this.layer3D.end();
+
+        // New 3D label positions are applied by the next 3D render pass
+        this.sceneManager.invalidate('view3D');
     }
 
     update3DPositions(camera, rect3D) {
         if (rect3D.width === 0 || rect3D.height === 0) return;
 
-        const labels = this.dimContainer3D.querySelectorAll('.dim-label-3d');
+        // Apply box rotation
         const boxGroup = this.sceneManager.boxGroup;
-
-        labels.forEach(el => {
-            // If editing, logic might pause, but we check Store.isEditing in SceneManager loop usually?
-            // Original code: update3DLabels executed every frame WITHOUT isEditing guard.
-
-            const worldPos = JSON.parse(el.dataset.worldPos);
-            const vector = new THREE.Vector3(worldPos.x, worldPos.y, worldPos.z);
-
-            // Apply box rotation
-            if (boxGroup) vector.applyQuaternion(boxGroup.quaternion);
-
-            vector.project(camera);
-
-            const x = rect3D.left + (vector.x * 0.5 + 0.5) * rect3D.width;
-            const y = rect3D.top + (-(vector.y) * 0.5 + 0.5) * rect3D.height;
-
-            if (vector.z < 1) {
-                el.style.display = 'block';
-                el.style.left = `${x}px`;
-                el.style.top = `${y}px`;
-                el.style.transform = 'translate(-50%, -50%)';
-            } else {
-                el.style.display = 'none';
-            }
-        });
+        this.layer3D.projectAll(camera, rect3D, boxGroup ? boxGroup.quaternion : null);
     }
 }
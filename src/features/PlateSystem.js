@@ -0,0 +1,160 @@
+// src/features/PlateSystem.js
+import { store } from '../core/Store.js';
+import { designFromState, hashDesign } from '../core/Design.js';
+import { BED_PRESETS } from '../core/Plate.js';
+import { PlateView } from '../systems/PlateView.js';
+import { capitalize } from '../core/OrderNaming.js';
+
+// Plate mode: the sidebar panel that collects trays onto a build plate, and the
+// switch between editing one tray and viewing the packed plate. The editor keeps
+// working on its single tray; "Add Tray to Plate" snapshots it (design and color).
+// Layout changes re-pack and rewrite instances once per frame (see PlateView).
+
+// Height the cameras frame above the bed
+const PLATE_VIEW_HEIGHT = 60;
+const MAX_ADD = 24;
+
+export class PlateSystem {
+    constructor(sceneManager) {
+        this.sceneManager = sceneManager;
+        this.view = new PlateView(sceneManager);
+        sceneManager.plateView = this.view;
+
+        this.modeBtn = document.getElementById('plate-mode-btn');
+        this.addBtn = document.getElementById('plate-add-btn');
+        this.addCount = document.getElementById('plate-add-count');
+        this.bedSelect = document.getElementById('plate-bed');
+        this.customBed = document.getElementById('plate-custom-bed');
+        this.bedWidth = document.getElementById('plate-bed-width');
+        this.bedDepth = document.getElementById('plate-bed-depth');
+        this.spacingInput = document.getElementById('plate-spacing');
+        this.list = document.getElementById('plate-items');
+        this.status = document.getElementById('plate-status');
+        this.exportBtn = document.getElementById('plate-export-btn');
+
+        this.bindEvents();
+        this.update();
+    }
+
+    bindEvents() {
+        store.onFrame('plateChanged', () => this.update());
+        store.on('plateModeChanged', (enabled) => this.applyMode(enabled));
+
+        this.modeBtn?.addEventListener('click', () => this.toggle());
+        this.addBtn?.addEventListener('click', () => this.addCurrentTray());
+
+        this.bedSelect?.addEventListener('change', () => {
+            const key = this.bedSelect.value;
+            const preset = BED_PRESETS[key];
+            this.customBed?.classList.toggle('hidden', Boolean(preset));
+            if (preset) {
+                store.setPlateLayout({ bed: { preset: key, width: preset.width, depth: preset.depth } });
+            } else {
+                this.applyCustomBed();
+            }
+        });
+        [this.bedWidth, this.bedDepth].forEach(input => input?.addEventListener('change', () => this.applyCustomBed()));
+        this.spacingInput?.addEventListener('change', () => {
+            const spacing = parseFloat(this.spacingInput.value);
+            if (!isNaN(spacing)) store.setPlateLayout({ spacing });
+        });
+    }
+
+    toggle() {
+        store.setPlateMode(!store.getState().plate.enabled);
+    }
+
+    // Snapshot of the tray being edited, added `count` times
+    addCurrentTray() {
+        const state = store.getState();
+        const count = Math.max(1, Math.min(MAX_ADD, parseInt(this.addCount ? this.addCount.value : 1) || 1));
+        store.addPlateItems(designFromState(state, 'full'), state.colorTheme, count);
+    }
+
+    applyCustomBed() {
+        const width = parseFloat(this.bedWidth ? this.bedWidth.value : NaN);
+        const depth = parseFloat(this.bedDepth ? this.bedDepth.value : NaN);
+        if (isNaN(width) || isNaN(depth)) return;
+        store.setPlateLayout({ bed: { preset: 'custom', width, depth } });
+    }
+
+    applyMode(enabled) {
+        const { bed } = store.getState().plate;
+        this.sceneManager.setPlateMode(enabled, { l: bed.width, w: bed.depth, h: PLATE_VIEW_HEIGHT });
+        if (this.modeBtn) {
+            this.modeBtn.textContent = enabled ? 'Edit Tray' : 'Show Plate';
+            this.modeBtn.setAttribute('aria-pressed', String(enabled));
+        }
+    }
+
+    update() {
+        const plate = store.getState().plate;
+        const layout = this.view.update(plate);
+        if (plate.enabled) {
+            // The bed may have changed size
+            this.sceneManager.setFitBounds({ l: plate.bed.width, w: plate.bed.depth, h: PLATE_VIEW_HEIGHT });
+        }
+
+        if (this.bedSelect) this.bedSelect.value = plate.bed.preset in BED_PRESETS ? plate.bed.preset : 'custom';
+        this.customBed?.classList.toggle('hidden', plate.bed.preset in BED_PRESETS);
+        if (this.bedWidth && document.activeElement !== this.bedWidth) this.bedWidth.value = plate.bed.width;
+        if (this.bedDepth && document.activeElement !== this.bedDepth) this.bedDepth.value = plate.bed.depth;
+        if (this.spacingInput && document.activeElement !== this.spacingInput) this.spacingInput.value = plate.spacing;
+
+        this.renderItems(plate);
+
+        const trays = plate.items.length;
+        if (this.status) {
+            if (!trays) {
+                this.status.textContent = 'Plate is empty';
+            } else {
+                const parts = [`${trays} tray${trays === 1 ? '' : 's'}`, `${layout.groups.size} design${layout.groups.size === 1 ? '' : 's'}`];
+                if (layout.unplaced.length) parts.push(`${layout.unplaced.length} do not fit`);
+                this.status.textContent = parts.join(' - ');
+            }
+            this.status.classList.toggle('text-red-400', layout.unplaced.length > 0);
+        }
+        if (this.exportBtn) this.exportBtn.disabled = layout.placements.length === 0;
+    }
+
+    // One row per design and color, with its count and +/- buttons
+    renderItems(plate) {
+        if (!this.list) return;
+        const rows = new Map();
+        plate.items.forEach(item => {
+            const key = `${hashDesign(item.design)}:${item.theme}`;
+            if (!rows.has(key)) rows.set(key, { design: item.design, theme: item.theme, ids: [] });
+            rows.get(key).ids.push(item.id);
+        });
+
+        const nodes = [];
+        rows.forEach(({ design, theme, ids }) => {
+            const row = document.createElement('div');
+            row.className = 'flex items-center gap-2 text-[10px] text-zinc-400';
+
+            const label = document.createElement('span');
+            label.className = 'flex-1 truncate';
+            const rooms = (design.dividers.x.length + 1) * (design.dividers.z.length + 1);
+            label.textContent = `${design.l} x ${design.w} x ${design.h} mm, ${rooms} rooms, ${capitalize(theme)}`;
+
+            const count = document.createElement('span');
+            count.className = 'font-bold text-white w-6 text-center';
+            count.textContent = `x${ids.length}`;
+
+            const button = (text, ariaLabel, onClick) => {
+                const el = document.createElement('button');
+                el.className = 'w-5 h-5 shrink-0 rounded-full text-zinc-500 hover:text-white hover:bg-zinc-700 transition-colors';
+                el.textContent = text;
+                el.setAttribute('aria-label', ariaLabel);
+                el.addEventListener('click', onClick);
+                return el;
+            };
+            const remove = button('-', 'Remove one', () => store.removePlateItem(ids[ids.length - 1]));
+            const add = button('+', 'Add one more', () => store.addPlateItems(design, theme, 1));
+
+            row.append(label, remove, count, add);
+            nodes.push(row);
+        });
+        this.list.replaceChildren(...nodes);
+    }
+}
@@ -8,8 +8,9 @@ export class TutorialSystem {
         this.isActive = false;
         this.lastAddedDividerX = null;
         this.lastAddedDividerZ = null;
-        this.previousDividersX = [];
-        this.previousDividersZ = [];
+        // May be constructed late (lazy loaded): start from the current layout
+        this.previousDividersX = [...store.getState().dividers.x];
+        this.previousDividersZ = [...store.getState().dividers.z];
 
         // DOM Elements
         this.overlay = document.getElementById('tutorial-overlay');
@@ -70,8 +71,10 @@ export class TutorialSystem {
                  }
              }
 
-             const xMoved = JSON.stringify(newX.sort()) !== JSON.stringify(this.previousDividersX.sort());
-             const zMoved = JSON.stringify(newZ.sort()) !== JSON.stringify(this.previousDividersZ.sort());
+             // Compare sorted copies: the store's arrays are live and kept in numeric order
+             const sorted = (list) => JSON.stringify([...list].sort((a, b) => a - b));
+             const xMoved = sorted(newX) !== sorted(this.previousDividersX);
+             const zMoved = sorted(newZ) !== sorted(this.previousDividersZ);
 
              this.previousDividersX = [...newX];
              this.previousDividersZ = [...newZ];
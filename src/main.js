@@ -1,22 +1,40 @@
 import { store } from './core/Store.js';
 import { SceneManager } from './systems/SceneManager.js';
-import { createModel } from './utils/GeometryFactory.js';
+import { GeometryEngine } from './systems/GeometryEngine.js';
+import { designFromState } from './core/Design.js';
+import { estimateMaterial, measureMaterial } from './utils/MaterialEstimator.js';
+import { perf } from './core/Perf.js';
 import { DimensionControl } from './features/DimensionControl.js';
-import { ExportSystem } from './features/ExportSystem.js';
 import { InputSystem } from './features/InputSystem.js';
 import { DividerSystem } from './features/DividerSystem.js';
-import { TutorialSystem } from './features/TutorialSystem.js';
 import { LabelSystem } from './features/LabelSystem.js';
 import { EditSystem } from './features/EditSystem.js';
-import { LogoSystem } from './features/LogoSystem.js';
+
+// Not needed for the first frame: fetched when the browser is idle after it,
+// constructed on first use (see bindLazyFeatures)
+const LAZY_FEATURES = {
+    tutorial: () => import('./features/TutorialSystem.js').then(m => m.TutorialSystem),
+    logo: () => import('./features/LogoSystem.js').then(m => m.LogoSystem),
+    export: () => import('./features/ExportSystem.js').then(m => m.ExportSystem),
+    plate: () => import('./features/PlateSystem.js').then(m => m.PlateSystem)
+};
+
+// Time from navigation start to the first frame with the tray in it
+const FIRST_RENDER_BUDGET_MS = 1500;
 
 class App {
     constructor() {
+        // window.__trayPerf; instruments from the first event when ?perf is set
+        perf.exposeGlobal();
+
         const canvas = document.getElementById('main-canvas');
         const view3D = document.getElementById('view-3d-placeholder');
         const viewTop = document.getElementById('view-top-placeholder');
 
-        this.sceneManager = new SceneManager(canvas, view3D, viewTop);
+        // ?topView=2d draws the top view on a 2D canvas instead of a second WebGL pass
+        const topView = new URLSearchParams(window.location.search).get('topView') === '2d' ? '2d' : 'webgl';
+        this.sceneManager = new SceneManager(canvas, view3D, viewTop, { topView });
+        this.geometryEngine = new GeometryEngine();
 
         // Initialize Features
         this.features = [
@@ -24,16 +42,15 @@ class App {
             // Actually, we moved inputs to sidebar. DimensionControl.js likely binds to old IDs.
             // We should check DimensionControl.js later or just bind events here.
             new DimensionControl(),
-            new ExportSystem(this.sceneManager),
-            new InputSystem(this.sceneManager, viewTop),
-            new DividerSystem(),
-            new TutorialSystem(this.sceneManager),
+            new InputSystem(this.sceneManager),
+            new DividerSystem(this.sceneManager),
             new LabelSystem(this.sceneManager),
-            new EditSystem(this.sceneManager),
-            new LogoSystem(this.sceneManager)
+            new EditSystem(this.sceneManager)
         ];
+        this.lazyFeatures = new Map(); // name -> Promise<feature>
 
         this.bindEvents();
+        this.bindLazyFeatures();
         this.setupSidebarControls();
 
         if (window.innerWidth < 768) {
@@ -47,21 +64,21 @@ class App {
         if (tab3d) tab3d.onclick = () => store.setMobileView('3d');
         if (tabTop) tabTop.onclick = () => store.setMobileView('top');
 
+        this.trackFirstRender();
         this.updateModel();
         this.sceneManager.autoFitCamera();
     }
 
     bindEvents() {
-        store.on('dimensionsChanged', () => {
-            this.updateModel();
-            this.updatePrice();
-            this.sceneManager.checkAutoZoom();
-        });
-        store.on('dividersChanged', () => this.updateModel());
-        store.on('hiddenSegmentsChanged', () => this.updateModel());
-        store.on('colorThemeChanged', () => this.updateModel());
+        // Geometry rebuilds are coalesced to at most one per animation frame,
+        // no matter how many mutations a drag or slider produces in between.
+        // Ending an interaction swaps the preview tessellation for full quality.
+        // Color themes are applied by SceneManager without a rebuild.
+        store.onFrame(['dimensionsChanged', 'dividersChanged', 'hiddenSegmentsChanged', 'interactionChanged'], () => this.updateModel());
+        store.onFrame('dimensionsChanged', () => this.sceneManager.checkAutoZoom());
 
         store.on('dimensionsCommitted', () => {
+             store.setInteracting(false);
              this.sceneManager.checkAutoZoom();
         });
 
@@ -79,6 +96,90 @@ class App {
         });
     }
 
+    // Feature instance by LAZY_FEATURES name, imported and constructed on the first call
+    loadFeature(name) {
+        let feature = this.lazyFeatures.get(name);
+        if (!feature) {
+            feature = LAZY_FEATURES[name]().then(Feature => {
+                const instance = new Feature(this.sceneManager);
+                this.features.push(instance);
+                return instance;
+            });
+            this.lazyFeatures.set(name, feature);
+        }
+        return feature;
+    }
+
+    // First-use triggers for the lazy features. Once constructed, each feature
+    // binds its own listeners, so these only have to cover the first use.
+    bindLazyFeatures() {
+        const exportBtn = document.getElementById('export-btn');
+        const formatSelect = document.getElementById('export-format');
+        exportBtn?.addEventListener('click', () => {
+            this.loadFeature('export').then(exporter => exporter.exportModel(formatSelect ? formatSelect.value : 'stl'));
+        }, { once: true });
+        document.getElementById('plate-export-btn')?.addEventListener('click', () => {
+            if (this.lazyFeatures.has('export')) return;
+            this.loadFeature('export').then(exporter => exporter.exportPlate(formatSelect ? formatSelect.value : 'stl'));
+        }, { once: true });
+
+        // The plate panel binds its own listeners once loaded; a click that
+        // loads it must not also reach those (adding or toggling twice)
+        document.getElementById('plate-add-btn')?.addEventListener('click', () => {
+            if (this.lazyFeatures.has('plate')) return;
+            this.loadFeature('plate').then(plate => plate.addCurrentTray());
+        }, { once: true });
+        document.getElementById('plate-mode-btn')?.addEventListener('click', () => {
+            if (this.lazyFeatures.has('plate')) return;
+            this.loadFeature('plate').then(plate => plate.toggle());
+        }, { once: true });
+        ['plate-bed', 'plate-spacing'].forEach(id => {
+            document.getElementById(id)?.addEventListener('focus', () => this.loadFeature('plate'), { once: true });
+        });
+
+        store.on('logoChanged', (logo) => {
+            if (!logo || this.lazyFeatures.has('logo')) return;
+            this.loadFeature('logo').then(logoSystem => logoSystem.updateLogo(store.getState().logo));
+        });
+
+        const skipBtn = document.getElementById('tut-skip');
+        if (!sessionStorage.getItem('tutorial_seen')) {
+            // First visit: the tutorial starts right after the first frame
+            requestAnimationFrame(() => this.loadFeature('tutorial'));
+        } else if (skipBtn) {
+            skipBtn.innerText = "Tutorial";
+            skipBtn.addEventListener('click', () => {
+                this.loadFeature('tutorial').then(tutorial => tutorial.toggle());
+            }, { once: true });
+        }
+
+        // Warm the module cache once the first frame is out of the way
+        const prefetch = () => Object.values(LAZY_FEATURES).forEach(load => load().catch(() => {}));
+        store.once('firstRender', () => {
+            if (typeof requestIdleCallback !== 'undefined') requestIdleCallback(prefetch, { timeout: 3000 });
+            else setTimeout(prefetch, 500);
+        });
+    }
+
+    // Record (and check against the budget) the first presented frame with the tray
+    trackFirstRender() {
+        store.once('modelRegenerated', () => requestAnimationFrame(() => {
+            const ms = performance.now();
+            if (typeof performance.measure === 'function') {
+                try {
+                    performance.measure('startup:first-render', { start: 0, end: ms });
+                } catch (e) {
+                    // User Timing L2 only
+                }
+            }
+            if (perf.enabled) perf.record('startup:first-render', ms);
+            if (ms > FIRST_RENDER_BUDGET_MS) {
+                console.warn(`First render after ${Math.round(ms)} ms (budget ${FIRST_RENDER_BUDGET_MS} ms)`);
+            }
+            store.emit('firstRender', ms);
+        }));
+    }
+
     setupSidebarControls() {
         // Colors
         document.getElementById('color-brown')?.addEventListener('click', () => {
@@ -103,8 +204,10 @@ class App {
         if (radInput) {
             radInput.addEventListener('input', (e) => {
                 const r = parseInt(e.target.value);
+                store.setInteracting(true);
                 store.setDimensions({ radius: r });
             });
+            radInput.addEventListener('change', () => store.emit('dimensionsCommitted'));
         }
 
         // Wall Thickness
@@ -114,17 +217,21 @@ class App {
                 let t = parseFloat(e.target.value);
                 if (isNaN(t)) t = 2;
                 t = Math.max(2, Math.min(10, t));
+                store.setInteracting(true);
                 store.setDimensions({ wallThickness: t });
             });
+            wallInput.addEventListener('change', () => store.emit('dimensionsCommitted'));
         }
 
         // Reset
         document.getElementById('reset-btn')?.addEventListener('click', () => {
-            store.setDimensions({ l: 120, w: 120, h: 40, radius: 8, wallThickness: 2 });
-            store.updateDividers('x', []);
-            store.updateDividers('z', []);
-            store.setLogo(null);
-            store.setColorTheme('brown');
+            store.batch(() => {
+                store.setDimensions({ l: 120, w: 120, h: 40, radius: 8, wallThickness: 2 });
+                store.updateDividers('x', []);
+                store.updateDividers('z', []);
+                store.setLogo(null);
+                store.setColorTheme('brown');
+            });
             this.updateActiveColorButton('brown');
             if(radInput) radInput.value = 8;
             if(wallInput) wallInput.value = 2;
@@ -144,12 +251,9 @@ class App {
         document.getElementById('upload-logo-btn')?.addEventListener('click', () => fileInput.click());
         fileInput?.addEventListener('change', (e) => {
             if(e.target.files && e.target.files[0]) {
-                const reader = new FileReader();
-                reader.onload = (evt) => {
-                    store.setLogo({ type: 'image', data: evt.target.result, x: 0, z: 0 });
-                    document.getElementById('remove-logo-btn').classList.remove('hidden');
-                };
-                reader.readAsDataURL(e.target.files[0]);
+                // The File itself is the logo source; LogoEngine decodes it off the main thread
+                store.setLogo({ type: 'image', data: e.target.files[0], x: 0, z: 0 });
+                document.getElementById('remove-logo-btn').classList.remove('hidden');
             }
         });
 
@@ -159,8 +263,6 @@ class App {
              document.getElementById('logo-text-input').value = '';
              fileInput.value = '';
         });
-
-        this.updatePrice();
     }
 
     updateActiveColorButton(theme) {
@@ -173,32 +275,21 @@ class App {
         if(btn) btn.classList.add('border-white');
     }
 
-    updatePrice() {
-        const { l, w, h, wallThickness } = store.getState().dimensions;
-        // Volume Calculation
-        // Approx: Base + Walls
-        // Base: l * w * 2mm (Base thickness fixed at 2mm)
-        // Walls: (2*l + 2*w) * h * wallThickness
-        // Volume in cm3 = (mm3) / 1000
-
-        const baseThick = 2;
-        const volBase = l * w * baseThick;
-        const volWalls = (2 * l + 2 * w) * h * wallThickness;
-        const totalVolMm3 = volBase + volWalls;
-        const totalVolCm3 = totalVolMm3 / 1000;
-
-        // PLA Density ~ 1.25 g/cm3. 10% infill -> ~0.2 effective?
-        // Walls are usually solid in 3D printing if thin (2mm is 4 perimeters).
-        // Let's assume solid for 2mm walls.
-        // Density = 1.25 g/cm3
-
-        const massGrams = totalVolCm3 * 1.25;
+    // Price of a built design. The geometry worker measures the material volume of
+    // every build (walls, dividers, rounded corners, merged rooms), so the price
+    // follows drags frame by frame at no main-thread cost.
+    updatePrice(design, buffers) {
+        const t0 = perf.enabled ? perf.now() : 0;
+        // Buffers cached before the worker measured them
+        const measured = buffers.material || measureMaterial(buffers, design);
+        this.material = estimateMaterial(measured, design);
+        if (perf.enabled) perf.measure('estimate', t0);
 
         // Price per gram? Let's say 500 VND/g + base fee
         const pricePerGram = 500;
         const baseFee = 50000;
 
-        const price = Math.round((massGrams * pricePerGram + baseFee) / 1000) * 1000; // Round to nearest 1000
+        const price = Math.round((this.material.grams * pricePerGram + baseFee) / 1000) * 1000; // Round to nearest 1000
 
         const el = document.getElementById('total-price');
         if(el) el.innerText = price.toLocaleString('vi-VN') + ' VND';
@@ -232,34 +323,25 @@ class App {
 
     updateModel() {
         const state = store.getState();
-        const { l, w, h, radius, wallThickness } = state.dimensions;
-        const { x: dX, z: dZ } = state.dividers;
+        const { wallThickness } = state.dimensions;
 
-        const minSegX = this.getMinSegmentSize(l, dX);
-        const minSegZ = this.getMinSegmentSize(w, dZ);
-        const minSegment = Math.min(minSegX, minSegZ);
-        const maxSafeRadius = (minSegment / 2) - 0.5;
-        const effectiveR = Math.max(1, Math.min(radius, maxSafeRadius));
+        // Coarse tessellation while dragging/sliding ('draft' when the governor has
+        // degraded interactive quality), full quality once committed
+        const design = designFromState(state, state.isInteracting ? this.sceneManager.governor.tessellation : 'full');
 
         const radDisplay = document.getElementById('radius-val');
-        if(radDisplay) radDisplay.innerText = `${Math.round(effectiveR * 10) / 10}mm`;
+        if(radDisplay) radDisplay.innerText = `${Math.round(design.r * 10) / 10}mm`;
 
         const wallDisplay = document.getElementById('wall-thickness-val');
         if(wallDisplay) wallDisplay.innerText = `${Math.round(wallThickness * 10) / 10}mm`;
 
-        const model = createModel(l, h, w, effectiveR, wallThickness, dX, dZ, state.hiddenSegments, state.colorTheme);
-        this.sceneManager.updateMesh(model);
-        store.emit('modelRegenerated');
-    }
-
-    getMinSegmentSize(totalSize, dividers) {
-        const points = [-totalSize/2, ...[...dividers].sort((a,b)=>a-b), totalSize/2];
-        let minSize = totalSize;
-        for(let i = 0; i < points.length - 1; i++) {
-            const dist = points[i+1] - points[i];
-            if (dist < minSize) minSize = dist;
-        }
-        return minSize;
+        // Geometry is built in a worker and comes back as buffers
+        this.geometryEngine.build(design).then(buffers => {
+            if (!buffers) return; // Superseded by a newer design
+            this.sceneManager.updateMesh(buffers);
+            store.emit('modelRegenerated');
+            this.updatePrice(design, buffers);
+        });
     }
 }
 
@@ -301,4 +383,9 @@ window.addEventListener('load', () => {
     if (typeof lucide !== 'undefined') {
         lucide.createIcons();
     }
+
+    // Offline app shell (sw.js); ?sw=0 skips registration while developing
+    if ('serviceWorker' in navigator && new URLSearchParams(window.location.search).get('sw') !== '0') {
+        navigator.serviceWorker.register('./sw.js').catch(e => console.warn('Service worker registration failed', e));
+    }
 });
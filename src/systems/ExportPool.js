@@ -0,0 +1,186 @@
+// src/systems/ExportPool.js
+import { hashDesign } from '../core/Design.js';
+import { hashPlateExport } from '../core/Plate.js';
+
+// Builds export files on a pool of module workers, one job per worker at a time,
+// in FIFO order. Identical requests (same design or plate hash and format)
+// that are queued or in flight share one build.
+//
+//   pool.run(design, format, { signal, onProgress })
+//
+// resolves with { data, triangles, report, ms } and rejects when the build fails
+// or the signal aborts (with an AbortError). onProgress(stage) reports 'queued',
+// then the builder's stages ('mesh', 'write'). A job is only cancelled once every
+// request sharing it has aborted: queued jobs are dropped, and a worker that is
+// already building is terminated and replaced (the build is one synchronous call).
+
+// Workers that die before their first message count as failing to load; after
+// this many in a row, dead workers are no longer replaced
+const MAX_SPAWN_FAILURES = 3;
+
+export class ExportPool {
+    constructor(size = defaultPoolSize()) {
+        this.size = Math.max(1, size);
+        this.workers = []; // { worker, job, ready }
+        this.queue = [];
+        this.jobs = new Map(); // key -> job, while queued or building
+        this.nextId = 1;
+        this.completed = 0;
+        this.failed = 0;
+        this.cancelled = 0;
+        this.spawnFailures = 0; // consecutive, reset by any worker message
+
+        for (let i = 0; i < this.size; i++) this.spawn();
+    }
+
+    spawn() {
+        const slot = { worker: null, job: null, ready: false };
+        slot.worker = new Worker(new URL('../workers/ExportWorker.js', import.meta.url), { type: 'module' });
+        slot.worker.onmessage = (e) => this.onMessage(slot, e.data);
+        slot.worker.onerror = (e) => this.onError(slot, e);
+        this.workers.push(slot);
+        return slot;
+    }
+
+    run(design, format = 'stl', { signal = null, onProgress = null } = {}) {
+        if (signal && signal.aborted) return Promise.reject(abortError());
+
+        const key = `${format}:${design.plate ? hashPlateExport(design) : hashDesign(design)}`;
+        let job = this.jobs.get(key);
+        if (!job) {
+            job = { id: this.nextId++, key, design, format, stage: 'queued', waiters: [] };
+            this.jobs.set(key, job);
+            this.queue.push(job);
+        }
+
+        return new Promise((resolve, reject) => {
+            const waiter = { resolve, reject, onProgress, signal, onAbort: null };
+            job.waiters.push(waiter);
+            if (onProgress) onProgress(job.stage);
+
+            if (signal) {
+                waiter.onAbort = () => this.detach(job, waiter);
+                signal.addEventListener('abort', waiter.onAbort, { once: true });
+            }
+            this.dispatch();
+        });
+    }
+
+    dispatch() {
+        for (const slot of this.workers) {
+            if (!this.queue.length) return;
+            if (slot.job) continue;
+            slot.job = this.queue.shift();
+            slot.worker.postMessage({ id: slot.job.id, design: slot.job.design, format: slot.job.format });
+        }
+    }
+
+    // One request gave up on a job; cancel the job when nobody else waits for it
+    detach(job, waiter) {
+        job.waiters = job.waiters.filter(w => w !== waiter);
+        waiter.reject(abortError());
+        if (job.waiters.length) return;
+
+        this.jobs.delete(job.key);
+        this.cancelled++;
+        const queued = this.queue.indexOf(job);
+        if (queued !== -1) {
+            this.queue.splice(queued, 1);
+            return;
+        }
+
+        const slot = this.workers.find(s => s.job === job);
+        if (slot) {
+            slot.worker.terminate();
+            this.workers = this.workers.filter(s => s !== slot);
+            this.spawn();
+            this.dispatch();
+        }
+    }
+
+    settle(job, settleWaiter) {
+        this.jobs.delete(job.key);
+        job.waiters.forEach(waiter => {
+            if (waiter.signal) waiter.signal.removeEventListener('abort', waiter.onAbort);
+            settleWaiter(waiter);
+        });
+        job.waiters = [];
+    }
+
+    onMessage(slot, { id, stage, error, ...result }) {
+        // The worker module loaded
+        slot.ready = true;
+        this.spawnFailures = 0;
+
+        const job = slot.job;
+        if (!job || job.id !== id) return;
+
+        if (stage) {
+            job.stage = stage;
+            job.waiters.forEach(waiter => waiter.onProgress && waiter.onProgress(stage));
+            return;
+        }
+
+        slot.job = null;
+        if (error) {
+            this.failed++;
+            this.settle(job, waiter => waiter.reject(new Error(error)));
+        } else {
+            this.completed++;
+            this.settle(job, waiter => waiter.resolve(result));
+        }
+        this.dispatch();
+    }
+
+    // A worker that dies mid-job is replaced, and so is one that died on its first
+    // job before reporting anything, unless workers keep failing to load. An idle
+    // worker that never loaded is dropped; with no workers left the queue fails.
+    onError(slot, e) {
+        console.warn('Export worker failed', e.message);
+        slot.worker.terminate();
+        this.workers = this.workers.filter(s => s !== slot);
+
+        const message = e.message || 'Export worker failed';
+        if (slot.job) {
+            this.failed++;
+            this.settle(slot.job, waiter => waiter.reject(new Error(message)));
+        }
+
+        if (!slot.ready) this.spawnFailures++;
+        if (slot.ready || (slot.job && this.spawnFailures < MAX_SPAWN_FAILURES)) this.spawn();
+        if (!this.workers.length) {
+            this.queue.splice(0).forEach(job => this.settle(job, waiter => waiter.reject(new Error('No export workers available'))));
+            return;
+        }
+        this.dispatch();
+    }
+
+    getStats() {
+        return {
+            workers: this.workers.length,
+            busy: this.workers.filter(slot => slot.job).length,
+            queued: this.queue.length,
+            completed: this.completed,
+            failed: this.failed,
+            cancelled: this.cancelled,
+            spawnFailures: this.spawnFailures
+        };
+    }
+
+    terminate() {
+        const jobs = [...this.workers.map(slot => slot.job).filter(Boolean), ...this.queue];
+        this.workers.forEach(slot => slot.worker.terminate());
+        this.workers = [];
+        this.queue = [];
+        jobs.forEach(job => this.settle(job, waiter => waiter.reject(new Error('Export pool terminated'))));
+    }
+}
+
+export function defaultPoolSize() {
+    const cores = typeof navigator !== 'undefined' && navigator.hardwareConcurrency ? navigator.hardwareConcurrency : 4;
+    return Math.max(1, cores - 1);
+}
+
+function abortError() {
+    return new DOMException('Export cancelled', 'AbortError');
+}
@@ -0,0 +1,167 @@
+// src/systems/GeometryCache.js
+
+// Persistent, size-bounded cache of generated data keyed by design hash.
+// Two object stores: 'entries' holds the payloads, 'meta' holds
+// { key, size, lastAccess } records so eviction never has to load payloads.
+// Least recently used entries are evicted once the total exceeds maxBytes.
+// Every method resolves (null / no-op) when IndexedDB is unavailable or fails.
+
+const DB_NAME = 'tray-geometry-cache';
+const DB_VERSION = 1;
+
+function promisify(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function transactionDone(tx) {
+    return new Promise((resolve, reject) => {
+        tx.oncomplete = () => resolve();
+        tx.onabort = tx.onerror = () => reject(tx.error);
+    });
+}
+
+// Approximate payload size in bytes (typed arrays, buffers, blobs, strings, nested objects)
+export function payloadSize(value) {
+    if (value == null) return 0;
+    if (ArrayBuffer.isView(value) || value instanceof ArrayBuffer) return value.byteLength;
+    if (typeof Blob !== 'undefined' && value instanceof Blob) return value.size;
+    if (typeof value === 'string') return value.length * 2;
+    if (typeof value === 'object') {
+        let size = 0;
+        Object.keys(value).forEach(k => { size += payloadSize(value[k]); });
+        return size;
+    }
+    return 8;
+}
+
+export class GeometryCache {
+    constructor(maxBytes = 64 * 1024 * 1024) {
+        this.maxBytes = maxBytes;
+        this.totalBytes = 0;
+        this.hits = 0;
+        this.misses = 0;
+        this.dbPromise = this.open();
+    }
+
+    open() {
+        if (typeof indexedDB === 'undefined') return Promise.resolve(null);
+
+        const request = indexedDB.open(DB_NAME, DB_VERSION);
+        request.onupgradeneeded = () => {
+            const db = request.result;
+            db.createObjectStore('entries', { keyPath: 'key' });
+            const meta = db.createObjectStore('meta', { keyPath: 'key' });
+            meta.createIndex('lastAccess', 'lastAccess');
+        };
+
+        return promisify(request)
+            .then(db => this.loadTotal(db).then(() => db))
+            .catch(e => {
+                console.warn('Geometry cache unavailable', e);
+                return null;
+            });
+    }
+
+    loadTotal(db) {
+        const tx = db.transaction('meta', 'readonly');
+        return promisify(tx.objectStore('meta').getAll()).then(records => {
+            this.totalBytes = records.reduce((sum, r) => sum + r.size, 0);
+        });
+    }
+
+    get(key) {
+        return this.dbPromise.then(db => {
+            if (!db) return null;
+
+            const tx = db.transaction(['entries', 'meta'], 'readwrite');
+            const entries = tx.objectStore('entries');
+            const meta = tx.objectStore('meta');
+
+            return promisify(entries.get(key)).then(entry => {
+                if (!entry) {
+                    this.misses++;
+                    return null;
+                }
+                this.hits++;
+                // Touch for LRU order; the read result does not wait for it
+                promisify(meta.get(key)).then(record => {
+                    if (record) meta.put({ ...record, lastAccess: Date.now() });
+                });
+                return entry.data;
+            });
+        }).catch(e => {
+            console.warn('Geometry cache read failed', e);
+            return null;
+        });
+    }
+
+    put(key, data) {
+        const size = payloadSize(data);
+        if (size > this.maxBytes) return Promise.resolve();
+
+        return this.dbPromise.then(db => {
+            if (!db) return;
+
+            const tx = db.transaction(['entries', 'meta'], 'readwrite');
+            const meta = tx.objectStore('meta');
+            promisify(meta.get(key)).then(previous => {
+                if (previous) this.totalBytes -= previous.size;
+                this.totalBytes += size;
+                tx.objectStore('entries').put({ key, data });
+                meta.put({ key, size, lastAccess: Date.now() });
+            });
+
+            return transactionDone(tx).then(() => this.evict(db));
+        }).catch(e => {
+            console.warn('Geometry cache write failed', e);
+        });
+    }
+
+    // Drop least recently used entries until the cache fits in maxBytes
+    evict(db) {
+        if (this.totalBytes <= this.maxBytes) return Promise.resolve();
+
+        const tx = db.transaction(['entries', 'meta'], 'readwrite');
+        const entries = tx.objectStore('entries');
+        const cursorRequest = tx.objectStore('meta').index('lastAccess').openCursor();
+
+        cursorRequest.onsuccess = () => {
+            const cursor = cursorRequest.result;
+            if (!cursor || this.totalBytes <= this.maxBytes) return;
+            this.totalBytes -= cursor.value.size;
+            entries.delete(cursor.value.key);
+            cursor.delete();
+            cursor.continue();
+        };
+
+        return transactionDone(tx);
+    }
+
+    clear() {
+        return this.dbPromise.then(db => {
+            if (!db) return;
+            const tx = db.transaction(['entries', 'meta'], 'readwrite');
+            tx.objectStore('entries').clear();
+            tx.objectStore('meta').clear();
+            this.totalBytes = 0;
+            return transactionDone(tx);
+        });
+    }
+
+    getStats() {
+        const lookups = this.hits + this.misses;
+        return {
+            bytes: this.totalBytes,
+            maxBytes: this.maxBytes,
+            hits: this.hits,
+            misses: this.misses,
+            hitRate: lookups ? this.hits / lookups : 0
+        };
+    }
+}
+
+// One cache per page, shared by geometry builds and exports
+export const geometryCache = new GeometryCache();
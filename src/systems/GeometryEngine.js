@@ -0,0 +1,181 @@
+// src/systems/GeometryEngine.js
+import { buildTrayGeometry, serializeGeometry, getShapeCacheStats } from '../utils/GeometryFactory.js';
+import { hashDesign } from '../core/Design.js';
+import { LRUCache } from '../utils/LRUCache.js';
+import { geometryCache } from './GeometryCache.js';
+import { perf } from '../core/Perf.js';
+
+// Runs tray geometry generation off the main thread.
+// At most one request is in flight and at most one is queued: a newer design
+// replaces the queued one, whose promise resolves with null (superseded).
+// Results are content-addressed by design hash: recent ones are kept in memory,
+// and full-quality ones are persisted in IndexedDB across page loads.
+// Preview builds (during drags) are never cached.
+export class GeometryEngine {
+    constructor(cache = geometryCache) {
+        this.worker = null;
+        this.nextId = 1;
+        this.inFlight = null; // { id, design, key, resolve }
+        this.queued = null;
+        this.lastDeliveredId = 0;
+        this.lastStats = null; // Profiling data from the most recent build
+
+        this.memory = new LRUCache(8);
+        this.cache = cache;
+
+        this.initWorker();
+    }
+
+    initWorker() {
+        if (typeof Worker === 'undefined') return;
+
+        try {
+            this.worker = new Worker(new URL('../workers/GeometryWorker.js', import.meta.url), { type: 'module' });
+        } catch (e) {
+            console.warn('Geometry worker unavailable, building on main thread', e);
+            this.worker = null;
+            return;
+        }
+
+        this.worker.onmessage = (e) => this.onMessage(e.data);
+        this.worker.onerror = (e) => {
+            console.warn('Geometry worker failed, building on main thread', e.message);
+            this.worker.terminate();
+            this.worker = null;
+
+            // Finish whatever was pending synchronously
+            const pending = this.inFlight;
+            this.inFlight = null;
+            if (pending) this.runOnMainThread(pending);
+            this.flushQueue();
+        };
+    }
+
+    build(design) {
+        return new Promise((resolve) => {
+            // Interactive tessellations are transient; only committed builds are worth storing
+            const cacheable = design.quality !== 'preview' && design.quality !== 'draft';
+            const request = { id: this.nextId++, design, key: cacheable ? `geometry:${hashDesign(design)}` : null, resolve };
+
+            if (!cacheable) {
+                this.schedule(request);
+                return;
+            }
+
+            const cached = this.memory.get(request.key);
+            if (cached) {
+                this.dropQueued();
+                this.deliver(request, cached);
+                return;
+            }
+
+            this.cache.get(request.key).then(buffers => {
+                if (request.id < this.lastDeliveredId) {
+                    resolve(null); // A newer design was shown while reading
+                } else if (buffers) {
+                    this.memory.set(request.key, buffers);
+                    this.dropQueued();
+                    this.deliver(request, buffers);
+                } else {
+                    this.schedule(request);
+                }
+            });
+        });
+    }
+
+    schedule(request) {
+        if (!this.worker) {
+            this.runOnMainThread(request);
+            return;
+        }
+
+        if (this.inFlight) {
+            this.dropQueued();
+            this.queued = request;
+            return;
+        }
+
+        this.post(request);
+    }
+
+    dropQueued() {
+        if (this.queued) this.queued.resolve(null);
+        this.queued = null;
+    }
+
+    // Results are delivered in request order; anything older than what is
+    // already on screen resolves with null
+    deliver(request, buffers) {
+        if (request.id < this.lastDeliveredId) {
+            request.resolve(null);
+            return;
+        }
+        this.lastDeliveredId = request.id;
+        request.resolve(buffers);
+    }
+
+    // Keep a freshly built result for later lookups
+    remember(request, buffers) {
+        if (!request.key) return;
+        this.memory.set(request.key, buffers);
+        this.cache.put(request.key, buffers);
+    }
+
+    post(request) {
+        this.inFlight = request;
+        if (perf.enabled) request.postedAt = perf.now();
+        this.worker.postMessage({ id: request.id, design: request.design, profile: perf.enabled });
+    }
+
+    runOnMainThread(request) {
+        const t0 = perf.enabled ? perf.now() : 0;
+        const { wall, base } = buildTrayGeometry(request.design);
+        if (perf.enabled) perf.measure('geometry:build', t0);
+        this.lastStats = { shapeCache: getShapeCacheStats() };
+        const buffers = { wall: serializeGeometry(wall), base: serializeGeometry(base) };
+        wall.dispose();
+        base.dispose();
+        this.remember(request, buffers);
+        this.deliver(request, buffers);
+    }
+
+    onMessage({ id, buffers, stats, error }) {
+        const request = this.inFlight;
+        if (!request || request.id !== id) return;
+        this.inFlight = null;
+        if (stats) this.lastStats = stats;
+        if (perf.enabled) {
+            // Worker spans, plus the round trip including queueing and transfer
+            if (stats && stats.spans) perf.merge(stats.spans, 'worker:');
+            if (request.postedAt) perf.measure('geometry:roundtrip', request.postedAt);
+        }
+
+        if (error) {
+            console.error('Geometry worker error', error);
+            request.resolve(null);
+        } else {
+            this.remember(request, buffers);
+            this.deliver(request, buffers);
+        }
+
+        this.flushQueue();
+    }
+
+    // Shape and geometry cache hit rates for profiling, e.g. app.geometryEngine.getStats()
+    getStats() {
+        return {
+            ...this.lastStats,
+            memoryCache: this.memory.getStats(),
+            persistentCache: this.cache.getStats()
+        };
+    }
+
+    flushQueue() {
+        const next = this.queued;
+        this.queued = null;
+        if (!next) return;
+
+        if (this.worker) this.post(next);
+        else this.runOnMainThread(next);
+    }
+}
@@ -0,0 +1,97 @@
+// src/systems/LogoEngine.js
+import { hashBlob, decodeLogoMask } from '../utils/ImageProcessor.js';
+import { LRUCache } from '../utils/LRUCache.js';
+
+// Decodes uploaded logos off the main thread. The worker hashes the file first
+// and only decodes it when the page has no mask for that hash yet, so a
+// re-upload of the same image costs one hash and no pixel work.
+// Masks are 1-bit and theme independent (32 KB at 512²).
+export class LogoEngine {
+    constructor() {
+        this.worker = null;
+        this.nextId = 1;
+        this.pending = new Map(); // id -> { source, resolve, reject }
+        this.masks = new LRUCache(8); // content hash -> packed mask
+
+        this.initWorker();
+    }
+
+    initWorker() {
+        if (typeof Worker === 'undefined' || typeof OffscreenCanvas === 'undefined') return;
+
+        try {
+            this.worker = new Worker(new URL('../workers/LogoWorker.js', import.meta.url), { type: 'module' });
+        } catch (e) {
+            console.warn('Logo worker unavailable, decoding on main thread', e);
+            this.worker = null;
+            return;
+        }
+
+        this.worker.onmessage = (e) => this.onMessage(e.data);
+        this.worker.onerror = (e) => {
+            console.warn('Logo worker failed, decoding on main thread', e.message);
+            this.worker.terminate();
+            this.worker = null;
+
+            const pending = [...this.pending.values()];
+            this.pending.clear();
+            pending.forEach(request => this.runOnMainThread(request));
+        };
+    }
+
+    // Blob, File or URL string -> packed mask (Uint8Array)
+    async process(source) {
+        const blob = typeof source === 'string' ? await (await fetch(source)).blob() : source;
+
+        return new Promise((resolve, reject) => {
+            const request = { source: blob, resolve, reject };
+            if (this.worker) this.post(this.nextId++, request);
+            else this.runOnMainThread(request);
+        });
+    }
+
+    post(id, request) {
+        this.pending.set(id, request);
+        this.worker.postMessage({ id, source: request.source, known: this.masks.keys() });
+    }
+
+    async runOnMainThread(request) {
+        try {
+            const hash = await hashBlob(request.source);
+            let mask = this.masks.get(hash);
+            if (!mask) {
+                mask = await decodeLogoMask(request.source);
+                this.masks.set(hash, mask);
+            }
+            request.resolve(mask);
+        } catch (e) {
+            request.reject(e);
+        }
+    }
+
+    onMessage({ id, hash, mask, error }) {
+        const request = this.pending.get(id);
+        if (!request) return;
+        this.pending.delete(id);
+
+        if (error) {
+            request.reject(new Error(error));
+            return;
+        }
+
+        if (mask) {
+            this.masks.set(hash, mask);
+            request.resolve(mask);
+            return;
+        }
+
+        // Known hash; if it was evicted in the meantime, decode after all
+        const cached = this.masks.get(hash);
+        if (cached) request.resolve(cached);
+        else this.runOnMainThread(request);
+    }
+
+    getStats() {
+        return { masks: this.masks.getStats() };
+    }
+}
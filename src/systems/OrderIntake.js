@@ -0,0 +1,111 @@
+// src/systems/OrderIntake.js
+
+// Uploads finished export files to the shop's order-intake endpoint, in chunks,
+// so a flaky connection only ever resends one chunk. Every request is idempotent
+// (the client picks the upload id), which makes each one safe to retry:
+//
+//   PUT  {endpoint}/uploads/{id}                 JSON { fileName, size, chunkSize, chunks, metadata }
+//   PUT  {endpoint}/uploads/{id}/chunks/{index}  chunk bytes, Content-Range: bytes a-b/size
+//   POST {endpoint}/uploads/{id}/complete        -> JSON receipt from the server
+//
+// Network errors, 408, 429 and 5xx are retried with exponential backoff and
+// jitter; other statuses fail the upload. verification/intake_server.py is a
+// local stand-in for the endpoint.
+
+export const INTAKE_DEFAULTS = {
+    chunkSize: 256 * 1024,
+    maxAttempts: 5,
+    baseDelay: 500,  // ms before the first retry, doubled per attempt
+    maxDelay: 8000
+};
+
+export class OrderIntake {
+    constructor(endpoint, options = {}) {
+        this.endpoint = endpoint.replace(/\/+$/, '');
+        this.options = { ...INTAKE_DEFAULTS, ...options };
+    }
+
+    // onProgress(fraction) as chunks are acknowledged; resolves with the server's receipt
+    async upload(data, fileName, { metadata = {}, signal = null, onProgress = null } = {}) {
+        const blob = data instanceof Blob ? data : new Blob([data]);
+        const { chunkSize } = this.options;
+        const chunks = Math.max(1, Math.ceil(blob.size / chunkSize));
+        const id = uploadId(fileName);
+        const base = `${this.endpoint}/uploads/${encodeURIComponent(id)}`;
+
+        await this.request(base, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ fileName, size: blob.size, chunkSize, chunks, metadata })
+        }, signal);
+
+        for (let index = 0; index < chunks; index++) {
+            const start = index * chunkSize;
+            const end = Math.min(blob.size, start + chunkSize);
+            await this.request(`${base}/chunks/${index}`, {
+                method: 'PUT',
+                headers: {
+                    'Content-Type': 'application/octet-stream',
+                    'Content-Range': `bytes ${start}-${Math.max(start, end - 1)}/${blob.size}`
+                },
+                body: blob.slice(start, end)
+            }, signal);
+            if (onProgress) onProgress((index + 1) / chunks);
+        }
+
+        const response = await this.request(`${base}/complete`, { method: 'POST' }, signal);
+        return response.json();
+    }
+
+    async request(url, init, signal) {
+        const { maxAttempts, baseDelay, maxDelay } = this.options;
+
+        for (let attempt = 1; ; attempt++) {
+            let response = null;
+            let failure = null;
+            try {
+                response = await fetch(url, { ...init, signal });
+            } catch (err) {
+                if (err.name === 'AbortError') throw err;
+                failure = err;
+            }
+
+            if (response && response.ok) return response;
+            if (response && !isRetryable(response.status)) {
+                throw new Error(`Order intake rejected ${init.method} ${url}: ${response.status}`);
+            }
+            if (attempt >= maxAttempts) {
+                throw failure || new Error(`Order intake unavailable: ${response.status}`);
+            }
+
+            const delay = Math.min(maxDelay, baseDelay * 2 ** (attempt - 1));
+            await sleep(delay * (0.5 + Math.random() / 2), signal);
+        }
+    }
+}
+
+function isRetryable(status) {
+    return status === 408 || status === 429 || status >= 500;
+}
+
+function uploadId(fileName) {
+    const random = Math.random().toString(36).slice(2, 10);
+    return `${fileName.replace(/[^\w.-]/g, '_')}-${random}`;
+}
+
+function sleep(ms, signal) {
+    return new Promise((resolve, reject) => {
+        const timer = setTimeout(() => {
+            if (signal) signal.removeEventListener('abort', onAbort);
+            resolve();
+        }, ms);
+        const onAbort = () => {
+            clearTimeout(timer);
+            reject(new DOMException('Upload cancelled', 'AbortError'));
+        };
+        if (signal) {
+            if (signal.aborted) onAbort();
+            else signal.addEventListener('abort', onAbort, { once: true });
+        }
+    });
+}
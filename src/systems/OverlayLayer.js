@@ -0,0 +1,118 @@
+// src/systems/OverlayLayer.js
+
+// Scratch vector shared by every projection (created lazily, THREE is a page global)
+let projectVec = null;
+
+// Project a world position into container pixel coordinates.
+// Writes { x, y, visible } into `out` and allocates nothing.
+export function projectToRect(worldPos, camera, rect, quaternion, out) {
+    if (!projectVec) projectVec = new THREE.Vector3();
+
+    projectVec.copy(worldPos);
+    if (quaternion) projectVec.applyQuaternion(quaternion);
+    projectVec.project(camera);
+
+    out.x = rect.left + (projectVec.x * 0.5 + 0.5) * rect.width;
+    out.y = rect.top + (-projectVec.y * 0.5 + 0.5) * rect.height;
+    out.visible = projectVec.z < 1;
+    return out;
+}
+
+// One positioned DOM node plus the values last written to its style,
+// so repeated updates with the same pixel position touch nothing.
+export class OverlayRecord {
+    constructor() {
+        this.el = null;
+        this.worldPos = null;
+        this.text = null;
+        this.x = NaN;
+        this.y = NaN;
+        this.visible = null;
+        this.transform = null;
+        this.screen = { x: 0, y: 0, visible: false }; // projection scratch
+    }
+
+    setText(text) {
+        if (this.text === text) return;
+        this.text = text;
+        this.el.innerText = text;
+    }
+
+    setTransform(transform) {
+        if (this.transform === transform) return;
+        this.transform = transform;
+        this.el.style.transform = transform;
+    }
+
+    setVisible(visible) {
+        if (this.visible === visible) return;
+        this.visible = visible;
+        this.el.style.display = visible ? 'block' : 'none';
+    }
+
+    setPosition(x, y) {
+        // Compare at sub-pixel precision that matters for layout (0.1px)
+        const rx = Math.round(x * 10) / 10;
+        const ry = Math.round(y * 10) / 10;
+        if (rx !== this.x) {
+            this.x = rx;
+            this.el.style.left = `${rx}px`;
+        }
+        if (ry !== this.y) {
+            this.y = ry;
+            this.el.style.top = `${ry}px`;
+        }
+    }
+
+    // Project the cached world position and apply the result
+    project(camera, rect, quaternion) {
+        projectToRect(this.worldPos, camera, rect, quaternion, this.screen);
+        if (this.screen.visible) {
+            this.setVisible(true);
+            this.setPosition(this.screen.x, this.screen.y);
+        } else {
+            this.setVisible(false);
+        }
+    }
+}
+
+// Pool of overlay records inside one container. Each rebuild calls begin(),
+// takes records with next(), and end() hides whatever was not reused.
+// createElement(record) builds the DOM node the first time a slot is needed.
+export class OverlayLayer {
+    constructor(container, createElement) {
+        this.container = container;
+        this.createElement = createElement;
+        this.records = [];
+        this.used = 0;
+    }
+
+    begin() {
+        this.used = 0;
+    }
+
+    next() {
+        let record = this.records[this.used];
+        if (!record) {
+            record = new OverlayRecord();
+            record.el = this.createElement(record);
+            this.container.appendChild(record.el);
+            this.records.push(record);
+        }
+        this.used++;
+        return record;
+    }
+
+    end() {
+        for (let i = this.used; i < this.records.length; i++) {
+            this.records[i].setVisible(false);
+        }
+    }
+
+    projectAll(camera, rect, quaternion) {
+        for (let i = 0; i < this.used; i++) {
+            const record = this.records[i];
+            if (record.worldPos) record.project(camera, rect, quaternion);
+        }
+    }
+}
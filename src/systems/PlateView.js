@@ -0,0 +1,231 @@
+// src/systems/PlateView.js
+import { layoutPlate, placementMatrix } from '../core/Plate.js';
+import { GeometryEngine } from './GeometryEngine.js';
+import { deserializeGeometry, themeColors } from '../utils/GeometryFactory.js';
+
+// Viewport side of plate mode. Trays are grouped by design hash: each distinct
+// design is built once and drawn as one InstancedMesh pair (wall, base), with
+// per-instance placement matrices and theme colors. Adding, removing or
+// re-packing trays only rewrites instance data; geometry is built only for
+// designs not on the plate yet, one at a time on a GeometryEngine of its own
+// (so plate builds never supersede the editor's) and from its caches when the
+// design has been built before.
+
+const BED_COLOR = 0x27272a;
+const GRID_COLOR = 0x3f3f46;
+const GRID_STEP = 50;
+const MIN_CAPACITY = 4;
+
+export class PlateView {
+    constructor(sceneManager) {
+        this.sceneManager = sceneManager;
+        this.group = new THREE.Group();
+        this.group.name = 'plate';
+        this.group.visible = false;
+        sceneManager.scene.add(this.group);
+
+        this.bed = null;
+        this.bedKey = '';
+        this.batches = new Map(); // hash -> { wall, base } InstancedMesh pair
+        this.geometries = new Map(); // hash -> { wall, base } BufferGeometry
+        this.engine = null;
+        this.building = false;
+        this.failed = new Set(); // hashes whose build failed; not retried
+
+        this.plate = null;
+        this.layout = null;
+
+        // Instance colors multiply the material color, so the materials are white
+        this.materials = {
+            wall: new THREE.MeshStandardMaterial({ color: 0xffffff, roughness: 0.5, metalness: 0.1 }),
+            base: new THREE.MeshStandardMaterial({ color: 0xffffff, roughness: 0.6, metalness: 0.1 })
+        };
+        this.matrix = new THREE.Matrix4();
+        this.color = new THREE.Color();
+    }
+
+    get visible() {
+        return this.group.visible;
+    }
+
+    setVisible(visible) {
+        this.group.visible = visible;
+        this.sceneManager.invalidate();
+    }
+
+    // Re-packs the plate and refreshes the instances; returns the layout
+    update(plate) {
+        this.plate = plate;
+        this.layout = layoutPlate(plate);
+        this.updateBed(plate.bed);
+        this.updateInstances();
+        this.buildMissing();
+        this.sceneManager.invalidate();
+        return this.layout;
+    }
+
+    // Designs on the plate that have no geometry yet
+    get pendingBuilds() {
+        if (!this.layout) return 0;
+        let count = 0;
+        this.layout.groups.forEach((design, hash) => { if (!this.geometries.has(hash) && !this.failed.has(hash)) count++; });
+        return count;
+    }
+
+    async buildMissing() {
+        if (this.building) return; // The running loop picks up the new layout
+        this.building = true;
+        if (!this.engine) this.engine = new GeometryEngine();
+
+        try {
+            let next;
+            while ((next = this.nextMissing())) {
+                const [hash, design] = next;
+                const buffers = await this.engine.build(design);
+                if (!buffers) {
+                    this.failed.add(hash);
+                    continue;
+                }
+                this.geometries.set(hash, { wall: deserializeGeometry(buffers.wall), base: deserializeGeometry(buffers.base) });
+                this.updateInstances();
+                this.sceneManager.invalidate();
+            }
+        } finally {
+            this.building = false;
+        }
+        this.pruneGeometries();
+    }
+
+    nextMissing() {
+        for (const entry of this.layout.groups) {
+            if (!this.geometries.has(entry[0]) && !this.failed.has(entry[0])) return entry;
+        }
+        return null;
+    }
+
+    // Writes matrices and colors for every placed tray whose geometry is ready
+    updateInstances() {
+        const byHash = new Map();
+        this.layout.placements.forEach(placement => {
+            if (!byHash.has(placement.hash)) byHash.set(placement.hash, []);
+            byHash.get(placement.hash).push(placement);
+        });
+        const themes = new Map(this.plate.items.map(item => [item.id, item.theme]));
+
+        this.batches.forEach((batch, hash) => {
+            if (!byHash.has(hash)) this.removeBatch(hash);
+        });
+
+        byHash.forEach((placements, hash) => {
+            const geometry = this.geometries.get(hash);
+            if (!geometry) return;
+            const batch = this.ensureBatch(hash, geometry, placements.length);
+
+            placements.forEach((placement, k) => {
+                this.matrix.fromArray(placementMatrix(placement));
+                const colors = themeColors(themes.get(placement.id));
+                ['wall', 'base'].forEach(part => {
+                    batch[part].setMatrixAt(k, this.matrix);
+                    batch[part].setColorAt(k, this.color.setHex(colors[part]));
+                });
+            });
+            ['wall', 'base'].forEach(part => {
+                const mesh = batch[part];
+                mesh.count = placements.length;
+                mesh.instanceMatrix.needsUpdate = true;
+                mesh.instanceColor.needsUpdate = true;
+            });
+        });
+    }
+
+    // Instanced meshes are sized in powers of two, so adding trays rarely reallocates
+    ensureBatch(hash, geometry, count) {
+        let batch = this.batches.get(hash);
+        if (batch && batch.capacity >= count) return batch;
+        if (batch) this.removeBatch(hash);
+
+        let capacity = MIN_CAPACITY;
+        while (capacity < count) capacity *= 2;
+
+        batch = { capacity };
+        ['wall', 'base'].forEach(part => {
+            const mesh = new THREE.InstancedMesh(geometry[part], this.materials[part], capacity);
+            mesh.name = `plate-${part}`;
+            // The bounds of the shared geometry say nothing about where its instances are
+            mesh.frustumCulled = false;
+            // Allocate instanceColor for the full capacity while count still equals it
+            mesh.setColorAt(0, this.color.setHex(0xffffff));
+            batch[part] = mesh;
+            this.group.add(mesh);
+        });
+        this.batches.set(hash, batch);
+        return batch;
+    }
+
+    removeBatch(hash) {
+        const batch = this.batches.get(hash);
+        if (!batch) return;
+        ['wall', 'base'].forEach(part => {
+            this.group.remove(batch[part]);
+            if (batch[part].dispose) batch[part].dispose();
+        });
+        this.batches.delete(hash);
+    }
+
+    // Geometries of designs that left the plate
+    pruneGeometries() {
+        if (!this.layout) return;
+        this.geometries.forEach((geometry, hash) => {
+            if (this.layout.groups.has(hash) || this.batches.has(hash)) return;
+            geometry.wall.dispose();
+            geometry.base.dispose();
+            this.geometries.delete(hash);
+        });
+    }
+
+    // Bed plate with a 50 mm grid, just below the trays
+    updateBed({ width, depth }) {
+        const key = `${width}x${depth}`;
+        if (key === this.bedKey) return;
+        this.bedKey = key;
+
+        if (this.bed) {
+            this.group.remove(this.bed);
+            this.bed.traverse(child => {
+                if (child.geometry) child.geometry.dispose();
+                if (child.material) child.material.dispose();
+            });
+        }
+
+        this.bed = new THREE.Group();
+        const plane = new THREE.Mesh(
+            new THREE.PlaneGeometry(width, depth),
+            new THREE.MeshStandardMaterial({ color: BED_COLOR, roughness: 0.9, metalness: 0 })
+        );
+        plane.rotation.x = -Math.PI / 2;
+        plane.position.y = -0.5;
+        this.bed.add(plane);
+
+        const points = [];
+        for (let x = -width / 2; x <= width / 2 + 1e-6; x += GRID_STEP) points.push(x, -0.4, -depth / 2, x, -0.4, depth / 2);
+        for (let z = -depth / 2; z <= depth / 2 + 1e-6; z += GRID_STEP) points.push(-width / 2, -0.4, z, width / 2, -0.4, z);
+        const grid = new THREE.BufferGeometry();
+        grid.setAttribute('position', new THREE.Float32BufferAttribute(points, 3));
+        this.bed.add(new THREE.LineSegments(grid, new THREE.LineBasicMaterial({ color: GRID_COLOR })));
+
+        this.group.add(this.bed);
+    }
+
+    getStats() {
+        let instances = 0;
+        this.batches.forEach(batch => { instances += batch.wall.count; });
+        return {
+            trays: this.layout ? this.layout.placements.length : 0,
+            unplaced: this.layout ? this.layout.unplaced.length : 0,
+            designs: this.geometries.size,
+            batches: this.batches.size,
+            instances,
+            pendingBuilds: this.pendingBuilds
+        };
+    }
+}
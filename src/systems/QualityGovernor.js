@@ -0,0 +1,136 @@
+// src/systems/QualityGovernor.js
+
+// Adaptive render quality for interactive frames. While a drag, slider scrub or
+// animation keeps the renderer busy, the governor measures frame times and
+// steps the drawing-buffer pixel ratio down (then swaps PBR shading for
+// Lambert and corner tessellation for 'draft') until frames fit the target.
+// Once the scene is idle again, still frames are drawn at full quality.
+// The learned interactive settings carry over to the next interaction, and
+// are raised again one step at a time when frames have headroom.
+
+export const GOVERNOR_DEFAULTS = {
+    targetFps: 45,       // degrade below this
+    headroomFps: 58,     // restore a step above this (two windows in a row)
+    minPixelRatio: 0.75,
+    maxPixelRatio: 2,    // further capped by window.devicePixelRatio
+    windowSize: 20,      // frames per decision
+    stepDown: 0.7,       // largest single reduction of the pixel ratio
+    stepUp: 1.15
+};
+
+// Frames further apart than this are separate bursts, not slow frames
+const MAX_FRAME_GAP = 250;
+
+export class QualityGovernor {
+    constructor(options = {}) {
+        this.options = { ...GOVERNOR_DEFAULTS, ...options };
+
+        const dpr = typeof window !== 'undefined' ? window.devicePixelRatio || 1 : 1;
+        this.maxPixelRatio = Math.min(dpr, this.options.maxPixelRatio);
+        this.minPixelRatio = Math.min(this.options.minPixelRatio, this.maxPixelRatio);
+
+        // Learned interactive settings
+        this.pixelRatio = this.maxPixelRatio;
+        this.lite = false;
+
+        this.active = false;
+        this.lastFrame = 0;
+        this.requestedAt = 0;
+        this.windowTotal = 0;
+        this.windowCount = 0;
+        this.goodWindows = 0;
+    }
+
+    // MSAA is not worth its cost once the buffer is 2x or denser
+    get antialias() {
+        return this.maxPixelRatio < 2;
+    }
+
+    // Corner tessellation for geometry built during an interaction
+    get tessellation() {
+        return this.lite ? 'draft' : 'preview';
+    }
+
+    // Render settings for the current state: governed while active, full quality when idle
+    settings() {
+        if (!this.active) return { pixelRatio: this.maxPixelRatio, shading: 'standard' };
+        return { pixelRatio: this.pixelRatio, shading: this.lite ? 'lambert' : 'standard' };
+    }
+
+    // Returns true when the settings changed
+    setActive(active) {
+        if (this.active === active) return false;
+        this.active = active;
+        this.windowTotal = 0;
+        this.windowCount = 0;
+        return this.pixelRatio !== this.maxPixelRatio || this.lite;
+    }
+
+    // A frame was requested (first request since the last frame wins)
+    requested(now) {
+        if (!this.requestedAt) this.requestedAt = now;
+    }
+
+    // Called at the start of every rendered frame; returns true when the settings changed.
+    // A frame's cost is the time since the later of the previous frame and its request,
+    // so frames that were simply not asked for (slow pointer movement) do not count as slow.
+    frame(now) {
+        const since = Math.max(this.lastFrame, this.requestedAt);
+        this.lastFrame = now;
+        this.requestedAt = 0;
+
+        const ms = now - since;
+        if (!this.active || !since || ms > MAX_FRAME_GAP) return false;
+
+        this.windowTotal += ms;
+        if (++this.windowCount < this.options.windowSize) return false;
+
+        const mean = this.windowTotal / this.windowCount;
+        this.windowTotal = 0;
+        this.windowCount = 0;
+        return this.adjust(mean);
+    }
+
+    adjust(mean) {
+        const { targetFps, headroomFps, stepDown, stepUp } = this.options;
+        const budget = 1000 / targetFps;
+
+        if (mean > budget) {
+            this.goodWindows = 0;
+            if (this.pixelRatio > this.minPixelRatio) {
+                // Fill cost grows with the square of the ratio
+                const scale = Math.max(stepDown, Math.sqrt(budget / mean));
+                this.pixelRatio = Math.max(this.minPixelRatio, Math.round(this.pixelRatio * scale * 100) / 100);
+                return true;
+            }
+            if (!this.lite) {
+                this.lite = true;
+                return true;
+            }
+            return false;
+        }
+
+        if (mean < 1000 / headroomFps && ++this.goodWindows >= 2) {
+            this.goodWindows = 0;
+            // Undo in reverse order: shading first, then resolution
+            if (this.lite) {
+                this.lite = false;
+                return true;
+            }
+            if (this.pixelRatio < this.maxPixelRatio) {
+                this.pixelRatio = Math.min(this.maxPixelRatio, Math.round(this.pixelRatio * stepUp * 100) / 100);
+                return true;
+            }
+        }
+        return false;
+    }
+
+    getStats() {
+        return {
+            active: this.active,
+            pixelRatio: this.pixelRatio,
+            maxPixelRatio: this.maxPixelRatio,
+            lite: this.lite
+        };
+    }
+}
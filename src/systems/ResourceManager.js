@@ -0,0 +1,73 @@
+// src/systems/ResourceManager.js
+import { createThemeMaterials } from '../utils/GeometryFactory.js';
+
+// Owns GPU-backed resources for the tray model: materials are pooled per
+// color theme and replaced geometries are disposed as soon as they leave the scene.
+export class ResourceManager {
+    constructor(renderer) {
+        this.renderer = renderer;
+        this.materialPool = new Map(); // 'theme:shading' -> { matWall, matBase }
+    }
+
+    getThemeMaterials(theme, shading = 'standard') {
+        const key = `${theme}:${shading}`;
+        let materials = this.materialPool.get(key);
+        if (!materials) {
+            materials = createThemeMaterials(theme, shading);
+            materials.matWall.userData.pooled = true;
+            materials.matBase.userData.pooled = true;
+            this.materialPool.set(key, materials);
+        }
+        return materials;
+    }
+
+    // Release geometries (and any non-pooled materials/textures) of an object tree
+    disposeObject(object) {
+        object.traverse(child => {
+            if (child.geometry) child.geometry.dispose();
+
+            const materials = Array.isArray(child.material) ? child.material : (child.material ? [child.material] : []);
+            materials.forEach(mat => {
+                if (mat.userData.pooled) return;
+                if (mat.map) mat.map.dispose();
+                mat.dispose();
+            });
+        });
+    }
+
+    getStats() {
+        const info = this.renderer.info;
+        return {
+            geometries: info.memory.geometries,
+            textures: info.memory.textures,
+            programs: info.programs ? info.programs.length : 0,
+            pooledMaterials: this.materialPool.size * 2,
+            calls: info.render.calls,
+            triangles: info.render.triangles
+        };
+    }
+
+    // Small fixed overlay with live renderer.info counts (enabled with ?stats)
+    showStatsOverlay() {
+        if (this.statsEl) return;
+
+        const el = document.createElement('div');
+        el.id = 'resource-stats';
+        el.style.cssText = `
+            position: fixed; left: 8px; bottom: 8px; z-index: 10005;
+            background: rgba(0,0,0,0.7); color: #a1a1aa; pointer-events: none;
+            font: 10px/1.4 monospace; padding: 6px 8px; border-radius: 6px;
+            white-space: pre;
+        `;
+        document.body.appendChild(el);
+        this.statsEl = el;
+
+        const update = () => {
+            const s = this.getStats();
+            el.textContent = `geo ${s.geometries}  tex ${s.textures}  prog ${s.programs}\n` +
+                             `mat ${s.pooledMaterials}  calls ${s.calls}  tris ${s.triangles}`;
+        };
+        update();
+        this.statsTimer = setInterval(update, 1000);
+    }
+}
@@ -1,7 +1,15 @@
 import { store } from '../core/Store.js';
+import { createModelFromBuffers } from '../utils/GeometryFactory.js';
+import { ResourceManager } from './ResourceManager.js';
+import { QualityGovernor } from './QualityGovernor.js';
+import { TopViewCanvas } from './TopViewCanvas.js';
+import { TopViewTransform } from '../utils/TopViewTransform.js';
+import { perf } from '../core/Perf.js';
 
 export class SceneManager {
-    constructor(canvas, view3DContainer, viewTopContainer) {
+    // options.topView: 'webgl' (second render pass) or '2d' (TopViewCanvas)
+    // options.governor: QualityGovernor options
+    constructor(canvas, view3DContainer, viewTopContainer, { topView = 'webgl', governor = {} } = {}) {
         this.canvas = canvas;
         this.view3DContainer = view3DContainer;
         this.viewTopContainer = viewTopContainer;
@@ -11,10 +19,31 @@ export class SceneManager {
         this.camera3D = null;
         this.cameraTop = null;
         this.boxGroup = null;
+        this.modelGroup = null;
+        this.resources = null;
+
+        // Interactive pixel ratio / shading, see QualityGovernor
+        this.governor = new QualityGovernor(governor);
+        this.shading = 'standard';
 
         // Configuration
-        this.frustumSize = 250;
+        // World <-> screen mapping of the top view, shared by camera, picking, labels and 2D backend
+        this.topTransform = new TopViewTransform(250);
+        this.topViewMode = topView;
+        this.topView2D = null;
         this.lastZoomedMaxDim = 0;
+        // Box the cameras fit instead of the tray ({ l, w, h }), e.g. the bed in plate mode
+        this.fitBounds = null;
+        // PlateView, attached by PlateSystem on first use
+        this.plateView = null;
+
+        // Render-on-demand state: each viewport is redrawn only when invalidated
+        this.dirty = { view3D: true, viewTop: true };
+        this.frameRequested = false;
+        this.viewRects = { view3D: null, viewTop: null };
+        this.rectsStale = false;
+        this.drawnRects = { view3D: null, viewTop: null }; // rects each view was last drawn at
+        this.scrollCheckPending = false;
 
         this.init();
         this.bindEvents();
@@ -25,11 +54,17 @@ export class SceneManager {
         this.scene = new THREE.Scene();
 
         // Renderer Setup
-        this.renderer = new THREE.WebGLRenderer({ canvas: this.canvas, antialias: true, alpha: true });
-        this.renderer.setPixelRatio(window.devicePixelRatio);
+        // preserveDrawingBuffer keeps the untouched viewport on screen when only one is redrawn
+        this.renderer = new THREE.WebGLRenderer({ canvas: this.canvas, antialias: this.governor.antialias, alpha: true, preserveDrawingBuffer: true });
+        this.renderer.setPixelRatio(this.governor.settings().pixelRatio);
         this.renderer.shadowMap.enabled = false;
         this.renderer.shadowMap.type = THREE.PCFSoftShadowMap;
 
+        this.resources = new ResourceManager(this.renderer);
+        if (new URLSearchParams(window.location.search).has('stats')) {
+            this.resources.showStatsOverlay();
+        }
+
         // Camera Setup
         this.camera3D = new THREE.PerspectiveCamera(40, 1, 1, 1000);
         this.camera3D.position.set(160, 160, 160);
@@ -58,12 +93,18 @@ export class SceneManager {
         this.scene.add(dirLight);
 
         // Object Group
+        // boxGroup holds the tray (modelGroup, replaced on every rebuild) and
+        // decorations such as the logo, which survive rebuilds
         this.boxGroup = new THREE.Group();
         this.scene.add(this.boxGroup);
+        this.modelGroup = new THREE.Group();
+        this.boxGroup.add(this.modelGroup);
 
-        // Start Loop
+        if (this.topViewMode === '2d') this.topView2D = new TopViewCanvas(this);
+
+        // Render on demand: the first frame is scheduled here, later ones by invalidate()
         this.animate = this.animate.bind(this);
-        this.animate();
+        this.refreshLayout();
     }
 
     bindEvents() {
@@ -73,37 +114,198 @@ export class SceneManager {
                 this.autoFitCamera();
             }, 50);
         });
+
+        // Scene content changes affect both viewports
+        ['logoChanged', 'logoPositionChanged', 'modelRegenerated'].forEach(event => {
+            store.on(event, () => this.invalidate());
+        });
+        // The floating edit input follows the 3D projection
+        store.on('editingStateChanged', () => this.invalidate('view3D'));
+        // Color themes only swap materials; the geometry stays as it is
+        store.on('colorThemeChanged', (theme) => this.applyTheme(theme));
+        // Governed quality while interacting, full quality once idle
+        store.on('interactionChanged', () => this.updateGovernor());
+
+        // Viewport sizes: observe the canvas and both placeholders
+        if (typeof ResizeObserver !== 'undefined') {
+            this.resizeObserver = new ResizeObserver(() => this.refreshLayout());
+            this.resizeObserver.observe(this.canvas);
+            this.resizeObserver.observe(this.view3DContainer);
+            this.resizeObserver.observe(this.viewTopContainer);
+        }
+        // Positions can change without a size change (e.g. mobile tab switch)
+        window.addEventListener('resize', () => this.refreshLayout());
+        // Scrolling may move the viewports without resizing them (or, e.g. in the
+        // sidebar, not move them at all): rects are re-read lazily, and the views
+        // are only redrawn if one of them actually moved
+        window.addEventListener('scroll', () => {
+            this.rectsStale = true;
+            this.scheduleScrollCheck();
+        }, { capture: true, passive: true });
+    }
+
+    // Once per frame while scrolling: redraw if a viewport is no longer where it was drawn
+    scheduleScrollCheck() {
+        if (this.scrollCheckPending) return;
+        this.scrollCheckPending = true;
+        requestAnimationFrame(() => {
+            this.scrollCheckPending = false;
+            const moved = ['view3D', 'viewTop'].some(view => !sameRect(this.drawnRects[view], this.getViewRect(view)));
+            if (moved) this.invalidate();
+        });
+    }
+
+    get frustumSize() {
+        return this.topTransform.frustumSize;
+    }
+
+    set frustumSize(value) {
+        this.topTransform.frustumSize = value;
+    }
+
+    // Cached client rect of a viewport ('view3D' | 'viewTop'). Layout is only
+    // read again after a resize or scroll, never once per pointer event.
+    getViewRect(view) {
+        if (this.rectsStale || !this.viewRects[view]) {
+            this.viewRects.view3D = this.view3DContainer.getBoundingClientRect();
+            this.viewRects.viewTop = this.viewTopContainer.getBoundingClientRect();
+            this.rectsStale = false;
+        }
+        return this.viewRects[view];
+    }
+
+    // Mark one viewport ('view3D' | 'viewTop') or both as needing a redraw
+    invalidate(view = null) {
+        if (!view || view === 'view3D') this.dirty.view3D = true;
+        if (!view || view === 'viewTop') this.dirty.viewTop = true;
+        this.requestFrame();
+    }
+
+    requestFrame() {
+        if (this.frameRequested) return;
+        this.frameRequested = true;
+        this.governor.requested(performance.now());
+        requestAnimationFrame(this.animate);
+    }
+
+    updateGovernor() {
+        if (this.governor.setActive(store.getState().isInteracting)) {
+            this.applyQuality();
+            this.requestFrame();
+        }
+    }
+
+    // Apply the governor's pixel ratio and shading. Changing the ratio resizes
+    // (and clears) the drawing buffer, so both viewports are marked for redraw.
+    applyQuality() {
+        const { pixelRatio, shading } = this.governor.settings();
+        if (this.renderer.getPixelRatio() !== pixelRatio) this.renderer.setPixelRatio(pixelRatio);
+        if (shading !== this.shading) {
+            this.shading = shading;
+            this.applyMaterials(store.getState().colorTheme);
+        }
+        this.dirty.view3D = true;
+        this.dirty.viewTop = true;
+    }
+
+    // Re-read canvas size and viewport rects, then update cameras and redraw everything
+    refreshLayout() {
+        const width = this.canvas.clientWidth;
+        const height = this.canvas.clientHeight;
+
+        // Rects first, so viewportResize listeners read the new cached values
+        this.viewRects.view3D = this.view3DContainer.getBoundingClientRect();
+        this.viewRects.viewTop = this.viewTopContainer.getBoundingClientRect();
+        this.rectsStale = false;
+
+        if (this.canvas.width !== width || this.canvas.height !== height) {
+            this.renderer.setSize(width, height, false);
+            // Trigger a dimension update/repaint via event if needed?
+            // In original code, updateDimensions() was called here.
+            store.emit('viewportResize');
+        }
+
+        const rect3D = this.viewRects.view3D;
+        if (rect3D.width > 0 && rect3D.height > 0) {
+            this.camera3D.aspect = rect3D.width / rect3D.height;
+            this.camera3D.updateProjectionMatrix();
+        }
+        this.updateTopCamera();
+
+        // Viewports may have moved: wipe stale pixels and redraw both right away,
+        // so the cleared canvas is never presented
+        this.renderer.setScissorTest(false);
+        this.renderer.clear();
+        this.dirty.view3D = true;
+        this.dirty.viewTop = true;
+        this.animate();
+    }
+
+    updateTopCamera() {
+        const rectTop = this.viewRects.viewTop;
+        if (!rectTop || rectTop.width === 0 || rectTop.height === 0) return;
+
+        this.topTransform.applyToCamera(this.cameraTop, rectTop);
     }
 
     updateMesh(mesh) {
-        // Clear existing children
-        while(this.boxGroup.children.length > 0) {
-            this.boxGroup.remove(this.boxGroup.children[0]);
+        // Clear existing children and release their GPU buffers
+        while(this.modelGroup.children.length > 0) {
+            const child = this.modelGroup.children[0];
+            this.modelGroup.remove(child);
+            this.resources.disposeObject(child);
         }
         if (mesh) {
-            this.boxGroup.add(mesh);
+            // Accept either a ready Object3D or { wall, base } buffers from the GeometryEngine
+            if (!mesh.isObject3D) {
+                const theme = store.getState().colorTheme;
+                mesh = createModelFromBuffers(mesh, theme, this.resources.getThemeMaterials(theme, this.shading));
+            }
+            this.modelGroup.add(mesh);
         }
+        this.invalidate();
+    }
+
+    applyTheme(theme) {
+        this.applyMaterials(theme);
+        this.invalidate();
+    }
+
+    applyMaterials(theme) {
+        const { matWall, matBase } = this.resources.getThemeMaterials(theme, this.shading);
+        this.modelGroup.traverse(child => {
+            if (!child.isMesh) return;
+            if (child.name === 'wall') child.material = matWall;
+            else if (child.name === 'base') child.material = matBase;
+        });
+    }
+
+    // Plate mode swaps the single tray for the plate's instanced trays,
+    // and the cameras frame the bed instead of the tray
+    setPlateMode(enabled, bounds = null) {
+        this.boxGroup.visible = !enabled;
+        if (this.plateView) this.plateView.setVisible(enabled);
+        this.setFitBounds(enabled ? bounds : null);
+    }
+
+    setFitBounds(bounds) {
+        this.fitBounds = bounds;
+        this.autoFitCamera();
     }
 
     // Camera Auto-Fit Logic
     autoFitCamera() {
-        const { l, w, h } = store.getState().dimensions;
+        const { l, w, h } = this.fitBounds || store.getState().dimensions;
         const maxDim = Math.max(l, w, h);
         const labelPadding = 60; // Padding for labels
 
         // Fit Top View
         const rectTop = this.viewTopContainer.getBoundingClientRect();
+        this.viewRects.viewTop = rectTop;
         if (rectTop.height > 0) {
             const aspect = rectTop.width / rectTop.height;
             this.frustumSize = Math.max(w + labelPadding, (l + labelPadding) / aspect) * 1.4;
-
-            if (this.cameraTop) {
-                this.cameraTop.left = this.frustumSize * aspect / -2;
-                this.cameraTop.right = this.frustumSize * aspect / 2;
-                this.cameraTop.top = this.frustumSize / 2;
-                this.cameraTop.bottom = this.frustumSize / -2;
-                this.cameraTop.updateProjectionMatrix();
-            }
+            this.updateTopCamera();
         }
 
         // Emit event so labels can update positions based on new frustum
@@ -111,6 +313,7 @@ export class SceneManager {
 
         // Fit 3D View
         const rect3D = this.view3DContainer.getBoundingClientRect();
+        this.viewRects.view3D = rect3D;
         if (rect3D.height > 0) {
             const aspect3D = rect3D.width / rect3D.height;
             const fovRad = (this.camera3D.fov * Math.PI) / 180;
@@ -125,14 +328,17 @@ export class SceneManager {
 
             const direction = new THREE.Vector3(1, 1, 1).normalize();
             this.camera3D.position.copy(direction.multiplyScalar(distance));
+            this.camera3D.aspect = aspect3D;
+            this.camera3D.updateProjectionMatrix();
             this.camera3D.lookAt(0, 0, 0);
         }
 
         this.lastZoomedMaxDim = maxDim;
+        this.invalidate();
     }
 
     checkAutoZoom() {
-        const { l, w, h } = store.getState().dimensions;
+        const { l, w, h } = this.fitBounds || store.getState().dimensions;
         const currentMaxDim = Math.max(l, w, h);
 
         if (this.lastZoomedMaxDim === 0) {
@@ -146,92 +352,78 @@ export class SceneManager {
     }
 
     animate() {
-        requestAnimationFrame(this.animate);
+        this.frameRequested = false;
+        if (this.governor.frame(performance.now())) this.applyQuality();
 
-        const width = this.canvas.clientWidth;
-        const height = this.canvas.clientHeight;
+        const draw3D = this.dirty.view3D;
+        const drawTop = this.dirty.viewTop;
+        this.dirty.view3D = false;
+        this.dirty.viewTop = false;
 
-        if (this.canvas.width !== width || this.canvas.height !== height) {
-            this.renderer.setSize(width, height, false);
-            // Trigger a dimension update/repaint via event if needed?
-            // In original code, updateDimensions() was called here.
-            store.emit('viewportResize');
-        }
+        if (!draw3D && !drawTop) return;
 
+        const height = this.canvas.clientHeight;
         this.renderer.setScissorTest(true);
-        const { isEditing } = store.getState();
 
         // Render 3D View
-        const rect3D = this.view3DContainer.getBoundingClientRect();
-        if (rect3D.width > 0 && rect3D.height > 0) {
+        const rect3D = this.getViewRect('view3D');
+        if (draw3D) this.drawnRects.view3D = rect3D;
+        if (draw3D && rect3D.width > 0 && rect3D.height > 0) {
             this.renderer.setViewport(rect3D.left, height - rect3D.bottom, rect3D.width, rect3D.height);
             this.renderer.setScissor(rect3D.left, height - rect3D.bottom, rect3D.width, rect3D.height);
-            this.camera3D.aspect = rect3D.width / rect3D.height;
-            this.camera3D.updateProjectionMatrix();
+            let t0 = perf.enabled ? perf.now() : 0;
             this.renderer.render(this.scene, this.camera3D);
+            if (perf.enabled) {
+                perf.measure('render:view3D', t0);
+                t0 = perf.now();
+            }
 
             // Notify system to update 3D labels overlay position
             store.emit('update3DOverlay', { camera: this.camera3D, rect: rect3D, object: this.boxGroup });
+            if (perf.enabled) perf.measure('overlay', t0);
         }
 
         // Render Top View
-        // Temporary rotation reset for Top View rendering
-        const curRot = this.boxGroup.rotation.y;
-        this.boxGroup.rotation.y = 0;
-        this.boxGroup.updateMatrixWorld();
+        const rectTop = this.getViewRect('viewTop');
+        if (drawTop) this.drawnRects.viewTop = rectTop;
+        if (drawTop && this.topView2D && rectTop.width > 0 && rectTop.height > 0) {
+            const t0 = perf.enabled ? perf.now() : 0;
+            this.topView2D.render(rectTop);
+            if (perf.enabled) perf.measure('render:viewTop', t0);
+        } else if (drawTop && rectTop.width > 0 && rectTop.height > 0) {
+            // Temporary rotation reset for Top View rendering
+            const curRot = this.boxGroup.rotation.y;
+            if (curRot !== 0) {
+                this.boxGroup.rotation.y = 0;
+                this.boxGroup.updateMatrixWorld();
+            }
 
-        const rectTop = this.viewTopContainer.getBoundingClientRect();
-        if (rectTop.width > 0 && rectTop.height > 0) {
             this.renderer.setViewport(rectTop.left, height - rectTop.bottom, rectTop.width, rectTop.height);
             this.renderer.setScissor(rectTop.left, height - rectTop.bottom, rectTop.width, rectTop.height);
-
-            const aspectTop = rectTop.width / rectTop.height;
-            this.cameraTop.left = this.frustumSize * aspectTop / -2;
-            this.cameraTop.right = this.frustumSize * aspectTop / 2;
-            this.cameraTop.top = this.frustumSize / 2;
-            this.cameraTop.bottom = this.frustumSize / -2;
-            this.cameraTop.updateProjectionMatrix();
-
+            const t0 = perf.enabled ? perf.now() : 0;
             this.renderer.render(this.scene, this.cameraTop);
-        }
+            if (perf.enabled) perf.measure('render:viewTop', t0);
 
-        // Restore rotation
-        this.boxGroup.rotation.y = curRot;
-        this.boxGroup.updateMatrixWorld();
+            // Restore rotation
+            if (curRot !== 0) {
+                this.boxGroup.rotation.y = curRot;
+                this.boxGroup.updateMatrixWorld();
+            }
+        }
     }
 
     // Helper to get World Coordinates from Screen Coordinates (for Top View)
-    getTopWorldCoords(clientX, clientY) {
-        const rect = this.viewTopContainer.getBoundingClientRect();
-        const x = clientX - rect.left;
-        const y = clientY - rect.top;
-
-        const mouseX = (x / rect.width) * 2 - 1;
-        const mouseY = -(y / rect.height) * 2 + 1;
-        const aspect = rect.width / rect.height;
-
-        return {
-            x: mouseX * (this.frustumSize * aspect / 2),
-            z: -mouseY * (this.frustumSize / 2),
-            isInside: x >= 0 && x <= rect.width && y >= 0 && y <= rect.height
-        };
+    getTopWorldCoords(clientX, clientY, rect = this.getViewRect('viewTop')) {
+        return this.topTransform.toWorld(clientX, clientY, rect);
     }
 
     getScreenCoordsFromTopWorld(worldX, worldZ) {
-        const rect = this.viewTopContainer.getBoundingClientRect();
+        const rect = this.getViewRect('viewTop');
         if (rect.width === 0 || rect.height === 0) return { x: 0, y: 0 };
-
-        const aspect = rect.width / rect.height;
-
-        const mouseX = worldX / (this.frustumSize * aspect / 2);
-        const mouseY = -worldZ / (this.frustumSize / 2);
-
-        const x = ((mouseX + 1) / 2) * rect.width;
-        const y = ((1 - mouseY) / 2) * rect.height;
-
-        return {
-            x: rect.left + x,
-            y: rect.top + y
-        };
+        return this.topTransform.toScreen(worldX, worldZ, rect);
     }
 }
+
+function sameRect(a, b) {
+    return Boolean(a && b) && a.left === b.left && a.top === b.top && a.width === b.width && a.height === b.height;
+}
@@ -0,0 +1,273 @@
+// src/systems/TopViewCanvas.js
+import { store } from '../core/Store.js';
+import { designFromState, hashDesign } from '../core/Design.js';
+import { buildTrayShape, themeColors } from '../utils/GeometryFactory.js';
+import { placementMatrix } from '../core/Plate.js';
+
+// 2D backend for the top view (enabled with ?topView=2d). The top view is a
+// flat orthographic projection, so instead of a second WebGL pass over the PBR
+// scene it is drawn on a canvas inside the viewport placeholder, straight from
+// the wall footprint (outer outline with room holes) that GeometryFactory
+// traces from the room cache. The footprint is traced once per design (by hash)
+// and kept as Path2D, so hover and highlight redraws never retrace. Everything
+// is drawn in world units through the shared TopViewTransform, so it is crisp
+// at any zoom and device pixel ratio.
+// SceneManager keeps scheduling: render() runs in its frame when viewTop is dirty.
+
+const css = (hex) => `#${hex.toString(16).padStart(6, '0')}`;
+
+const HOVER_COLOR = 'rgba(59, 130, 246, 0.85)';
+const SELECTED_COLOR = 'rgba(239, 68, 68, 0.9)';
+const HIDDEN_COLOR = 'rgba(255, 255, 255, 0.35)';
+const OUTLINE_COLOR = 'rgba(0, 0, 0, 0.35)';
+const BED_COLOR = '#27272a';
+const BED_GRID_COLOR = '#3f3f46';
+const BED_GRID_STEP = 50;
+
+export class TopViewCanvas {
+    constructor(sceneManager) {
+        this.sceneManager = sceneManager;
+        this.highlight = { hover: null, selected: null };
+        this.logoImages = new WeakMap(); // texture -> { color, canvas } tinted copy
+        this.trayPaths = null; // { hash, outline, rooms } Path2D of the edited tray
+        this.trayStale = true; // the layout changed since trayPaths was checked
+        this.platePaths = new Map(); // design hash -> { outline, rooms } Path2D, in plate mode
+
+        this.canvas = document.createElement('canvas');
+        this.canvas.className = 'top-view-2d';
+        this.canvas.style.cssText = `
+            position: absolute; inset: 0; width: 100%; height: 100%;
+            pointer-events: none; border-radius: inherit;
+        `;
+        sceneManager.viewTopContainer.appendChild(this.canvas);
+        this.ctx = this.canvas.getContext('2d');
+
+        this.bindEvents();
+    }
+
+    bindEvents() {
+        // The layout is drawn from the state directly, without waiting for the worker's rebuild
+        ['dimensionsChanged', 'dividersChanged', 'hiddenSegmentsChanged'].forEach(event => {
+            store.on(event, () => {
+                this.trayStale = true;
+                this.sceneManager.invalidate('viewTop');
+            });
+        });
+        ['plateChanged', 'plateModeChanged'].forEach(event => {
+            store.on(event, () => this.sceneManager.invalidate('viewTop'));
+        });
+        store.on('dividerHighlightChanged', (highlight) => {
+            this.highlight = highlight;
+            this.sceneManager.invalidate('viewTop');
+        });
+    }
+
+    resize(rect) {
+        const ratio = window.devicePixelRatio || 1;
+        const width = Math.round(rect.width * ratio);
+        const height = Math.round(rect.height * ratio);
+        if (this.canvas.width !== width || this.canvas.height !== height) {
+            this.canvas.width = width;
+            this.canvas.height = height;
+        }
+        return ratio;
+    }
+
+    render(rect) {
+        const ratio = this.resize(rect);
+        const ctx = this.ctx;
+        const state = store.getState();
+        const { wallThickness } = state.dimensions;
+        const colors = themeColors(state.colorTheme);
+
+        ctx.setTransform(1, 0, 0, 1, 0, 0);
+        ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+        ctx.setTransform(...this.sceneManager.topTransform.matrix(rect, ratio));
+        const px = 1 / this.sceneManager.topTransform.scale(rect); // one CSS pixel in world units
+
+        const plateView = this.sceneManager.plateView;
+        if (plateView && plateView.visible && plateView.layout) {
+            this.renderPlate(ctx, state.plate, plateView.layout, px);
+            return;
+        }
+
+        // Wall tops over the whole footprint, then the compartment floors
+        const { outline, rooms } = this.currentTrayPaths(state);
+        ctx.fillStyle = css(colors.wall);
+        ctx.fill(outline);
+
+        ctx.fillStyle = css(colors.base);
+        ctx.fill(rooms);
+
+        ctx.lineWidth = px;
+        ctx.strokeStyle = OUTLINE_COLOR;
+        ctx.stroke(outline);
+        ctx.stroke(rooms);
+
+        this.drawLogo(ctx);
+
+        // Removed walls as faint dashed center lines
+        ctx.setLineDash([4 * px, 4 * px]);
+        ctx.strokeStyle = HIDDEN_COLOR;
+        ctx.beginPath();
+        state.walls.forEachHidden((axis, line, seg) => {
+            const { x0, z0, x1, z1 } = this.segmentBounds(state, axis, line, seg, 0);
+            ctx.moveTo(x0, z0);
+            ctx.lineTo(x1, z1);
+        });
+        ctx.stroke();
+        ctx.setLineDash([]);
+
+        // Hovered and selected (tap again to remove) segments
+        const { hover, selected } = this.highlight;
+        if (hover) this.fillSegment(ctx, state, hover, wallThickness, HOVER_COLOR);
+        if (selected) this.fillSegment(ctx, state, selected, wallThickness, SELECTED_COLOR);
+    }
+
+    // Bed with its grid, then every placed tray's footprint in its theme colors.
+    // Footprints are traced once per distinct design and reused at each placement.
+    renderPlate(ctx, plate, layout, px) {
+        const { width, depth } = plate.bed;
+        ctx.fillStyle = BED_COLOR;
+        ctx.fillRect(-width / 2, -depth / 2, width, depth);
+
+        ctx.lineWidth = px;
+        ctx.strokeStyle = BED_GRID_COLOR;
+        ctx.beginPath();
+        for (let x = -width / 2; x <= width / 2 + 1e-6; x += BED_GRID_STEP) {
+            ctx.moveTo(x, -depth / 2);
+            ctx.lineTo(x, depth / 2);
+        }
+        for (let z = -depth / 2; z <= depth / 2 + 1e-6; z += BED_GRID_STEP) {
+            ctx.moveTo(-width / 2, z);
+            ctx.lineTo(width / 2, z);
+        }
+        ctx.stroke();
+
+        this.platePaths.forEach((paths, hash) => {
+            if (!layout.groups.has(hash)) this.platePaths.delete(hash);
+        });
+
+        const themes = new Map(plate.items.map(item => [item.id, item.theme]));
+        const base = ctx.getTransform();
+        layout.placements.forEach(placement => {
+            let paths = this.platePaths.get(placement.hash);
+            if (!paths) {
+                paths = this.footprintPaths(layout.groups.get(placement.hash));
+                this.platePaths.set(placement.hash, paths);
+            }
+
+            // Shape y is world z, so the placement's xz part maps straight onto the canvas
+            const m = placementMatrix(placement);
+            ctx.setTransform(base);
+            ctx.transform(m[0], m[2], m[8], m[10], m[12], m[14]);
+
+            const colors = themeColors(themes.get(placement.id));
+            ctx.fillStyle = css(colors.wall);
+            ctx.fill(paths.outline);
+            ctx.fillStyle = css(colors.base);
+            ctx.fill(paths.rooms);
+            ctx.strokeStyle = OUTLINE_COLOR;
+            ctx.stroke(paths.outline);
+        });
+        ctx.setTransform(base);
+    }
+
+    // Footprint of the edited tray, retraced only when its design hash changed
+    currentTrayPaths(state) {
+        if (this.trayStale || !this.trayPaths) {
+            const design = designFromState(state, 'full');
+            const hash = hashDesign(design);
+            if (!this.trayPaths || this.trayPaths.hash !== hash) {
+                this.trayPaths = { hash, ...this.footprintPaths(design) };
+            }
+            this.trayStale = false;
+        }
+        return this.trayPaths;
+    }
+
+    // Outer outline and room holes of a design as Path2D
+    footprintPaths(design) {
+        const { shape } = buildTrayShape(design);
+        const rooms = new Path2D();
+        shape.holes.forEach(hole => rooms.addPath(this.tracePath(hole.getPoints(1))));
+        return { outline: this.tracePath(shape.getPoints(1)), rooms };
+    }
+
+    tracePath(points) {
+        const path = new Path2D();
+        points.forEach((p, k) => (k === 0 ? path.moveTo(p.x, p.y) : path.lineTo(p.x, p.y)));
+        path.closePath();
+        return path;
+    }
+
+    // World rect of one wall segment: line `line` of `axis` between the two cross lines around `seg`
+    segmentBounds(state, axis, line, seg, thickness) {
+        const { l, w, wallThickness } = state.dimensions;
+        const { x: dX, z: dZ } = state.dividers;
+        const along = axis === 'X' ? [-w / 2, ...dZ, w / 2] : [-l / 2, ...dX, l / 2];
+        const pos = axis === 'X' ? dX[line] : dZ[line];
+
+        // Stop at the inner face of the outer wall, run through divider crossings
+        const start = seg === 0 ? along[0] + wallThickness : along[seg];
+        const end = seg === along.length - 2 ? along[along.length - 1] - wallThickness : along[seg + 1];
+
+        return axis === 'X'
+            ? { x0: pos - thickness / 2, x1: pos + thickness / 2, z0: start, z1: end }
+            : { x0: start, x1: end, z0: pos - thickness / 2, z1: pos + thickness / 2 };
+    }
+
+    fillSegment(ctx, state, { axis, lineIdx, segIdx }, thickness, color) {
+        const lines = axis === 'X' ? state.dividers.x : state.dividers.z;
+        if (lineIdx >= lines.length) return;
+        const { x0, z0, x1, z1 } = this.segmentBounds(state, axis, lineIdx, segIdx, thickness);
+        ctx.fillStyle = color;
+        ctx.fillRect(x0, z0, x1 - x0, z1 - z0);
+    }
+
+    // The logo mesh's texture, tinted with the material color (cached per texture and color)
+    drawLogo(ctx) {
+        const mesh = this.sceneManager.boxGroup.getObjectByName('logo');
+        const map = mesh && mesh.material.map;
+        if (!map || !map.image) return;
+
+        const color = mesh.material.color.getHex();
+        let entry = this.logoImages.get(map);
+        if (!entry || entry.color !== color) {
+            entry = { color, canvas: this.tintLogo(map, color) };
+            this.logoImages.set(map, entry);
+        }
+
+        const { width, height } = mesh.geometry.parameters;
+        const { x, z } = mesh.position;
+        ctx.drawImage(entry.canvas, x - width / 2, z - height / 2, width, height);
+    }
+
+    tintLogo(texture, color) {
+        const image = texture.image;
+        const canvas = document.createElement('canvas');
+        canvas.width = image.width;
+        canvas.height = image.height;
+        const ctx = canvas.getContext('2d');
+
+        if (image.data) {
+            // DataTexture mask: rows are stored bottom-up for the GL upload
+            const rows = document.createElement('canvas');
+            rows.width = image.width;
+            rows.height = image.height;
+            rows.getContext('2d').putImageData(new ImageData(new Uint8ClampedArray(image.data.buffer, image.data.byteOffset, image.data.byteLength), image.width, image.height), 0, 0);
+            ctx.translate(0, image.height);
+            ctx.scale(1, -1);
+            ctx.drawImage(rows, 0, 0);
+            ctx.setTransform(1, 0, 0, 1, 0, 0);
+        } else {
+            ctx.drawImage(image, 0, 0);
+        }
+
+        // White mask -> ink color, keeping the mask's alpha
+        ctx.globalCompositeOperation = 'source-in';
+        ctx.fillStyle = css(color);
+        ctx.fillRect(0, 0, canvas.width, canvas.height);
+        return canvas;
+    }
+}
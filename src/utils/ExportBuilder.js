@@ -0,0 +1,81 @@
+// src/utils/ExportBuilder.js
+import { buildTrayGeometry } from './GeometryFactory.js';
+import { buildTraySolid } from './SolidBuilder.js';
+import { writeBinarySTL } from './STLWriter.js';
+import { writeOBJ, writeOBJObjects } from './OBJWriter.js';
+import { placementMatrix } from '../core/Plate.js';
+
+// Export file contents for a design, without DOM or scene access, so the same
+// code runs in ExportSystem, in export workers and in the headless batch pipeline.
+// A build plate ({ plate } from Plate.plateExportDesign) is written as one file
+// with every tray in place.
+// Formats:
+//   'stl'       - one welded, watertight body (binary STL)
+//   'obj'       - the same body as an indexed OBJ (smaller file)
+//   'stl-parts' - separate wall and base meshes, as shown on screen
+
+export function exportExtension(format) {
+    return format === 'obj' ? 'obj' : 'stl';
+}
+
+// -> { data: ArrayBuffer | string, triangles, report }; report is null for 'stl-parts'.
+// onProgress(stage) is called as each stage starts: 'mesh', then 'write'.
+export function buildExportFile(design, format = 'stl', onProgress = null) {
+    const progress = (stage) => { if (onProgress) onProgress(stage); };
+
+    if (design.plate) return buildPlateFile(design.plate, format, progress);
+
+    progress('mesh');
+    if (format === 'stl-parts') {
+        const { wall, base } = buildTrayGeometry(design);
+        progress('write');
+        const data = writeBinarySTL([wall, base]);
+        wall.dispose();
+        base.dispose();
+        return { data, triangles: new DataView(data).getUint32(80, true), report: null };
+    }
+
+    const { geometry, report } = buildTraySolid(design);
+    progress('write');
+    const data = format === 'obj' ? writeOBJ(geometry) : writeBinarySTL([geometry]);
+    geometry.dispose();
+    return { data, triangles: report.triangles, report };
+}
+
+// Each distinct design is built once; its buffers are then written at every
+// placement. Trays stay separate bodies, so the report sums the solids' figures.
+function buildPlateFile({ designs, placements }, format, progress) {
+    progress('mesh');
+    const parts = format === 'stl-parts' ? ['wall', 'base'] : ['solid'];
+    const built = {};
+    const report = { trays: placements.length, designs: 0, triangles: 0, volume: 0, manifold: true };
+
+    Object.keys(designs).forEach(hash => {
+        if (format === 'stl-parts') {
+            built[hash] = buildTrayGeometry(designs[hash]);
+        } else {
+            const { geometry, report: solid } = buildTraySolid(designs[hash]);
+            built[hash] = { solid: geometry, report: solid };
+        }
+        report.designs++;
+    });
+
+    progress('write');
+    const entries = [];
+    placements.forEach((placement, k) => {
+        const matrix = placementMatrix(placement);
+        const shared = built[placement.hash];
+        parts.forEach(part => entries.push({ geometry: shared[part], matrix, name: `tray_${k + 1}${part === 'solid' ? '' : `_${part}`}` }));
+        if (shared.report) {
+            report.triangles += shared.report.triangles;
+            report.volume += shared.report.volume;
+            report.manifold = report.manifold && shared.report.manifold;
+        }
+    });
+
+    const data = format === 'obj' ? writeOBJObjects(entries) : writeBinarySTL(entries);
+    Object.values(built).forEach(shared => parts.forEach(part => shared[part].dispose()));
+
+    const triangles = typeof data === 'string' ? report.triangles : new DataView(data).getUint32(80, true);
+    return { data, triangles, report: format === 'stl-parts' ? null : report };
+}
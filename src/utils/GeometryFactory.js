@@ -1,25 +1,61 @@
 // src/utils/GeometryFactory.js
+import { RoomTopology } from './RoomTopology.js';
+import { LRUCache } from './LRUCache.js';
+import { buildSegmentWalls } from './WallBuilder.js';
+import { wallsFromDesign } from '../core/Design.js';
+import { WallState } from '../core/WallState.js';
+import { perf } from '../core/Perf.js';
+
+// Tessellation levels. Corner segment counts scale with the corner radius
+// (segments per mm of radius), clamped to [min, max].
+// 'preview' is used while dragging/sliding, 'full' after commit, 'export' for files.
+// 'draft' replaces 'preview' when the QualityGovernor has degraded interactive quality.
+export const QUALITY_LEVELS = {
+    draft: { segmentsPerMm: 0.25, min: 1, max: 2 },
+    preview: { segmentsPerMm: 0.5, min: 1, max: 4 },
+    full: { segmentsPerMm: 1.5, min: 3, max: 16 },
+    export: { segmentsPerMm: 4, min: 6, max: 48 }
+};
+
+export function cornerSegments(radius, quality = 'full') {
+    const level = QUALITY_LEVELS[quality] || QUALITY_LEVELS.full;
+    return Math.max(level.min, Math.min(level.max, Math.ceil(radius * level.segmentsPerMm)));
+}
 
-export function createRoundedRectShape(w, h, r) {
+// Rounded corner as explicit line segments along the quadratic curve
+// start -> (control) -> end, so each corner gets its own segment count.
+function addCorner(path, sx, sy, cx, cy, ex, ey, segments) {
+    for (let k = 1; k <= segments; k++) {
+        const t = k / segments;
+        const u = 1 - t;
+        path.lineTo(
+            u * u * sx + 2 * u * t * cx + t * t * ex,
+            u * u * sy + 2 * u * t * cy + t * t * ey
+        );
+    }
+}
+
+export function createRoundedRectShape(w, h, r, quality = 'full') {
     const ctx = new THREE.Shape();
     const x = -w / 2;
     const y = -h / 2;
     const radius = Math.min(r, Math.min(w, h) / 2);
+    const segments = cornerSegments(radius, quality);
 
     ctx.moveTo(x + radius, y);
     ctx.lineTo(x + w - radius, y);
-    ctx.quadraticCurveTo(x + w, y, x + w, y + radius);
+    addCorner(ctx, x + w - radius, y, x + w, y, x + w, y + radius, segments);
     ctx.lineTo(x + w, y + h - radius);
-    ctx.quadraticCurveTo(x + w, y + h, x + w - radius, y + h);
+    addCorner(ctx, x + w, y + h - radius, x + w, y + h, x + w - radius, y + h, segments);
     ctx.lineTo(x + radius, y + h);
-    ctx.quadraticCurveTo(x, y + h, x, y + h - radius);
+    addCorner(ctx, x + radius, y + h, x, y + h, x, y + h - radius, segments);
     ctx.lineTo(x, y + radius);
-    ctx.quadraticCurveTo(x, y, x + radius, y);
+    addCorner(ctx, x, y + radius, x, y, x + radius, y, segments);
 
     return ctx;
 }
 
-function traceRoomBoundary(cells, sortedX, sortedZ, thick, l, w, outerR) {
+function traceRoomBoundary(cells, sortedX, sortedZ, thick, l, w, outerR, quality = 'full') {
     const edges = [];
     const cellSet = new Set(cells.map(c => `${c.i},${c.j}`));
 
@@ -242,7 +278,7 @@ function traceRoomBoundary(cells, sortedX, sortedZ, thick, l, w, outerR) {
                 path.lineTo(start.x, start.z);
             }
 
-            path.quadraticCurveTo(curr.x, curr.z, end.x, end.z);
+            addCorner(path, start.x, start.z, curr.x, curr.z, end.x, end.z, cornerSegments(effR, quality));
         }
 
         if (!isOuter) {
@@ -253,26 +289,213 @@ function traceRoomBoundary(cells, sortedX, sortedZ, thick, l, w, outerR) {
     return shape;
 }
 
-export function createModel(l, h, w, r, wallThickness, dX, dZ, hiddenSegments = {}, colorTheme = 'brown') {
-    const group = new THREE.Group();
+// Topology and traced room holes persist between builds (one instance per thread).
+// Each quality keeps its previous build's room keys and holes, so a rebuild reuses
+// every unchanged room however large the grid; the LRU additionally keeps recent
+// holes across layouts and grows with the grid so a full build never evicts itself.
+const roomTopology = new RoomTopology();
+const ROOM_CACHE_MIN = 512;
+const roomShapeCache = new LRUCache(ROOM_CACHE_MIN);
+const lastBuilds = new Map(); // quality -> { build, params, keys: Map(room id -> key), holes: Map(key -> hole) }
+let buildCount = 0;
+
+// Cache key for one room's hole path: everything traceRoomBoundary reads.
+// Coordinates are absolute, cell layout is relative to the room bounds, and the
+// outer corner radius only matters for rooms touching a tray corner.
+function roomShapeKey(room, sortedX, sortedZ, thick, outerR, quality) {
+    const { minI, maxI, minJ, maxJ } = room.bounds;
+    const nx = sortedX.length - 1;
+    const nz = sortedZ.length - 1;
+
+    let key = `${quality}|${thick}|${sortedX.slice(minI, maxI + 2).join(',')}|${sortedZ.slice(minJ, maxJ + 2).join(',')}`;
+
+    const touchesX = minI === 0 || maxI === nx - 1;
+    const touchesZ = minJ === 0 || maxJ === nz - 1;
+    if (touchesX && touchesZ) key += `|r${outerR}`;
+
+    // Non-rectangular rooms also need their cell mask
+    const spanJ = maxJ - minJ + 1;
+    if (room.cells.length !== (maxI - minI + 1) * spanJ) {
+        key += '|' + room.cells.map(c => (c.i - minI) * spanJ + (c.j - minJ)).sort((a, b) => a - b).join(',');
+    }
+    return key;
+}
+
+export function getShapeCacheStats() {
+    return roomShapeCache.getStats();
+}
+
+// Wall construction modes:
+//   'shape'    - every room is a hole in one extruded shape (exact traced outlines)
+//   'segments' - walls emitted per grid segment by WallBuilder (linear, no triangulation)
+//   'auto'     - 'segments' once the grid has SEGMENT_WALL_MIN_CELLS cells or more
+export const SEGMENT_WALL_MIN_CELLS = 64;
+
+function useSegmentWalls(wallMode, nx, nz) {
+    if (wallMode === 'segments') return true;
+    if (wallMode === 'shape') return false;
+    return nx * nz >= SEGMENT_WALL_MIN_CELLS;
+}
+
+// Outer rounded rectangle with one traced hole per room
+function buildWallShape(l, w, thick, effectiveOuterR, sortedX, sortedZ, walls, quality) {
+    const outerShape = createRoundedRectShape(l, w, effectiveOuterR, quality);
+
+    // Rooms come from the persistent topology index. Hole paths are memoized per
+    // room key; keys of rooms the topology reports unchanged are reused as-is.
+    let t0 = perf.enabled ? perf.now() : 0;
+    const { rooms, changedRooms } = roomTopology.update(sortedX, sortedZ, walls);
+    if (perf.enabled) {
+        perf.measure('geometry:rooms', t0);
+        t0 = perf.now();
+    }
+    const buildParams = `${thick}|${effectiveOuterR}`;
+    const build = ++buildCount;
+    const previous = lastBuilds.get(quality);
+    // changedRooms is relative to the topology's previous update, so room keys are
+    // only reused when that update was this quality's last build with the same
+    // thickness and corner radius; holes are always looked up by full key
+    const reuseKeys = previous && previous.build === build - 1 && previous.params === buildParams;
+    const keys = new Map();
+    const holes = new Map();
+
+    lastBuilds.set(quality, { build, params: buildParams, keys, holes });
+    roomShapeCache.resize(Math.max(ROOM_CACHE_MIN, 2 * rooms.length * lastBuilds.size));
+
+    rooms.forEach(room => {
+        let key = reuseKeys && !changedRooms.has(room.id) ? previous.keys.get(room.id) : undefined;
+        if (key === undefined) key = roomShapeKey(room, sortedX, sortedZ, thick, effectiveOuterR, quality);
+        keys.set(room.id, key);
+
+        // Use traceRoomBoundary for all rooms (handles both rectangles and complex shapes)
+        let holeShape = previous ? previous.holes.get(key) : undefined;
+        if (holeShape === undefined) holeShape = roomShapeCache.get(key);
+        if (holeShape === undefined) {
+            holeShape = traceRoomBoundary(room.cells, sortedX, sortedZ, thick, l, w, effectiveOuterR, quality);
+            roomShapeCache.set(key, holeShape);
+        }
+        holes.set(key, holeShape);
+        if (holeShape) {
+            outerShape.holes.push(holeShape);
+        }
+    });
+
+    if (perf.enabled) perf.measure('geometry:trace', t0);
+
+    return outerShape;
+}
+
+// Derived layout shared by every builder
+function resolveLayout({ l, w, r, wallThickness, dividers }) {
+    return {
+        effectiveOuterR: Math.min(r + wallThickness, Math.min(l, w) / 2),
+        sortedX: [-l/2, ...[...dividers.x].sort((a,b) => a - b), l/2],
+        sortedZ: [-w/2, ...[...dividers.z].sort((a,b) => a - b), w/2]
+    };
+}
 
-    let colorBase, colorWall;
-
-    if (colorTheme === 'white') {
-        // Neutral High-Contrast (User Request)
-        // Wall: Off-White #F8F9FA
-        // Base: Medium Grey #71767C
-        colorBase = 0x71767C;
-        colorWall = 0xF8F9FA;
-    } else if (colorTheme === 'red') {
-        colorBase = 0xB71C1C;
-        colorWall = 0xEF5350;
-    } else if (colorTheme === 'blue') {
-        colorBase = 0x0D47A1;
-        colorWall = 0x42A5F5;
+// Wall footprint (outer outline plus room holes, shape y = world z) and the
+// heights of the tray bottom, the compartment floors and the wall tops
+export function buildTrayShape(design) {
+    const { l, h, w, wallThickness, quality = 'full' } = design;
+    const { effectiveOuterR, sortedX, sortedZ } = resolveLayout(design);
+    const shape = buildWallShape(l, w, wallThickness, effectiveOuterR, sortedX, sortedZ, wallsFromDesign(design), quality);
+    return { shape, bottom: -h/2, floor: -h/2 + 2, top: h/2 };
+}
+
+// Plain design description -> wall/base BufferGeometries (no materials, no scene objects).
+// Safe to run inside a worker as long as a THREE namespace is available globally.
+export function buildTrayGeometry(design) {
+    const { l, h, w, wallThickness, quality = 'full', wallMode = 'auto' } = design;
+    const thick = wallThickness;
+    const { effectiveOuterR, sortedX, sortedZ } = resolveLayout(design);
+    const walls = wallsFromDesign(design);
+
+    let geo;
+    let t0 = 0;
+    if (useSegmentWalls(wallMode, sortedX.length - 1, sortedZ.length - 1)) {
+        const { xHidden, zHidden } = RoomTopology.readWalls(walls);
+        if (perf.enabled) t0 = perf.now();
+        geo = buildSegmentWalls({
+            l, h, w,
+            wallThickness: thick,
+            outerR: effectiveOuterR,
+            sortedX, sortedZ, xHidden, zHidden,
+            cornerSegments: (radius) => cornerSegments(radius, quality)
+        });
     } else {
-        colorBase = 0x4E342E;
-        colorWall = 0x8D6E63;
+        const outerShape = buildWallShape(l, w, thick, effectiveOuterR, sortedX, sortedZ, walls, quality);
+        if (perf.enabled) t0 = perf.now();
+        // Corners are already tessellated into line segments, so curveSegments has no effect
+        geo = new THREE.ExtrudeGeometry(outerShape, { depth: h, bevelEnabled: false, curveSegments: 1 });
+        geo.rotateX(Math.PI / 2);
+        geo.translate(0, h/2, 0);
+    }
+    if (perf.enabled) {
+        perf.measure('geometry:extrude', t0);
+        t0 = perf.now();
+    }
+
+    const baseShape = createRoundedRectShape(l, w, effectiveOuterR, quality);
+    const baseGeo = new THREE.ExtrudeGeometry(baseShape, { depth: 2, bevelEnabled: false, curveSegments: 1 });
+    baseGeo.rotateX(Math.PI / 2);
+    baseGeo.translate(0, -h/2 + 2, 0);
+    if (perf.enabled) perf.measure('geometry:base', t0);
+
+    return { wall: geo, base: baseGeo };
+}
+
+// BufferGeometry -> plain typed arrays that can be posted as transferables
+export function serializeGeometry(geometry) {
+    const index = geometry.getIndex();
+    return {
+        position: geometry.getAttribute('position').array,
+        normal: geometry.getAttribute('normal').array,
+        index: index ? Uint32Array.from(index.array) : null
+    };
+}
+
+export function deserializeGeometry(buffers) {
+    const geometry = new THREE.BufferGeometry();
+    geometry.setAttribute('position', new THREE.BufferAttribute(buffers.position, 3));
+    geometry.setAttribute('normal', new THREE.BufferAttribute(buffers.normal, 3));
+    if (buffers.index) geometry.setIndex(new THREE.BufferAttribute(buffers.index, 1));
+    geometry.computeBoundingSphere();
+    return geometry;
+}
+
+export function getTransferables(buffers) {
+    const list = [];
+    ['wall', 'base'].forEach(part => {
+        const b = buffers[part];
+        list.push(b.position.buffer, b.normal.buffer);
+        if (b.index) list.push(b.index.buffer);
+    });
+    return list;
+}
+
+// Wall and base colors per theme
+export const THEME_COLORS = {
+    // Neutral High-Contrast (User Request): off-white walls, medium grey base
+    white: { wall: 0xF8F9FA, base: 0x71767C },
+    red: { wall: 0xEF5350, base: 0xB71C1C },
+    blue: { wall: 0x42A5F5, base: 0x0D47A1 },
+    brown: { wall: 0x8D6E63, base: 0x4E342E }
+};
+
+export function themeColors(colorTheme) {
+    return THEME_COLORS[colorTheme] || THEME_COLORS.brown;
+}
+
+// shading: 'standard' (PBR) or 'lambert' (per-vertex, for degraded interactive frames)
+export function createThemeMaterials(colorTheme, shading = 'standard') {
+    const { wall: colorWall, base: colorBase } = themeColors(colorTheme);
+
+    if (shading === 'lambert') {
+        return {
+            matWall: new THREE.MeshLambertMaterial({ color: colorWall }),
+            matBase: new THREE.MeshLambertMaterial({ color: colorBase })
+        };
     }
 
     // Switch to StandardMaterial for PBR (Ceramic look)
@@ -287,94 +510,19 @@ export function createModel(l, h, w, r, wallThickness, dX, dZ, hiddenSegments =
         metalness: 0.1
     });
 
-    const thick = wallThickness;
-    const effectiveOuterR = Math.min(r + wallThickness, Math.min(l, w) / 2);
-    const outerShape = createRoundedRectShape(l, w, effectiveOuterR);
-
-    const sortedX = [-l/2, ...[...dX].sort((a,b) => a - b), l/2];
-    const sortedZ = [-w/2, ...[...dZ].sort((a,b) => a - b), w/2];
-    const visited = new Set();
-    const rooms = [];
-    const getCellId = (i, j) => `${i},${j}`;
-
-    for(let i=0; i<sortedX.length-1; i++) {
-        for(let j=0; j<sortedZ.length-1; j++) {
-            if(visited.has(getCellId(i,j))) continue;
-
-            let roomCells = [];
-            let queue = [{i, j}];
-            visited.add(getCellId(i,j));
-
-            let minI=i, maxI=i, minJ=j, maxJ=j;
-
-            while(queue.length > 0) {
-                const curr = queue.pop();
-                roomCells.push(curr);
-
-                minI = Math.min(minI, curr.i);
-                maxI = Math.max(maxI, curr.i);
-                minJ = Math.min(minJ, curr.j);
-                maxJ = Math.max(maxJ, curr.j);
-
-                const directions = [
-                    [1,0,'X'], [-1,0,'X'], [0,1,'Z'], [0,-1,'Z']
-                ];
-
-                directions.forEach(d => {
-                    const ni = curr.i + d[0];
-                    const nj = curr.j + d[1];
-
-                    if(ni >= 0 && ni < sortedX.length-1 && nj >= 0 && nj < sortedZ.length-1) {
-                        let hasWall = true;
-                        if(d[2] === 'X') {
-                            const wallIdx = Math.max(curr.i, ni);
-                            const rawIdx = dX.indexOf(sortedX[wallIdx]);
-                            if(rawIdx !== -1 && hiddenSegments[`X_${rawIdx}_${Math.min(curr.j, nj)}`]) {
-                                hasWall = false;
-                            }
-                        } else {
-                            const wallIdx = Math.max(curr.j, nj);
-                            const rawIdx = dZ.indexOf(sortedZ[wallIdx]);
-                            if(rawIdx !== -1 && hiddenSegments[`Z_${rawIdx}_${Math.min(curr.i, ni)}`]) {
-                                hasWall = false;
-                            }
-                        }
-
-                        if(!hasWall && !visited.has(getCellId(ni,nj))) {
-                            visited.add(getCellId(ni,nj));
-                            queue.push({i: ni, j: nj});
-                        }
-                    }
-                });
-            }
-            rooms.push({cells: roomCells, bounds: {minI, maxI, minJ, maxJ}});
-        }
-    }
-
-    const roomShapes = [];
-    rooms.forEach(room => {
-        // Use traceRoomBoundary for all rooms (handles both rectangles and complex shapes)
-        const holeShape = traceRoomBoundary(room.cells, sortedX, sortedZ, thick, l, w, effectiveOuterR);
-        if (holeShape) {
-            roomShapes.push(holeShape);
-            outerShape.holes.push(holeShape);
-        }
-    });
+    return { matWall, matBase };
+}
 
-    const geo = new THREE.ExtrudeGeometry(outerShape, { depth: h, bevelEnabled: false, curveSegments: 24 });
-    geo.rotateX(Math.PI / 2);
+function assembleModel(wallGeo, baseGeo, { matWall, matBase }) {
+    const group = new THREE.Group();
 
-    const mesh = new THREE.Mesh(geo, matWall);
-    mesh.position.y = -h/2 + h;
+    const mesh = new THREE.Mesh(wallGeo, matWall);
+    mesh.name = 'wall';
     mesh.castShadow = true;
     mesh.receiveShadow = true;
 
-    const baseShape = createRoundedRectShape(l, w, effectiveOuterR);
-    const baseGeo = new THREE.ExtrudeGeometry(baseShape, { depth: 2, bevelEnabled: false, curveSegments: 24 });
-    baseGeo.rotateX(Math.PI / 2);
-
     const base = new THREE.Mesh(baseGeo, matBase);
-    base.position.y = -h/2 + 2;
+    base.name = 'base';
     base.receiveShadow = true;
 
     group.add(mesh);
@@ -382,3 +530,19 @@ export function createModel(l, h, w, r, wallThickness, dX, dZ, hiddenSegments =
 
     return group;
 }
+
+// Wraps geometry buffers produced by a worker (or serializeGeometry) into a renderable group.
+// Pass pooled materials to share them across rebuilds.
+export function createModelFromBuffers(buffers, colorTheme = 'brown', materials = createThemeMaterials(colorTheme)) {
+    return assembleModel(deserializeGeometry(buffers.wall), deserializeGeometry(buffers.base), materials);
+}
+
+export function createModel(l, h, w, r, wallThickness, dX, dZ, walls = new WallState(dX.length, dZ.length), colorTheme = 'brown', quality = 'full') {
+    const { wall, base } = buildTrayGeometry({
+        l, h, w, r, wallThickness,
+        dividers: { x: dX, z: dZ },
+        walls: walls.serialize(),
+        quality
+    });
+    return assembleModel(wall, base, createThemeMaterials(colorTheme));
+}
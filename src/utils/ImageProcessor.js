@@ -1,107 +1,113 @@
-export function processLogo(source, themeColor) {
-    return new Promise((resolve, reject) => {
-        const img = new Image();
-        img.crossOrigin = "Anonymous";
-        img.onload = () => {
-            const canvas = document.createElement('canvas');
-            const ctx = canvas.getContext('2d');
-            const size = 512; // Standardize size
-            canvas.width = size;
-            canvas.height = size;
-
-            // Maintain aspect ratio
-            const aspect = img.width / img.height;
-            let drawW = size;
-            let drawH = size;
-            if (aspect > 1) {
-                drawH = size / aspect;
-            } else {
-                drawW = size * aspect;
-            }
-
-            ctx.drawImage(img, (size - drawW) / 2, (size - drawH) / 2, drawW, drawH);
-
-            const imageData = ctx.getImageData(0, 0, size, size);
-            const data = imageData.data;
-
-            // Palette Definition
-            // Brown Theme: Logo should be White (#EFEBE9) on transparent/background
-            // White Theme: Logo should be Brown (#4E342E) on transparent/background
-            // Actually, the user said "Converted to 2 colors".
-            // We will map dark pixels to the "Ink" color and light pixels to transparent (or the "Paper" color if we wanted a full card).
-            // But since it's a logo on the tray, transparency is better for the background.
-
-            const colorBrown = { r: 78, g: 52, b: 46 };   // #4E342E
-            const colorWhite = { r: 239, g: 235, b: 233 }; // #EFEBE9
-
-            let inkColor;
-            if (themeColor === 'white') {
-                inkColor = colorBrown;
-            } else {
-                // Brown, Red, Blue -> Dark Base -> White Ink
-                inkColor = colorWhite;
-            }
-
-            for (let i = 0; i < data.length; i += 4) {
-                const r = data[i];
-                const g = data[i + 1];
-                const b = data[i + 2];
-                const a = data[i + 3];
-
-                if (a < 50) continue; // Skip transparent
-
-                // Simple luminance
-                const lum = 0.299 * r + 0.587 * g + 0.114 * b;
-
-                if (lum < 128) {
-                    // Dark pixel -> Ink Color
-                    data[i] = inkColor.r;
-                    data[i + 1] = inkColor.g;
-                    data[i + 2] = inkColor.b;
-                    data[i + 3] = 255;
-                } else {
-                    // Light pixel -> Transparent (or maybe White/Brown depending on desire)
-                    // Let's make it transparent to blend with the wood?
-                    // User said "converted to 2 colors". If the tray is brown, the logo should be white.
-                    // If the input image has a white background, we want that white background to disappear?
-                    // Or do we want a square sticker?
-                    // "Khắc Chữ / Logo" implies engraving or printing. Transparency for background is safer.
-                    data[i + 3] = 0;
-                }
-            }
-
-            ctx.putImageData(imageData, 0, 0);
-            resolve(canvas.toDataURL());
-        };
-        img.onerror = reject;
-        img.src = source;
-    });
+// src/utils/ImageProcessor.js
+
+// Logo rasterization. Uploads are reduced to a theme-independent 1-bit mask
+// (dark, opaque pixels are ink) at LOGO_SIZE x LOGO_SIZE; the ink color is
+// applied by the material, so a theme change never touches the pixels.
+// Everything except createTextLogo / decodeLogoMask is DOM-free and runs in the logo worker.
+
+export const LOGO_SIZE = 512; // Standardize size
+
+// Ink per tray theme: brown ink on the white tray, light ink on the dark ones
+const INK_BROWN = 0x4E342E;
+const INK_WHITE = 0xEFEBE9;
+
+export function logoInkColor(themeColor) {
+    return themeColor === 'white' ? INK_BROWN : INK_WHITE;
 }
 
-export function createTextLogo(text, themeColor) {
-    const canvas = document.createElement('canvas');
-    const ctx = canvas.getContext('2d');
-    const size = 512;
-    canvas.width = size;
-    canvas.height = size;
+// Content hash of an uploaded file, so re-uploads and theme switches hit the cache
+export async function hashBlob(blob) {
+    const bytes = await blob.arrayBuffer();
+    if (globalThis.crypto && crypto.subtle) {
+        const digest = new Uint8Array(await crypto.subtle.digest('SHA-1', bytes));
+        return Array.from(digest, b => b.toString(16).padStart(2, '0')).join('');
+    }
 
-    const colorBrown = "#4E342E";
-    const colorWhite = "#EFEBE9";
+    // Insecure contexts have no SubtleCrypto: FNV-1a plus the length
+    const view = new Uint8Array(bytes);
+    let h = 0x811c9dc5;
+    for (let i = 0; i < view.length; i++) {
+        h ^= view[i];
+        h = Math.imul(h, 0x01000193);
+    }
+    return `${(h >>> 0).toString(16)}-${view.length}`;
+}
+
+// Draw a decoded image centered in the canvas (aspect kept) and return its RGBA pixels
+export function rasterizeLogo(image, canvas) {
+    const size = canvas.width;
+    const ctx = canvas.getContext('2d');
 
-    let inkColor;
-    if (themeColor === 'white') {
-        inkColor = colorBrown;
+    const aspect = image.width / image.height;
+    let drawW = size;
+    let drawH = size;
+    if (aspect > 1) {
+        drawH = size / aspect;
     } else {
-        inkColor = colorWhite;
+        drawW = size * aspect;
     }
 
-    ctx.fillStyle = inkColor;
+    ctx.clearRect(0, 0, size, size);
+    ctx.drawImage(image, (size - drawW) / 2, (size - drawH) / 2, drawW, drawH);
+    return ctx.getImageData(0, 0, size, size).data;
+}
+
+// RGBA pixels -> packed 1-bit mask (row-major, 8 pixels per byte, LSB first).
+// Ink: alpha >= 50 and luminance below 128. Light or transparent pixels stay clear.
+export function packMask(rgba) {
+    const pixels = rgba.length >>> 2;
+    const mask = new Uint8Array((pixels + 7) >>> 3);
+    for (let p = 0, i = 0; p < pixels; p++, i += 4) {
+        if (rgba[i + 3] < 50) continue;
+        const lum = 0.299 * rgba[i] + 0.587 * rgba[i + 1] + 0.114 * rgba[i + 2];
+        if (lum < 128) mask[p >>> 3] |= 1 << (p & 7);
+    }
+    return mask;
+}
+
+// Packed mask -> white RGBA texture data with the mask as alpha. Rows are
+// flipped because DataTextures are uploaded bottom row first.
+export function expandMask(mask, size = LOGO_SIZE) {
+    const out = new Uint8Array(size * size * 4);
+    for (let y = 0; y < size; y++) {
+        const src = y * size;
+        let o = (size - 1 - y) * size * 4;
+        for (let x = 0; x < size; x++, o += 4) {
+            const p = src + x;
+            out[o] = 255;
+            out[o + 1] = 255;
+            out[o + 2] = 255;
+            out[o + 3] = (mask[p >>> 3] >>> (p & 7)) & 1 ? 255 : 0;
+        }
+    }
+    return out;
+}
+
+// Main-thread fallback when the logo worker is unavailable
+export async function decodeLogoMask(blob) {
+    const bitmap = await createImageBitmap(blob);
+    const canvas = document.createElement('canvas');
+    canvas.width = LOGO_SIZE;
+    canvas.height = LOGO_SIZE;
+    const mask = packMask(rasterizeLogo(bitmap, canvas));
+    if (bitmap.close) bitmap.close();
+    return mask;
+}
+
+// Text drawn in white; like image masks it is tinted by the material color
+export function createTextLogo(text) {
+    const canvas = document.createElement('canvas');
+    const ctx = canvas.getContext('2d');
+    canvas.width = LOGO_SIZE;
+    canvas.height = LOGO_SIZE;
+
+    ctx.fillStyle = '#FFFFFF';
     ctx.font = "bold 100px 'Plus Jakarta Sans', sans-serif"; // Large font
     ctx.textAlign = "center";
     ctx.textBaseline = "middle";
 
     // Draw text
-    ctx.fillText(text, size / 2, size / 2);
+    ctx.fillText(text, LOGO_SIZE / 2, LOGO_SIZE / 2);
 
-    return canvas.toDataURL();
+    return canvas;
 }
@@ -0,0 +1,76 @@
+// src/utils/LRUCache.js
+
+// Bounded least-recently-used cache on top of Map insertion order,
+// with hit/miss counters for profiling.
+export class LRUCache {
+    constructor(capacity = 256) {
+        this.capacity = capacity;
+        this.map = new Map();
+        this.hits = 0;
+        this.misses = 0;
+    }
+
+    has(key) {
+        return this.map.has(key);
+    }
+
+    get(key) {
+        if (!this.map.has(key)) {
+            this.misses++;
+            return undefined;
+        }
+        this.hits++;
+        const value = this.map.get(key);
+        // Move to most-recent position
+        this.map.delete(key);
+        this.map.set(key, value);
+        return value;
+    }
+
+    set(key, value) {
+        if (this.map.has(key)) this.map.delete(key);
+        this.map.set(key, value);
+        this.evict();
+    }
+
+    // Change the capacity, dropping the least recently used entries if it shrank
+    resize(capacity) {
+        this.capacity = capacity;
+        this.evict();
+    }
+
+    evict() {
+        while (this.map.size > this.capacity) {
+            const oldest = this.map.keys().next().value;
+            this.map.delete(oldest);
+        }
+    }
+
+    keys() {
+        return [...this.map.keys()];
+    }
+
+    delete(key) {
+        return this.map.delete(key);
+    }
+
+    clear() {
+        this.map.clear();
+    }
+
+    resetStats() {
+        this.hits = 0;
+        this.misses = 0;
+    }
+
+    getStats() {
+        const total = this.hits + this.misses;
+        return {
+            size: this.map.size,
+            capacity: this.capacity,
+            hits: this.hits,
+            misses: this.misses,
+            hitRate: total > 0 ? this.hits / total : 0
+        };
+    }
+}
@@ -0,0 +1,59 @@
+// src/utils/MaterialEstimator.js
+
+// Material estimate from the built wall and base buffers. Both are vertical
+// prisms, so each volume is its top-cap area times its height. This holds for
+// segment walls too, which leave hidden faces out and are not closed. The
+// geometry worker measures the buffers right after building them and sends the
+// result along (buffers.material), so the main thread never traces outlines or
+// walks triangles to price a design; it only turns the volume into grams and time.
+
+export const MATERIAL_DEFAULTS = {
+    density: 1.25,      // g/cm^3 (PLA)
+    flowRate: 8,        // mm^3/s sustained extrusion
+    layerHeight: 0.2,   // mm
+    layerOverhead: 1.5  // s per layer (travel, retraction, layer change)
+};
+
+const BASE_THICKNESS = 2;
+
+// Area of the horizontal faces of a mesh lying at height y (indexed or not)
+function capArea(position, index, y, eps = 1e-3) {
+    const count = index ? index.length : position.length / 3;
+    let area = 0;
+    for (let t = 0; t < count; t += 3) {
+        const a = (index ? index[t] : t) * 3;
+        const b = (index ? index[t + 1] : t + 1) * 3;
+        const c = (index ? index[t + 2] : t + 2) * 3;
+        if (Math.abs(position[a + 1] - y) > eps || Math.abs(position[b + 1] - y) > eps || Math.abs(position[c + 1] - y) > eps) continue;
+        const ux = position[b] - position[a], uz = position[b + 2] - position[a + 2];
+        const vx = position[c] - position[a], vz = position[c + 2] - position[a + 2];
+        area += Math.abs(ux * vz - uz * vx) / 2;
+    }
+    return area;
+}
+
+// Serialized wall/base buffers -> { area: { base, walls }, volume }
+// Areas in mm^2, volume in mm^3
+export function measureMaterial(buffers, design) {
+    const top = design.h / 2;
+    const floor = -design.h / 2 + BASE_THICKNESS;
+
+    const walls = capArea(buffers.wall.position, buffers.wall.index, top);
+    const base = capArea(buffers.base.position, buffers.base.index, floor);
+    return {
+        area: { base, walls },
+        volume: base * BASE_THICKNESS + walls * (top - floor)
+    };
+}
+
+// Mass and print time for a measured design: { area, volume, grams, printMinutes (min) }
+export function estimateMaterial(measured, design, options = {}) {
+    const { density, flowRate, layerHeight, layerOverhead } = { ...MATERIAL_DEFAULTS, ...options };
+    const layers = Math.ceil(design.h / layerHeight);
+
+    return {
+        ...measured,
+        grams: measured.volume / 1000 * density,
+        printMinutes: (measured.volume / flowRate + layers * layerOverhead) / 60
+    };
+}
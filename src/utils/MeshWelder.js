@@ -0,0 +1,247 @@
+// src/utils/MeshWelder.js
+
+// Vertex welding and mesh validation for exported solids.
+
+// Spatial hash over quantized positions. Each vertex is compared against the
+// 27 neighbouring cells, so points closer than the tolerance always merge even
+// when they fall on different sides of a cell boundary.
+class SpatialHash {
+    constructor(tolerance) {
+        this.tolerance = tolerance;
+        this.inv = 1 / tolerance;
+        this.cells = new Map();
+    }
+
+    static key(ix, iy, iz) {
+        return ((ix * 73856093) ^ (iy * 19349663) ^ (iz * 83492791)) | 0;
+    }
+
+    // Index of a stored vertex within tolerance of (x, y, z), or -1
+    find(positions, x, y, z) {
+        const ix = Math.floor(x * this.inv);
+        const iy = Math.floor(y * this.inv);
+        const iz = Math.floor(z * this.inv);
+        const tol2 = this.tolerance * this.tolerance;
+
+        for (let dx = -1; dx <= 1; dx++) {
+            for (let dy = -1; dy <= 1; dy++) {
+                for (let dz = -1; dz <= 1; dz++) {
+                    const bucket = this.cells.get(SpatialHash.key(ix + dx, iy + dy, iz + dz));
+                    if (!bucket) continue;
+                    for (let b = 0; b < bucket.length; b++) {
+                        const v = bucket[b] * 3;
+                        const ex = positions[v] - x, ey = positions[v + 1] - y, ez = positions[v + 2] - z;
+                        if (ex * ex + ey * ey + ez * ez <= tol2) return bucket[b];
+                    }
+                }
+            }
+        }
+        return -1;
+    }
+
+    insert(index, x, y, z) {
+        const key = SpatialHash.key(Math.floor(x * this.inv), Math.floor(y * this.inv), Math.floor(z * this.inv));
+        const bucket = this.cells.get(key);
+        if (bucket) bucket.push(index);
+        else this.cells.set(key, [index]);
+    }
+}
+
+// Undirected edge key for vertex indices below vertexCount
+function edgeKey(u, v, vertexCount) {
+    return u < v ? u * vertexCount + v : v * vertexCount + u;
+}
+
+// Split triangles along edges that have vertices of other faces lying on them
+// (T-junctions). Triangulators drop collinear outline points, so a cap edge can
+// span two or more edges of the neighbouring band. Only vertices on open
+// (single-use) edges are considered, which keeps the search small.
+function splitTJunctions(positions, vertexCount, tris, tolerance) {
+    let splits = 0;
+
+    for (let pass = 0; pass < 4; pass++) {
+        const uses = new Map();
+        for (let t = 0; t < tris.length; t += 3) {
+            for (let e = 0; e < 3; e++) {
+                const key = edgeKey(tris[t + e], tris[t + (e + 1) % 3], vertexCount);
+                uses.set(key, (uses.get(key) || 0) + 1);
+            }
+        }
+
+        const open = new Set();
+        uses.forEach((count, key) => {
+            if (count !== 1) return;
+            open.add(Math.floor(key / vertexCount));
+            open.add(key % vertexCount);
+        });
+        if (open.size === 0) break;
+        const candidates = [...open];
+
+        const out = [];
+        let changed = false;
+        for (let t = 0; t < tris.length; t += 3) {
+            let split = null;
+            for (let e = 0; e < 3 && !split; e++) {
+                const u = tris[t + e];
+                const v = tris[t + (e + 1) % 3];
+                if (uses.get(edgeKey(u, v, vertexCount)) !== 1) continue;
+
+                const ux = positions[u * 3], uy = positions[u * 3 + 1], uz = positions[u * 3 + 2];
+                const dx = positions[v * 3] - ux, dy = positions[v * 3 + 1] - uy, dz = positions[v * 3 + 2] - uz;
+                const len2 = dx * dx + dy * dy + dz * dz;
+                const inside = [];
+                for (let c = 0; c < candidates.length; c++) {
+                    const b = candidates[c];
+                    if (b === u || b === v) continue;
+                    const px = positions[b * 3] - ux, py = positions[b * 3 + 1] - uy, pz = positions[b * 3 + 2] - uz;
+                    const s = (px * dx + py * dy + pz * dz) / len2;
+                    if (s <= 0 || s >= 1) continue;
+                    const ex = px - s * dx, ey = py - s * dy, ez = pz - s * dz;
+                    if (ex * ex + ey * ey + ez * ez <= tolerance * tolerance) inside.push({ b, s });
+                }
+                if (inside.length) split = { e, u, v, inside };
+            }
+
+            if (!split) {
+                out.push(tris[t], tris[t + 1], tris[t + 2]);
+                continue;
+            }
+
+            // Fan from the opposite vertex over u -> b1 -> ... -> v
+            const w = tris[t + (split.e + 2) % 3];
+            split.inside.sort((p, q) => p.s - q.s);
+            let prev = split.u;
+            split.inside.forEach(({ b }) => {
+                out.push(prev, b, w);
+                prev = b;
+            });
+            out.push(prev, split.v, w);
+            splits++;
+            changed = true;
+        }
+
+        tris = out;
+        if (!changed) break;
+    }
+
+    return { tris, splits };
+}
+
+// Triangle soup (flat xyz array, 9 floats per triangle) -> indexed mesh.
+// After welding, degenerate triangles are dropped, T-junctions are split, and
+// pairs of triangles over the same three vertices are resolved: opposite
+// windings are internal coplanar faces that cancel out, equal windings are
+// duplicates (one is kept).
+export function weldTriangles(soup, tolerance = 1e-4) {
+    const triangleCount = soup.length / 9;
+    const hash = new SpatialHash(tolerance);
+    const positions = new Float32Array(soup.length);
+    const remap = new Uint32Array(triangleCount * 3);
+    let vertexCount = 0;
+
+    for (let v = 0; v < triangleCount * 3; v++) {
+        const x = soup[v * 3], y = soup[v * 3 + 1], z = soup[v * 3 + 2];
+        let index = hash.find(positions, x, y, z);
+        if (index === -1) {
+            index = vertexCount++;
+            positions[index * 3] = x;
+            positions[index * 3 + 1] = y;
+            positions[index * 3 + 2] = z;
+            hash.insert(index, x, y, z);
+        }
+        remap[v] = index;
+    }
+
+    let tris = [];
+    let degenerate = 0;
+    for (let t = 0; t < triangleCount; t++) {
+        const a = remap[t * 3], b = remap[t * 3 + 1], c = remap[t * 3 + 2];
+        if (a === b || b === c || a === c) { degenerate++; continue; }
+        tris.push(a, b, c);
+    }
+
+    const repaired = splitTJunctions(positions, vertexCount, tris, tolerance);
+    tris = repaired.tris;
+
+    // Faces keyed by their sorted vertex triple
+    const faces = new Map();
+    for (let t = 0; t < tris.length; t += 3) {
+        const a = tris[t], b = tris[t + 1], c = tris[t + 2];
+        const lo = Math.min(a, b, c);
+        const hi = Math.max(a, b, c);
+        const key = `${lo},${a + b + c - lo - hi},${hi}`;
+        // Even permutations of (a, b, c) share one winding
+        const parity = (a === lo ? b < c : b === lo ? c < a : a < b) ? 1 : -1;
+
+        const face = faces.get(key);
+        if (!face) faces.set(key, { t, parity });
+        else if (face.parity !== parity) faces.delete(key); // Opposite pair: internal face
+    }
+
+    const index = new Uint32Array(faces.size * 3);
+    let o = 0;
+    faces.forEach(face => {
+        index[o++] = tris[face.t];
+        index[o++] = tris[face.t + 1];
+        index[o++] = tris[face.t + 2];
+    });
+
+    return {
+        position: positions.slice(0, vertexCount * 3),
+        index,
+        stats: {
+            inputTriangles: triangleCount,
+            degenerate,
+            tJunctions: repaired.splits,
+            removed: tris.length / 3 - faces.size
+        }
+    };
+}
+
+// Validation report for an indexed triangle mesh:
+// every edge of a closed, consistently oriented manifold is used exactly twice,
+// once in each direction. Volume is the signed divergence-theorem sum (mm^3).
+export function analyzeMesh(position, index) {
+    const vertexCount = position.length / 3;
+    const triangles = index.length / 3;
+    const edges = new Map(); // undirected edge -> net direction and use count
+    let volume = 0;
+
+    for (let t = 0; t < triangles; t++) {
+        const a = index[t * 3], b = index[t * 3 + 1], c = index[t * 3 + 2];
+        const ax = position[a * 3], ay = position[a * 3 + 1], az = position[a * 3 + 2];
+        const bx = position[b * 3], by = position[b * 3 + 1], bz = position[b * 3 + 2];
+        const cx = position[c * 3], cy = position[c * 3 + 1], cz = position[c * 3 + 2];
+        volume += (ax * (by * cz - bz * cy) - ay * (bx * cz - bz * cx) + az * (bx * cy - by * cx)) / 6;
+
+        for (let e = 0; e < 3; e++) {
+            const u = index[t * 3 + e];
+            const v = index[t * 3 + (e + 1) % 3];
+            const key = u < v ? u * vertexCount + v : v * vertexCount + u;
+            const edge = edges.get(key);
+            const dir = u < v ? 1 : -1;
+            if (edge) { edge.uses++; edge.net += dir; }
+            else edges.set(key, { uses: 1, net: dir });
+        }
+    }
+
+    let boundaryEdges = 0;
+    let nonManifoldEdges = 0;
+    let misorientedEdges = 0;
+    edges.forEach(edge => {
+        if (edge.uses === 1) boundaryEdges++;
+        else if (edge.uses > 2) nonManifoldEdges++;
+        else if (edge.net !== 0) misorientedEdges++;
+    });
+
+    return {
+        triangles,
+        vertices: vertexCount,
+        edges: edges.size,
+        boundaryEdges,
+        nonManifoldEdges,
+        misorientedEdges,
+        manifold: boundaryEdges === 0 && nonManifoldEdges === 0 && misorientedEdges === 0,
+        volume
+    };
+}
@@ -0,0 +1,84 @@
+// src/utils/MeshWriter.js
+
+// Accumulates flat-shaded triangles in growable typed arrays
+export class MeshWriter {
+    constructor(triangles = 4096) {
+        this.positions = new Float32Array(triangles * 9);
+        this.normals = new Float32Array(triangles * 9);
+        this.length = 0;
+    }
+
+    // Triangle a, b, c. The winding is chosen so the normal points along the hint.
+    triangle(ax, ay, az, bx, by, bz, cx, cy, cz, hx, hy, hz) {
+        const ux = bx - ax, uy = by - ay, uz = bz - az;
+        const vx = cx - ax, vy = cy - ay, vz = cz - az;
+        let nx = uy * vz - uz * vy;
+        let ny = uz * vx - ux * vz;
+        let nz = ux * vy - uy * vx;
+        const len = Math.sqrt(nx * nx + ny * ny + nz * nz);
+        if (len < 1e-12) return; // Degenerate
+
+        if (this.length + 9 > this.positions.length) this.grow();
+        const p = this.positions;
+        const n = this.normals;
+        let o = this.length;
+
+        if (nx * hx + ny * hy + nz * hz < 0) {
+            nx = -nx; ny = -ny; nz = -nz;
+            let tx = bx; bx = cx; cx = tx;
+            tx = by; by = cy; cy = tx;
+            tx = bz; bz = cz; cz = tx;
+        }
+        nx /= len; ny /= len; nz /= len;
+
+        p[o] = ax; p[o + 1] = ay; p[o + 2] = az;
+        p[o + 3] = bx; p[o + 4] = by; p[o + 5] = bz;
+        p[o + 6] = cx; p[o + 7] = cy; p[o + 8] = cz;
+        for (let k = 0; k < 3; k++, o += 3) {
+            n[o] = nx; n[o + 1] = ny; n[o + 2] = nz;
+        }
+        this.length = o;
+    }
+
+    grow() {
+        const positions = new Float32Array(this.positions.length * 2);
+        const normals = new Float32Array(this.normals.length * 2);
+        positions.set(this.positions);
+        normals.set(this.normals);
+        this.positions = positions;
+        this.normals = normals;
+    }
+
+    // Horizontal top quad at height y (corners in outline order)
+    top(ax, az, bx, bz, cx, cz, dx, dz, y) {
+        this.triangle(ax, y, az, bx, y, bz, cx, y, cz, 0, 1, 0);
+        this.triangle(ax, y, az, cx, y, cz, dx, y, dz, 0, 1, 0);
+    }
+
+    // Vertical quad over the 2D edge a -> b, facing away from (cx, cz)
+    side(ax, az, bx, bz, y0, y1, cx, cz) {
+        const hx = (ax + bx) / 2 - cx;
+        const hz = (az + bz) / 2 - cz;
+        this.triangle(ax, y0, az, bx, y0, bz, bx, y1, bz, hx, 0, hz);
+        this.triangle(ax, y0, az, bx, y1, bz, ax, y1, az, hx, 0, hz);
+    }
+
+    // Axis-aligned wall box; `faces` selects which vertical sides are emitted
+    box(x0, x1, z0, z1, y0, y1, faces) {
+        if (x1 - x0 < 1e-6 || z1 - z0 < 1e-6) return;
+        const cx = (x0 + x1) / 2;
+        const cz = (z0 + z1) / 2;
+        this.top(x0, z0, x1, z0, x1, z1, x0, z1, y1);
+        if (faces.minX) this.side(x0, z0, x0, z1, y0, y1, cx, cz);
+        if (faces.maxX) this.side(x1, z0, x1, z1, y0, y1, cx, cz);
+        if (faces.minZ) this.side(x0, z0, x1, z0, y0, y1, cx, cz);
+        if (faces.maxZ) this.side(x0, z1, x1, z1, y0, y1, cx, cz);
+    }
+
+    toGeometry() {
+        const geometry = new THREE.BufferGeometry();
+        geometry.setAttribute('position', new THREE.BufferAttribute(this.positions.slice(0, this.length), 3));
+        geometry.setAttribute('normal', new THREE.BufferAttribute(this.normals.slice(0, this.length), 3));
+        return geometry;
+    }
+}
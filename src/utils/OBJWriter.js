@@ -0,0 +1,47 @@
+// src/utils/OBJWriter.js
+import { transformPositions } from './STLWriter.js';
+
+// Wavefront OBJ from an indexed BufferGeometry. Vertices are shared between
+// faces, so welded solids come out far smaller than the equivalent STL.
+export function writeOBJ(geometry, name = 'tray') {
+    return writeOBJObjects([{ geometry, name }]);
+}
+
+// Several named objects in one file; entries are { geometry, name, matrix? }
+// (matrix as in writeBinarySTL). OBJ indices are global, so each object's
+// faces are offset by the vertices written before it.
+export function writeOBJObjects(entries) {
+    const lines = [];
+    let offset = 0;
+    entries.forEach(({ geometry, name, matrix }) => {
+        offset += appendObject(lines, geometry, name, matrix, offset);
+    });
+    lines.push('');
+    return lines.join('\n');
+}
+
+function appendObject(lines, geometry, name, matrix, offset) {
+    const source = geometry.getAttribute('position').array;
+    const pos = matrix ? transformPositions(source, matrix) : source;
+    const index = geometry.getIndex();
+    const vertexCount = pos.length / 3;
+    lines.push(`o ${name}`);
+
+    for (let v = 0; v < vertexCount; v++) {
+        lines.push(`v ${pos[v * 3].toFixed(4)} ${pos[v * 3 + 1].toFixed(4)} ${pos[v * 3 + 2].toFixed(4)}`);
+    }
+
+    // OBJ indices are 1-based
+    const base = offset + 1;
+    if (index) {
+        const idx = index.array;
+        for (let t = 0; t < idx.length; t += 3) {
+            lines.push(`f ${idx[t] + base} ${idx[t + 1] + base} ${idx[t + 2] + base}`);
+        }
+    } else {
+        for (let v = 0; v < vertexCount; v += 3) {
+            lines.push(`f ${v + base} ${v + base + 1} ${v + base + 2}`);
+        }
+    }
+    return vertexCount;
+}
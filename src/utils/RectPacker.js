@@ -0,0 +1,95 @@
+// src/utils/RectPacker.js
+
+// 2D rectangle packing with the MaxRects algorithm (best short side fit).
+// The free space is kept as a list of maximal free rectangles; each item goes
+// where it leaves the smallest leftover along its shorter side, optionally
+// turned by 90 degrees. Items are placed largest first, which packs trays of
+// mixed sizes tightly, and a dozen items pack in well under a millisecond.
+//
+// spacing is the gap kept between items (not at the bin edges). Coordinates
+// are bin-local: (x, y) is the item's corner nearest the bin origin.
+
+export function packRects(items, width, height, { spacing = 0, allowRotation = true } = {}) {
+    // Inflating items and bin by the spacing leaves exactly one gap between neighbours
+    let free = [{ x: 0, y: 0, w: width + spacing, h: height + spacing }];
+    const placed = [];
+    const unplaced = [];
+
+    const order = items
+        .map((item, k) => ({ ...item, k }))
+        .sort((a, b) => Math.max(b.w, b.h) - Math.max(a.w, a.h) || b.w * b.h - a.w * a.h || a.k - b.k);
+
+    for (const item of order) {
+        const best = findPosition(free, item.w + spacing, item.h + spacing, allowRotation && item.w !== item.h);
+        if (!best) {
+            unplaced.push(item.id);
+            continue;
+        }
+
+        const used = { x: best.x, y: best.y, w: best.w, h: best.h };
+        free = splitFree(free, used);
+        placed.push({
+            id: item.id,
+            x: best.x,
+            y: best.y,
+            w: best.w - spacing,
+            h: best.h - spacing,
+            rotated: best.rotated
+        });
+    }
+
+    return { placed, unplaced };
+}
+
+function findPosition(free, w, h, allowRotation) {
+    let best = null;
+    let bestShort = Infinity;
+    let bestLong = Infinity;
+
+    const consider = (rect, rw, rh, rotated) => {
+        if (rw > rect.w || rh > rect.h) return;
+        const dx = rect.w - rw;
+        const dy = rect.h - rh;
+        const short = Math.min(dx, dy);
+        const long = Math.max(dx, dy);
+        if (short < bestShort || (short === bestShort && long < bestLong)) {
+            bestShort = short;
+            bestLong = long;
+            best = { x: rect.x, y: rect.y, w: rw, h: rh, rotated };
+        }
+    };
+
+    for (const rect of free) {
+        consider(rect, w, h, false);
+        if (allowRotation) consider(rect, h, w, true);
+    }
+    return best;
+}
+
+// Free rectangles after placing `used`: every free rect it overlaps is replaced
+// by up to four maximal pieces around it, then rects inside others are dropped
+function splitFree(free, used) {
+    const next = [];
+    for (const rect of free) {
+        if (used.x >= rect.x + rect.w || used.x + used.w <= rect.x ||
+            used.y >= rect.y + rect.h || used.y + used.h <= rect.y) {
+            next.push(rect);
+            continue;
+        }
+        if (used.x > rect.x) next.push({ x: rect.x, y: rect.y, w: used.x - rect.x, h: rect.h });
+        if (used.x + used.w < rect.x + rect.w) {
+            next.push({ x: used.x + used.w, y: rect.y, w: rect.x + rect.w - used.x - used.w, h: rect.h });
+        }
+        if (used.y > rect.y) next.push({ x: rect.x, y: rect.y, w: rect.w, h: used.y - rect.y });
+        if (used.y + used.h < rect.y + rect.h) {
+            next.push({ x: rect.x, y: used.y + used.h, w: rect.w, h: rect.y + rect.h - used.y - used.h });
+        }
+    }
+
+    return next.filter((rect, i) => !next.some((other, j) => i !== j && contains(other, rect) && (!contains(rect, other) || j < i)));
+}
+
+function contains(outer, inner) {
+    return inner.x >= outer.x && inner.y >= outer.y &&
+        inner.x + inner.w <= outer.x + outer.w && inner.y + inner.h <= outer.y + outer.h;
+}
@@ -0,0 +1,175 @@
+// src/utils/RoomTopology.js
+
+// Persistent room index over the divider cell grid.
+// Cells are addressed by integer index c = i * nz + j (i along X, j along Z)
+// and grouped into rooms with union-find. Walls are tracked as flat flag arrays:
+//   xHidden[k * nz + j] - X divider line k (sorted order), segment j
+//   zHidden[k * nx + i] - Z divider line k (sorted order), segment i
+// Hiding walls only ever merges rooms, so it is applied incrementally;
+// restoring a wall or changing the grid size triggers a full rebuild.
+export class RoomTopology {
+    constructor() {
+        this.nx = 0;
+        this.nz = 0;
+        this.parent = null;
+        this.xHidden = null;
+        this.zHidden = null;
+        this.xs = null;
+        this.zs = null;
+        this.rooms = [];
+        this.roomOf = null; // cell index -> room id
+    }
+
+    find(c) {
+        const parent = this.parent;
+        while (parent[c] !== c) {
+            parent[c] = parent[parent[c]]; // Path halving
+            c = parent[c];
+        }
+        return c;
+    }
+
+    union(a, b) {
+        const ra = this.find(a);
+        const rb = this.find(b);
+        if (ra === rb) return false;
+        // Keep the smaller index as root so room ids stay canonical
+        if (ra < rb) this.parent[rb] = ra;
+        else this.parent[ra] = rb;
+        return true;
+    }
+
+    // Hidden-flag arrays for the current divider layout. WallState rows are
+    // already in sorted line order, so this is a straight bit expansion.
+    static readWalls(walls) {
+        return walls.toFlags();
+    }
+
+    // Sync with a layout. Returns { rooms, changedRooms, topologyChanged }, where
+    // changedRooms is the set of room ids whose cells or coordinates differ from
+    // the previous update.
+    update(sortedX, sortedZ, walls) {
+        const nx = sortedX.length - 1;
+        const nz = sortedZ.length - 1;
+        const { xHidden, zHidden } = RoomTopology.readWalls(walls);
+
+        let fullRebuild = !this.parent || nx !== this.nx || nz !== this.nz;
+        const merges = [];
+
+        if (!fullRebuild) {
+            for (let k = 0; k < xHidden.length && !fullRebuild; k++) {
+                if (xHidden[k] === this.xHidden[k]) continue;
+                if (!xHidden[k]) fullRebuild = true; // Wall restored: rooms split
+                else merges.push(k, 'x');
+            }
+            for (let k = 0; k < zHidden.length && !fullRebuild; k++) {
+                if (zHidden[k] === this.zHidden[k]) continue;
+                if (!zHidden[k]) fullRebuild = true;
+                else merges.push(k, 'z');
+            }
+        }
+
+        const prevRooms = this.rooms;
+        const prevXs = this.xs;
+        const prevZs = this.zs;
+
+        this.nx = nx;
+        this.nz = nz;
+        this.xHidden = xHidden;
+        this.zHidden = zHidden;
+        this.xs = sortedX.slice();
+        this.zs = sortedZ.slice();
+
+        let topologyChanged = fullRebuild;
+        if (fullRebuild) {
+            this.rebuild();
+        } else {
+            for (let m = 0; m < merges.length; m += 2) {
+                if (this.applyHiddenWall(merges[m], merges[m + 1])) topologyChanged = true;
+            }
+        }
+
+        if (topologyChanged) this.collectRooms();
+
+        const changedRooms = new Set();
+        if (fullRebuild || !prevXs) {
+            this.rooms.forEach(room => changedRooms.add(room.id));
+        } else {
+            const prevById = new Map();
+            prevRooms.forEach(room => prevById.set(room.id, room));
+
+            this.rooms.forEach(room => {
+                const prev = prevById.get(room.id);
+                if (!prev || prev.cells.length !== room.cells.length) {
+                    changedRooms.add(room.id);
+                    return;
+                }
+                // Same cells: changed only if one of its grid lines moved
+                const { minI, maxI, minJ, maxJ } = room.bounds;
+                for (let i = minI; i <= maxI + 1; i++) {
+                    if (prevXs[i] !== sortedX[i]) { changedRooms.add(room.id); return; }
+                }
+                for (let j = minJ; j <= maxJ + 1; j++) {
+                    if (prevZs[j] !== sortedZ[j]) { changedRooms.add(room.id); return; }
+                }
+            });
+        }
+
+        return { rooms: this.rooms, changedRooms, topologyChanged };
+    }
+
+    rebuild() {
+        const { nx, nz } = this;
+        const count = nx * nz;
+        this.parent = new Int32Array(count);
+        for (let c = 0; c < count; c++) this.parent[c] = c;
+
+        for (let k = 0; k < this.xHidden.length; k++) {
+            if (this.xHidden[k]) this.applyHiddenWall(k, 'x');
+        }
+        for (let k = 0; k < this.zHidden.length; k++) {
+            if (this.zHidden[k]) this.applyHiddenWall(k, 'z');
+        }
+    }
+
+    // Merge the two cells on either side of a hidden wall segment
+    applyHiddenWall(k, axis) {
+        const { nx, nz } = this;
+        if (axis === 'x') {
+            const line = Math.floor(k / nz);
+            const j = k % nz;
+            return this.union(line * nz + j, (line + 1) * nz + j);
+        }
+        const line = Math.floor(k / nx);
+        const i = k % nx;
+        return this.union(i * nz + line, i * nz + line + 1);
+    }
+
+    collectRooms() {
+        const { nx, nz } = this;
+        const byRoot = new Map();
+        this.roomOf = new Int32Array(nx * nz);
+
+        // Iterating i-major visits each room's smallest cell first, matching the root choice
+        for (let i = 0; i < nx; i++) {
+            for (let j = 0; j < nz; j++) {
+                const c = i * nz + j;
+                const root = this.find(c);
+                this.roomOf[c] = root;
+
+                let room = byRoot.get(root);
+                if (!room) {
+                    room = { id: root, cells: [], bounds: { minI: i, maxI: i, minJ: j, maxJ: j } };
+                    byRoot.set(root, room);
+                }
+                room.cells.push({ i, j });
+                const b = room.bounds;
+                if (i > b.maxI) b.maxI = i;
+                if (j < b.minJ) b.minJ = j;
+                if (j > b.maxJ) b.maxJ = j;
+            }
+        }
+
+        this.rooms = [...byRoot.values()];
+    }
+}
@@ -0,0 +1,94 @@
+// src/utils/STLWriter.js
+
+// Binary STL straight from BufferGeometry attributes.
+// Layout: 80-byte header, uint32 triangle count, then 50 bytes per triangle
+// (normal, three vertices as float32 xyz, uint16 attribute count), little-endian.
+// The output size is known up front, so everything is written into one
+// preallocated ArrayBuffer without per-triangle allocation.
+// An entry may also be { geometry, matrix } (column-major 4x4, e.g.
+// Matrix4.elements): the same buffers are then written once per placement,
+// transformed on the fly, which is how a build plate shares tray geometry.
+
+const HEADER_BYTES = 80;
+const TRIANGLE_BYTES = 50;
+
+const unwrap = (entry) => (entry.geometry ? entry : { geometry: entry, matrix: null });
+
+function triangleCount(geometry) {
+    const index = geometry.getIndex();
+    return (index ? index.count : geometry.getAttribute('position').count) / 3;
+}
+
+export function getBinarySTLSize(geometries) {
+    let triangles = 0;
+    for (let g = 0; g < geometries.length; g++) triangles += triangleCount(unwrap(geometries[g]).geometry);
+    return HEADER_BYTES + 4 + triangles * TRIANGLE_BYTES;
+}
+
+// Plain geometries are written as-is: positions must already be in output space.
+export function writeBinarySTL(geometries) {
+    const size = getBinarySTLSize(geometries);
+    const buffer = new ArrayBuffer(size);
+    const view = new DataView(buffer);
+
+    const header = 'Binary STL';
+    for (let k = 0; k < header.length; k++) view.setUint8(k, header.charCodeAt(k));
+    view.setUint32(HEADER_BYTES, (size - HEADER_BYTES - 4) / TRIANGLE_BYTES, true);
+
+    let offset = HEADER_BYTES + 4;
+    for (let g = 0; g < geometries.length; g++) {
+        const { geometry, matrix } = unwrap(geometries[g]);
+        const pos = matrix ? transformPositions(geometry.getAttribute('position').array, matrix) : geometry.getAttribute('position').array;
+        const index = geometry.getIndex();
+        const idx = index ? index.array : null;
+        const count = triangleCount(geometry);
+
+        for (let t = 0; t < count; t++) {
+            const a = (idx ? idx[t * 3] : t * 3) * 3;
+            const b = (idx ? idx[t * 3 + 1] : t * 3 + 1) * 3;
+            const c = (idx ? idx[t * 3 + 2] : t * 3 + 2) * 3;
+
+            const ax = pos[a], ay = pos[a + 1], az = pos[a + 2];
+            const bx = pos[b], by = pos[b + 1], bz = pos[b + 2];
+            const cx = pos[c], cy = pos[c + 1], cz = pos[c + 2];
+
+            // Face normal from the winding, as STL readers expect
+            const ux = bx - ax, uy = by - ay, uz = bz - az;
+            const vx = cx - ax, vy = cy - ay, vz = cz - az;
+            let nx = uy * vz - uz * vy;
+            let ny = uz * vx - ux * vz;
+            let nz = ux * vy - uy * vx;
+            const len = Math.sqrt(nx * nx + ny * ny + nz * nz);
+            if (len > 0) { nx /= len; ny /= len; nz /= len; }
+
+            view.setFloat32(offset, nx, true);
+            view.setFloat32(offset + 4, ny, true);
+            view.setFloat32(offset + 8, nz, true);
+            view.setFloat32(offset + 12, ax, true);
+            view.setFloat32(offset + 16, ay, true);
+            view.setFloat32(offset + 20, az, true);
+            view.setFloat32(offset + 24, bx, true);
+            view.setFloat32(offset + 28, by, true);
+            view.setFloat32(offset + 32, bz, true);
+            view.setFloat32(offset + 36, cx, true);
+            view.setFloat32(offset + 40, cy, true);
+            view.setFloat32(offset + 44, cz, true);
+            view.setUint16(offset + 48, 0, true);
+            offset += TRIANGLE_BYTES;
+        }
+    }
+
+    return buffer;
+}
+
+// Affine transform of a packed xyz array into a new Float32Array
+export function transformPositions(pos, m) {
+    const out = new Float32Array(pos.length);
+    for (let k = 0; k < pos.length; k += 3) {
+        const x = pos[k], y = pos[k + 1], z = pos[k + 2];
+        out[k] = m[0] * x + m[4] * y + m[8] * z + m[12];
+        out[k + 1] = m[1] * x + m[5] * y + m[9] * z + m[13];
+        out[k + 2] = m[2] * x + m[6] * y + m[10] * z + m[14];
+    }
+    return out;
+}
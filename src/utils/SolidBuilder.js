@@ -0,0 +1,105 @@
+// src/utils/SolidBuilder.js
+import { buildTrayShape } from './GeometryFactory.js';
+import { MeshWriter } from './MeshWriter.js';
+import { weldTriangles, analyzeMesh } from './MeshWelder.js';
+
+// One closed body for printing, instead of the overlapping wall and base meshes
+// used on screen. Every surface is built from the same outline points:
+//   - bottom: the outer outline at tray bottom
+//   - outer side: the outer outline from bottom to wall top
+//   - top: the outer outline with room holes at wall top
+//   - each room: side walls from its floor to wall top, and a floor cap
+// Shared outlines mean shared edges, so after welding every edge has exactly two faces.
+
+const EPS = 1e-6;
+
+// Outline points with duplicates and collinear points removed. The cap
+// triangulation drops collinear points too, and every surface has to use the
+// same vertices or the caps and bands would meet in T-junctions.
+function cleanOutline(points) {
+    let out = points.slice();
+    let changed = true;
+    while (changed && out.length >= 3) {
+        changed = false;
+        const kept = [];
+        for (let k = 0; k < out.length; k++) {
+            const prev = kept.length ? kept[kept.length - 1] : out[out.length - 1];
+            const p = out[k];
+            const next = out[(k + 1) % out.length];
+            const cross = (p.x - prev.x) * (next.y - p.y) - (p.y - prev.y) * (next.x - p.x);
+            const dup = Math.abs(p.x - prev.x) < EPS && Math.abs(p.y - prev.y) < EPS;
+            if (dup || Math.abs(cross) < EPS) {
+                changed = true;
+                continue;
+            }
+            kept.push(p);
+        }
+        out = kept;
+    }
+    return out;
+}
+
+function signedArea(points) {
+    let area = 0;
+    for (let k = 0; k < points.length; k++) {
+        const p = points[k];
+        const q = points[(k + 1) % points.length];
+        area += p.x * q.y - q.x * p.y;
+    }
+    return area / 2;
+}
+
+// Horizontal cap at height y over a triangulation of outline (+ holes)
+function addCap(writer, outline, holes, y, up) {
+    const vertices = holes.length ? outline.concat(...holes) : outline;
+    const faces = THREE.ShapeUtils.triangulateShape(outline, holes);
+    const hy = up ? 1 : -1;
+    for (let f = 0; f < faces.length; f++) {
+        const a = vertices[faces[f][0]], b = vertices[faces[f][1]], c = vertices[faces[f][2]];
+        writer.triangle(a.x, y, a.y, b.x, y, b.y, c.x, y, c.y, 0, hy, 0);
+    }
+}
+
+// Vertical band along a closed outline. `outward` selects whether faces point
+// away from the enclosed area (outer wall) or into it (room walls).
+function addBand(writer, outline, y0, y1, outward) {
+    // For a positive shoelace area the outline runs counter-clockwise in (x, z),
+    // so (dz, -dx) points away from the enclosed area
+    const sign = (signedArea(outline) > 0 ? 1 : -1) * (outward ? 1 : -1);
+    for (let k = 0; k < outline.length; k++) {
+        const p = outline[k];
+        const q = outline[(k + 1) % outline.length];
+        const hx = (q.y - p.y) * sign;
+        const hz = -(q.x - p.x) * sign;
+        writer.triangle(p.x, y0, p.y, q.x, y0, q.y, q.x, y1, q.y, hx, 0, hz);
+        writer.triangle(p.x, y0, p.y, q.x, y1, q.y, p.x, y1, p.y, hx, 0, hz);
+    }
+}
+
+// Welded, indexed single-body BufferGeometry plus its validation report
+export function buildTraySolid(design, tolerance = 1e-4) {
+    const { shape, bottom, floor, top } = buildTrayShape(design);
+    const { shape: outerPoints, holes: holePoints } = shape.extractPoints(1);
+    const outer = cleanOutline(outerPoints);
+    const holes = holePoints.map(cleanOutline).filter(hole => hole.length >= 3);
+
+    const writer = new MeshWriter();
+    addCap(writer, outer, [], bottom, false);
+    addBand(writer, outer, bottom, top, true);
+    addCap(writer, outer, holes, top, true);
+    holes.forEach(hole => {
+        addBand(writer, hole, floor, top, false);
+        addCap(writer, hole, [], floor, true);
+    });
+
+    const welded = weldTriangles(writer.positions.subarray(0, writer.length), tolerance);
+
+    const geometry = new THREE.BufferGeometry();
+    geometry.setAttribute('position', new THREE.BufferAttribute(welded.position, 3));
+    geometry.setIndex(new THREE.BufferAttribute(welded.index, 1));
+
+    const report = analyzeMesh(welded.position, welded.index);
+    report.welded = welded.stats;
+
+    return { geometry, report };
+}
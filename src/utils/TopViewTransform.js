@@ -0,0 +1,56 @@
+// src/utils/TopViewTransform.js
+
+// World (x, z) <-> client pixel mapping of the orthographic top view.
+// The view is centred on the origin, world +z points down the screen and
+// frustumSize world units span the viewport height. SceneManager owns the one
+// instance; the top camera, pointer picking, labels, divider previews and the
+// 2D top-view backend all read it, so they can never disagree on the zoom.
+export class TopViewTransform {
+    constructor(frustumSize = 250) {
+        this.frustumSize = frustumSize;
+    }
+
+    // Pixels per world unit (mm) in a viewport rect
+    scale(rect) {
+        return rect.height / this.frustumSize;
+    }
+
+    // Client pixels -> world, with whether the point lies inside the viewport
+    toWorld(clientX, clientY, rect) {
+        const x = clientX - rect.left;
+        const y = clientY - rect.top;
+        const s = this.scale(rect);
+
+        return {
+            x: (x - rect.width / 2) / s,
+            z: (y - rect.height / 2) / s,
+            isInside: x >= 0 && x <= rect.width && y >= 0 && y <= rect.height
+        };
+    }
+
+    // World -> client pixels
+    toScreen(worldX, worldZ, rect) {
+        const s = this.scale(rect);
+        return {
+            x: rect.left + rect.width / 2 + worldX * s,
+            y: rect.top + rect.height / 2 + worldZ * s
+        };
+    }
+
+    // Viewport-local affine [a, b, c, d, e, f] for CanvasRenderingContext2D.setTransform,
+    // drawing in world units (shape y = world z)
+    matrix(rect, pixelRatio = 1) {
+        const s = this.scale(rect) * pixelRatio;
+        return [s, 0, 0, s, rect.width / 2 * pixelRatio, rect.height / 2 * pixelRatio];
+    }
+
+    // Orthographic camera bounds for a viewport of this aspect
+    applyToCamera(camera, rect) {
+        const aspect = rect.width / rect.height;
+        camera.left = this.frustumSize * aspect / -2;
+        camera.right = this.frustumSize * aspect / 2;
+        camera.top = this.frustumSize / 2;
+        camera.bottom = this.frustumSize / -2;
+        camera.updateProjectionMatrix();
+    }
+}
@@ -0,0 +1,208 @@
+// src/utils/WallBuilder.js
+import { MeshWriter } from './MeshWriter.js';
+
+// Triangulation-free wall construction. Instead of cutting every room out of one
+// shape (earcut bridging cost grows quickly with the hole count), walls are emitted
+// straight from the divider grid:
+//   - the perimeter as a ring between the outer and inner rounded rectangles
+//   - X divider lines as runs of consecutive visible segments (runs own the junctions)
+//   - Z divider segments between the X runs, merged through junctions without X walls
+//   - a fillet patch in every room corner, and a rounded cap on every free wall end
+// Work is linear in the number of grid segments. The output is a render mesh:
+// prisms touch but are not welded, and faces that are always hidden (wall bottoms on
+// the base, ends butting into another wall) are not emitted.
+
+const FILLET_RADIUS = 4; // Matches the inner corner radius of traced room holes
+
+// Quadratic corner start -> (control) -> end sampled like GeometryFactory's addCorner
+function cornerPoints(out, sx, sz, cx, cz, ex, ez, segments) {
+    for (let k = 1; k <= segments; k++) {
+        const t = k / segments;
+        const u = 1 - t;
+        out.push(u * u * sx + 2 * u * t * cx + t * t * ex, u * u * sz + 2 * u * t * cz + t * t * ez);
+    }
+}
+
+// Rounded rectangle outline as a flat [x0, z0, x1, z1, ...] array, same vertex order
+// as createRoundedRectShape. Two outlines with equal segment counts zip vertex by vertex.
+function roundedRectOutline(w, d, r, segments) {
+    const x = -w / 2;
+    const z = -d / 2;
+    const pts = [x + r, z, x + w - r, z];
+    cornerPoints(pts, x + w - r, z, x + w, z, x + w, z + r, segments);
+    pts.push(x + w, z + d - r);
+    cornerPoints(pts, x + w, z + d - r, x + w, z + d, x + w - r, z + d, segments);
+    pts.push(x + r, z + d);
+    cornerPoints(pts, x + r, z + d, x, z + d, x, z + d - r, segments);
+    pts.push(x, z + r);
+    cornerPoints(pts, x, z + r, x, z, x + r, z, segments);
+    pts.length -= 2; // Last corner ends on the start point
+    return pts;
+}
+
+// Concave wall corner at (px, pz): fills the area between the two wall faces
+// (running along (ax, az) and (bx, bz) from the corner) and the rounded room corner.
+function filletPatch(writer, px, pz, ax, az, bx, bz, r, y0, y1, segments) {
+    const sx = px + ax * r, sz = pz + az * r;
+    const ex = px + bx * r, ez = pz + bz * r;
+    let x0 = sx, z0 = sz;
+    for (let k = 1; k <= segments; k++) {
+        const t = k / segments;
+        const u = 1 - t;
+        const x1 = u * u * sx + 2 * u * t * px + t * t * ex;
+        const z1 = u * u * sz + 2 * u * t * pz + t * t * ez;
+        writer.triangle(px, y1, pz, x0, y1, z0, x1, y1, z1, 0, 1, 0);
+        writer.side(x0, z0, x1, z1, y0, y1, px, pz);
+        x0 = x1;
+        z0 = z1;
+    }
+}
+
+// Rounded end of a wall that stops in the middle of a room.
+// (cx, cz) is the centre of the wall end, (dx, dz) points out of the wall.
+function endCap(writer, cx, cz, dx, dz, halfThick, y0, y1, segments) {
+    const n = segments * 2;
+    let prevX = cx - dz * halfThick;
+    let prevZ = cz + dx * halfThick;
+    for (let k = 1; k <= n; k++) {
+        const a = Math.PI * k / n;
+        const c = Math.cos(a);
+        const s = Math.sin(a);
+        // Rotate the side offset (-dz, dx) towards the end direction
+        const x = cx + (-dz * c + dx * s) * halfThick;
+        const z = cz + (dx * c + dz * s) * halfThick;
+        writer.triangle(cx, y1, cz, prevX, y1, prevZ, x, y1, z, 0, 1, 0);
+        writer.side(prevX, prevZ, x, z, y0, y1, cx, cz);
+        prevX = x;
+        prevZ = z;
+    }
+}
+
+// Wall BufferGeometry in the same frame as the extruded shape (y from -h/2 to h/2).
+// xHidden / zHidden are RoomTopology.readWalls flag arrays for sortedX / sortedZ.
+export function buildSegmentWalls({ l, h, w, wallThickness, outerR, sortedX, sortedZ, xHidden, zHidden, cornerSegments }) {
+    const writer = new MeshWriter();
+    const t = wallThickness;
+    const half = t / 2;
+    const y0 = -h / 2;
+    const y1 = h / 2;
+    const nx = sortedX.length - 1;
+    const nz = sortedZ.length - 1;
+
+    const xVisible = (k, j) => !xHidden[k * nz + j];
+    const zVisible = (k, i) => !zHidden[k * nx + i];
+    // Junction of X line k and Z line m
+    const hasXWall = (k, m) => xVisible(k, m) || xVisible(k, m + 1);
+    const hasZWall = (k, m) => zVisible(m, k) || zVisible(m, k + 1);
+
+    // Inset extents of cell (i, j): walls take t/2 per side, the perimeter takes t
+    const cellX0 = (i) => sortedX[i] + (i === 0 ? t : half);
+    const cellX1 = (i) => sortedX[i + 1] - (i === nx - 1 ? t : half);
+    const cellZ0 = (j) => sortedZ[j] + (j === 0 ? t : half);
+    const cellZ1 = (j) => sortedZ[j + 1] - (j === nz - 1 ? t : half);
+
+    // 1. Perimeter ring
+    let innerR = Math.max(outerR - t, 0.1);
+    [[0, 0], [nx - 1, 0], [0, nz - 1], [nx - 1, nz - 1]].forEach(([i, j]) => {
+        innerR = Math.min(innerR, (cellX1(i) - cellX0(i)) / 2, (cellZ1(j) - cellZ0(j)) / 2);
+    });
+    innerR = Math.max(innerR, 0);
+    const ringSegments = cornerSegments(outerR);
+    const outer = roundedRectOutline(l, w, outerR, ringSegments);
+    const inner = roundedRectOutline(l - 2 * t, w - 2 * t, innerR, ringSegments);
+    for (let k = 0; k < outer.length; k += 2) {
+        const n = (k + 2) % outer.length;
+        const ox0 = outer[k], oz0 = outer[k + 1], ox1 = outer[n], oz1 = outer[n + 1];
+        const ix0 = inner[k], iz0 = inner[k + 1], ix1 = inner[n], iz1 = inner[n + 1];
+        writer.top(ox0, oz0, ox1, oz1, ix1, iz1, ix0, iz0, y1);
+        writer.side(ox0, oz0, ox1, oz1, y0, y1, 0, 0);
+        // Inner side faces the tray centre: mirror the reference point through the edge
+        const mx = (ix0 + ix1) / 2, mz = (iz0 + iz1) / 2;
+        writer.side(ix0, iz0, ix1, iz1, y0, y1, 2 * mx, 2 * mz);
+    }
+
+    const capSegments = cornerSegments(half);
+
+    // 2. X divider runs. A run covers the junction square at a connected end,
+    // so Z walls always stop flush against an X wall face.
+    for (let k = 0; k < nx - 1; k++) {
+        const x = sortedX[k + 1];
+        let j = 0;
+        while (j < nz) {
+            if (!xVisible(k, j)) { j++; continue; }
+            const j0 = j;
+            while (j + 1 < nz && xVisible(k, j + 1)) j++;
+            const j1 = j;
+            j++;
+
+            let z0, z1;
+            let capStart = false, capEnd = false;
+            if (j0 === 0) z0 = -w / 2 + t;
+            else if (hasZWall(k, j0 - 1)) z0 = sortedZ[j0] - half;
+            else { z0 = sortedZ[j0] + half; capStart = true; }
+
+            if (j1 === nz - 1) z1 = w / 2 - t;
+            else if (hasZWall(k, j1)) z1 = sortedZ[j1 + 1] + half;
+            else { z1 = sortedZ[j1 + 1] - half; capEnd = true; }
+
+            writer.box(x - half, x + half, z0, z1, y0, y1, {
+                minX: true, maxX: true,
+                minZ: j0 > 0 && !capStart,
+                maxZ: j1 < nz - 1 && !capEnd
+            });
+            if (capStart) endCap(writer, x, z0, 0, -1, half, y0, y1, capSegments);
+            if (capEnd) endCap(writer, x, z1, 0, 1, half, y0, y1, capSegments);
+        }
+    }
+
+    // 3. Z divider runs, broken wherever an X wall crosses
+    for (let m = 0; m < nz - 1; m++) {
+        const z = sortedZ[m + 1];
+        let i = 0;
+        while (i < nx) {
+            if (!zVisible(m, i)) { i++; continue; }
+            const i0 = i;
+            while (i + 1 < nx && zVisible(m, i + 1) && !hasXWall(i, m)) i++;
+            const i1 = i;
+            i++;
+
+            // Ends stop flush against an X wall face, or get a cap if nothing is there
+            const x0 = i0 === 0 ? -l / 2 + t : sortedX[i0] + half;
+            const x1 = i1 === nx - 1 ? l / 2 - t : sortedX[i1 + 1] - half;
+            const capStart = i0 > 0 && !hasXWall(i0 - 1, m);
+            const capEnd = i1 < nx - 1 && !hasXWall(i1, m);
+
+            writer.box(x0, x1, z - half, z + half, y0, y1, { minZ: true, maxZ: true });
+            if (capStart) endCap(writer, x0, z, -1, 0, half, y0, y1, capSegments);
+            if (capEnd) endCap(writer, x1, z, 1, 0, half, y0, y1, capSegments);
+        }
+    }
+
+    // 4. Fillet patches in every cell corner bounded by two walls (tray corners are
+    // rounded by the perimeter ring)
+    for (let i = 0; i < nx; i++) {
+        const x0 = cellX0(i), x1 = cellX1(i);
+        if (x1 - x0 <= 0) continue;
+        for (let j = 0; j < nz; j++) {
+            const z0 = cellZ0(j), z1 = cellZ1(j);
+            if (z1 - z0 <= 0) continue;
+
+            const wallLeft = i === 0 || xVisible(i - 1, j);
+            const wallRight = i === nx - 1 || xVisible(i, j);
+            const wallTop = j === 0 || zVisible(j - 1, i);
+            const wallBottom = j === nz - 1 || zVisible(j, i);
+            const r = Math.min(FILLET_RADIUS, (x1 - x0) / 2, (z1 - z0) / 2);
+            const segments = cornerSegments(r);
+
+            const onEdgeX0 = i === 0, onEdgeX1 = i === nx - 1;
+            const onEdgeZ0 = j === 0, onEdgeZ1 = j === nz - 1;
+
+            if (wallLeft && wallTop && !(onEdgeX0 && onEdgeZ0)) filletPatch(writer, x0, z0, 1, 0, 0, 1, r, y0, y1, segments);
+            if (wallRight && wallTop && !(onEdgeX1 && onEdgeZ0)) filletPatch(writer, x1, z0, -1, 0, 0, 1, r, y0, y1, segments);
+            if (wallRight && wallBottom && !(onEdgeX1 && onEdgeZ1)) filletPatch(writer, x1, z1, -1, 0, 0, -1, r, y0, y1, segments);
+            if (wallLeft && wallBottom && !(onEdgeX0 && onEdgeZ1)) filletPatch(writer, x0, z1, 1, 0, 0, -1, r, y0, y1, segments);
+        }
+    }
+
+    return writer.toGeometry();
+}
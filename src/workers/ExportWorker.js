@@ -0,0 +1,20 @@
+// src/workers/ExportWorker.js
+// Module worker that turns a design description into an export file (STL/OBJ).
+import * as THREE from 'https://cdn.jsdelivr.net/npm/three@0.128.0/build/three.module.js';
+import { buildExportFile } from '../utils/ExportBuilder.js';
+
+// The builders expect the same global namespace the page gets from three.min.js
+self.THREE = THREE;
+
+self.onmessage = (e) => {
+    const { id, design, format } = e.data;
+
+    try {
+        const t0 = performance.now();
+        const { data, triangles, report } = buildExportFile(design, format, (stage) => self.postMessage({ id, stage }));
+        const ms = performance.now() - t0;
+        self.postMessage({ id, data, triangles, report, ms }, typeof data === 'string' ? [] : [data]);
+    } catch (err) {
+        self.postMessage({ id, error: err.message });
+    }
+};
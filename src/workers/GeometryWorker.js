@@ -0,0 +1,34 @@
+// src/workers/GeometryWorker.js
+// Module worker that turns a plain design description into geometry buffers.
+import * as THREE from 'https://cdn.jsdelivr.net/npm/three@0.128.0/build/three.module.js';
+import { buildTrayGeometry, serializeGeometry, getTransferables, getShapeCacheStats } from '../utils/GeometryFactory.js';
+import { measureMaterial } from '../utils/MaterialEstimator.js';
+import { perf } from '../core/Perf.js';
+
+// GeometryFactory expects the same global namespace the page gets from three.min.js
+self.THREE = THREE;
+
+self.onmessage = (e) => {
+    const { id, design, profile } = e.data;
+    // Spans are recorded only when the page has instrumentation on
+    perf.enabled = Boolean(profile);
+
+    try {
+        const t0 = perf.enabled ? perf.now() : 0;
+        const { wall, base } = buildTrayGeometry(design);
+        const buffers = { wall: serializeGeometry(wall), base: serializeGeometry(base) };
+        wall.dispose();
+        base.dispose();
+        // Priced on the main thread from this, without touching the outlines there
+        buffers.material = measureMaterial(buffers, design);
+
+        const stats = { shapeCache: getShapeCacheStats() };
+        if (perf.enabled) {
+            perf.measure('geometry:build', t0);
+            stats.spans = perf.drain();
+        }
+        self.postMessage({ id, buffers, stats }, getTransferables(buffers));
+    } catch (err) {
+        self.postMessage({ id, error: err.message });
+    }
+};
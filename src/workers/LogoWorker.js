@@ -0,0 +1,26 @@
+// src/workers/LogoWorker.js
+// Module worker that decodes an uploaded image and reduces it to a packed logo mask.
+import { LOGO_SIZE, hashBlob, rasterizeLogo, packMask } from '../utils/ImageProcessor.js';
+
+const canvas = new OffscreenCanvas(LOGO_SIZE, LOGO_SIZE);
+
+self.onmessage = async (e) => {
+    const { id, source, known } = e.data;
+
+    try {
+        // The page already holds masks for these hashes: skip decoding
+        const hash = await hashBlob(source);
+        if (known.includes(hash)) {
+            self.postMessage({ id, hash });
+            return;
+        }
+
+        const bitmap = await createImageBitmap(source);
+        const mask = packMask(rasterizeLogo(bitmap, canvas));
+        bitmap.close();
+
+        self.postMessage({ id, hash, mask }, [mask.buffer]);
+    } catch (err) {
+        self.postMessage({ id, error: err.message });
+    }
+};
@@ -0,0 +1,137 @@
+// sw.js
+// Offline app shell for kiosk deployments on flaky connections.
+// - The shell (page, modules, workers) is precached on install and served
+//   stale-while-revalidate: cached copy first, refreshed in the background.
+// - Versioned CDN assets (three r128, pinned lucide) are immutable: cache first.
+// - The Tailwind JIT has no pinned build, so it is stale-while-revalidate as well.
+// Bump CACHE_VERSION when the shell list changes.
+
+const CACHE_VERSION = 'v3';
+const SHELL_CACHE = `tray-shell-${CACHE_VERSION}`;
+const CDN_CACHE = `tray-cdn-${CACHE_VERSION}`;
+
+const APP_SHELL = [
+    './',
+    './index.html',
+    './src/main.js',
+    './src/core/Design.js',
+    './src/core/EventBus.js',
+    './src/core/OrderNaming.js',
+    './src/core/Perf.js',
+    './src/core/Plate.js',
+    './src/core/Store.js',
+    './src/core/WallState.js',
+    './src/features/DimensionControl.js',
+    './src/features/DividerSystem.js',
+    './src/features/EditSystem.js',
+    './src/features/ExportSystem.js',
+    './src/features/InputSystem.js',
+    './src/features/LabelSystem.js',
+    './src/features/LogoSystem.js',
+    './src/features/PlateSystem.js',
+    './src/features/TutorialSystem.js',
+    './src/systems/ExportPool.js',
+    './src/systems/GeometryCache.js',
+    './src/systems/GeometryEngine.js',
+    './src/systems/LogoEngine.js',
+    './src/systems/OrderIntake.js',
+    './src/systems/OverlayLayer.js',
+    './src/systems/PlateView.js',
+    './src/systems/QualityGovernor.js',
+    './src/systems/ResourceManager.js',
+    './src/systems/SceneManager.js',
+    './src/systems/TopViewCanvas.js',
+    './src/utils/ExportBuilder.js',
+    './src/utils/GeometryFactory.js',
+    './src/utils/ImageProcessor.js',
+    './src/utils/LRUCache.js',
+    './src/utils/MaterialEstimator.js',
+    './src/utils/MeshWelder.js',
+    './src/utils/MeshWriter.js',
+    './src/utils/OBJWriter.js',
+    './src/utils/RectPacker.js',
+    './src/utils/RoomTopology.js',
+    './src/utils/STLWriter.js',
+    './src/utils/SolidBuilder.js',
+    './src/utils/TopViewTransform.js',
+    './src/utils/WallBuilder.js',
+    './src/workers/ExportWorker.js',
+    './src/workers/GeometryWorker.js',
+    './src/workers/LogoWorker.js'
+];
+
+// Pinned, immutable third-party assets
+const CDN_ASSETS = [
+    'https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js',
+    'https://cdn.jsdelivr.net/npm/three@0.128.0/build/three.module.js',
+    'https://unpkg.com/lucide@0.344.0'
+];
+const CDN_HOSTS = ['cdnjs.cloudflare.com', 'cdn.jsdelivr.net', 'unpkg.com', 'cdn.tailwindcss.com'];
+
+self.addEventListener('install', (event) => {
+    event.waitUntil((async () => {
+        const shell = await caches.open(SHELL_CACHE);
+        await shell.addAll(APP_SHELL);
+
+        // Script tags load these without CORS, so store them the same way (opaque).
+        // A CDN outage must not fail the install; they are cached on first use instead.
+        const cdn = await caches.open(CDN_CACHE);
+        await Promise.all(CDN_ASSETS.map(url =>
+            fetch(url, { mode: 'no-cors' })
+                .then(response => cdn.put(url, response))
+                .catch(() => {})
+        ));
+
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil((async () => {
+        const keep = [SHELL_CACHE, CDN_CACHE];
+        const names = await caches.keys();
+        await Promise.all(names.filter(name => !keep.includes(name)).map(name => caches.delete(name)));
+        await self.clients.claim();
+    })());
+});
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+
+    const url = new URL(request.url);
+    if (url.origin === self.location.origin) {
+        event.respondWith(staleWhileRevalidate(request, SHELL_CACHE, event));
+    } else if (CDN_HOSTS.includes(url.hostname)) {
+        const immutable = CDN_ASSETS.includes(request.url);
+        event.respondWith(immutable ? cacheFirst(request, CDN_CACHE) : staleWhileRevalidate(request, CDN_CACHE, event));
+    }
+});
+
+async function cacheFirst(request, cacheName) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request);
+    if (cached) return cached;
+
+    const response = await fetch(request);
+    if (response.ok || response.type === 'opaque') cache.put(request, response.clone());
+    return response;
+}
+
+async function staleWhileRevalidate(request, cacheName, event) {
+    const cache = await caches.open(cacheName);
+    // Query strings (?perf, ?topView=2d) select modes, not different files
+    const cached = await cache.match(request, { ignoreSearch: true });
+
+    const network = fetch(request)
+        .then(response => {
+            if (response.ok || response.type === 'opaque') cache.put(request, response.clone());
+            return response;
+        });
+
+    if (cached) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+    }
+    return network;
+}
@@ -0,0 +1,231 @@
+from playwright.sync_api import sync_playwright
+import argparse
+import base64
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
+
+# Headless batch export: one JSONL line per order in, one STL (or OBJ) per order out.
+#
+#   python verification/batch_export.py orders.jsonl --out exports/ --jobs 8
+#
+# Order lines are design specs, as accepted by Design.designFromSpec:
+#   {"orderCode": "K3X9QA", "theme": "brown",
+#    "dimensions": {"l": 160, "w": 120, "h": 40, "radius": 8, "wallThickness": 2},
+#    "dividers": {"x": [-20, 30], "z": [0]}, "hiddenSegments": {"X_0_1": true},
+#    "format": "stl", "orderTime": "2026-02-01T06:15:00"}
+# Everything but the dimensions is optional; a missing orderCode is generated.
+# Order codes are upper-case letters, digits and dashes; orderTime is ISO 8601.
+#
+# The export builders need THREE, which the app only gets from a CDN, so the
+# jobs run in a headless Chromium on the app's own module workers (ExportPool),
+# one per core by default. Files are named like the in-app export
+# (OrderCode_Color_Time_Deadline.stl) and written as soon as each job finishes;
+# a report line per job (timing, triangles, manifold check) goes to --report.
+
+BLANK_PAGE = "<!DOCTYPE html><html><head><meta charset='utf-8'></head><body></body></html>"
+
+BATCH_JS = """
+async ({ orders, jobs, format }) => {
+    const { ExportPool } = await import('/src/systems/ExportPool.js');
+    const { designFromSpec } = await import('/src/core/Design.js');
+    const { exportFileName, generateOrderCode } = await import('/src/core/OrderNaming.js');
+    const { exportExtension } = await import('/src/utils/ExportBuilder.js');
+
+    const toBase64 = (data) => new Promise((resolve, reject) => {
+        const reader = new FileReader();
+        reader.onload = () => resolve(reader.result.slice(reader.result.indexOf(',') + 1));
+        reader.onerror = () => reject(reader.error);
+        reader.readAsDataURL(new Blob([data]));
+    });
+
+    const pool = new ExportPool(jobs);
+    const batchTime = new Date();
+
+    const runOrder = async ({ line, spec }) => {
+        const started = performance.now();
+        const entry = { line, orderCode: spec.orderCode || null };
+        try {
+            const orderFormat = spec.format || format;
+            const design = { ...designFromSpec(spec, 'export'), wallMode: 'shape' };
+            const result = await pool.run(design, orderFormat);
+
+            const orderCode = spec.orderCode || generateOrderCode();
+            const orderTime = spec.orderTime ? new Date(spec.orderTime) : batchTime;
+            if (isNaN(orderTime.getTime())) throw new Error(`invalid orderTime: ${spec.orderTime}`);
+            const name = exportFileName({
+                orderCode,
+                theme: spec.theme || 'brown',
+                orderTime,
+                extension: exportExtension(orderFormat)
+            });
+            Object.assign(entry, {
+                orderCode,
+                file: name,
+                buildMs: result.ms,
+                triangles: result.triangles,
+                manifold: result.report ? result.report.manifold : null
+            });
+            const data = await toBase64(result.data);
+            entry.ms = performance.now() - started;
+            await window.__batchWrite(name, data, entry);
+        } catch (err) {
+            entry.error = err.message;
+            entry.ms = performance.now() - started;
+            await window.__batchWrite(null, null, entry);
+        }
+    };
+
+    // Keep every worker busy with a bounded window of orders in flight,
+    // so finished files are handed off instead of piling up in the page
+    const queue = orders.slice();
+    const lanes = Array.from({ length: pool.size * 2 }, async () => {
+        while (queue.length) await runOrder(queue.shift());
+    });
+    await Promise.all(lanes);
+
+    const stats = pool.getStats();
+    pool.terminate();
+    return stats;
+}
+"""
+
+
+ORDER_CODE = re.compile(r"^[A-Z0-9-]+$")
+
+
+def order_error(spec):
+    """Why an order line cannot be exported, or None."""
+    if not isinstance(spec, dict) or not isinstance(spec.get("dimensions"), dict):
+        return "missing dimensions"
+    code = spec.get("orderCode")
+    if code is not None and not (isinstance(code, str) and ORDER_CODE.match(code)):
+        return f"invalid orderCode {code!r}: use A-Z, 0-9 and -"
+    order_time = spec.get("orderTime")
+    if order_time is not None:
+        try:
+            datetime.fromisoformat(order_time)
+        except (TypeError, ValueError):
+            return f"invalid orderTime {order_time!r}: use ISO 8601"
+    return None
+
+
+def read_orders(path):
+    orders, errors = [], []
+    with open(path, encoding="utf-8") as f:
+        for line_no, text in enumerate(f, 1):
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                spec = json.loads(text)
+            except json.JSONDecodeError as e:
+                errors.append({"line": line_no, "error": f"invalid JSON: {e}"})
+                continue
+            error = order_error(spec)
+            if error:
+                errors.append({"line": line_no, "error": error})
+                continue
+            orders.append({"line": line_no, "spec": spec})
+    return orders, errors
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def unique_path(folder, name):
+    """Path for name in folder that does not exist yet: name, name-2, name-3..."""
+    stem, ext = os.path.splitext(name)
+    path = os.path.join(folder, name)
+    n = 1
+    while os.path.exists(path):
+        n += 1
+        path = os.path.join(folder, f"{stem}-{n}{ext}")
+    return path
+
+
+def run(playwright, base_url, orders, args, report):
+    written = []
+
+    def write(name, data, entry):
+        if name:
+            path = unique_path(args.out, os.path.basename(name))
+            if os.path.basename(path) != entry["file"]:
+                entry["warning"] = f"{entry['file']} already exists, written as {os.path.basename(path)}"
+                entry["file"] = os.path.basename(path)
+            with open(path, "xb") as f:
+                f.write(base64.b64decode(data))
+            entry["bytes"] = os.path.getsize(path)
+            written.append(entry)
+        report.write(json.dumps(entry) + "\n")
+        report.flush()
+        done = len(written)
+        if not args.quiet and (done % 100 == 0 or "error" in entry or "warning" in entry):
+            status = entry.get("error") or entry.get("warning") or f"{done} files written"
+            print(f"  line {entry['line']}: {status}")
+
+    browser = playwright.chromium.launch(headless=True)
+    page = browser.new_page(service_workers="block")
+    page.route(f"{base_url}/__batch__", lambda route: route.fulfill(status=200, content_type="text/html", body=BLANK_PAGE))
+    page.expose_function("__batchWrite", write)
+    page.goto(f"{base_url}/__batch__")
+
+    stats = page.evaluate(BATCH_JS, {"orders": orders, "jobs": args.jobs, "format": args.format})
+    browser.close()
+    return written, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate tray export files from a JSONL file of orders")
+    parser.add_argument("orders", help="JSONL file, one design spec per line")
+    parser.add_argument("--out", default="exports", help="output directory (default: exports/)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 4, help="export workers (default: CPU count)")
+    parser.add_argument("--format", choices=["stl", "obj", "stl-parts"], default="stl",
+                        help="format for orders that do not set one (default: stl)")
+    parser.add_argument("--report", help="per-job report JSONL (default: <out>/report.jsonl)")
+    parser.add_argument("--url", help="use a running app instead of starting serve.py")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    orders, invalid = read_orders(args.orders)
+    report_path = args.report or os.path.join(args.out, "report.jsonl")
+
+    t0 = time.perf_counter()
+    with open(report_path, "w", encoding="utf-8") as report:
+        for entry in invalid:
+            report.write(json.dumps(entry) + "\n")
+        with sync_playwright() as p:
+            if args.url:
+                written, stats = run(p, args.url.rstrip("/"), orders, args, report)
+            else:
+                with serving() as base_url:
+                    written, stats = run(p, base_url, orders, args, report)
+    elapsed = time.perf_counter() - t0
+
+    build_ms = [entry["buildMs"] for entry in written]
+    failed = len(orders) - len(written) + len(invalid)
+    not_manifold = sum(1 for entry in written if entry.get("manifold") is False)
+
+    print(f"{len(written)} files in {elapsed:.1f}s ({len(written) / elapsed:.1f}/s) "
+          f"with {args.jobs} workers, {failed} failed, {not_manifold} not manifold")
+    if build_ms:
+        print(f"build time per tray: p50 {percentile(build_ms, 50):.0f} ms, "
+              f"p95 {percentile(build_ms, 95):.0f} ms, max {max(build_ms):.0f} ms")
+    print(f"pool: {stats}")
+    print(f"report: {report_path}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
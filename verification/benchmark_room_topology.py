@@ -0,0 +1,131 @@
+from playwright.sync_api import sync_playwright
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
+
+# Scaling benchmark for room discovery: the legacy string-keyed flood fill
+# vs. RoomTopology (full rebuild, one hidden wall, one moved divider).
+# The app is served by serve.py on a free port for the duration of the run.
+
+GRID_SIZES = [5, 10, 15, 20, 30, 40]
+
+BENCH_JS = """
+async (sizes) => {
+    const { RoomTopology } = await import('/src/utils/RoomTopology.js');
+    const { WallState } = await import('/src/core/WallState.js');
+
+    // Legacy algorithm, copied from the pre-topology createModel
+    const legacyFlood = (sortedX, sortedZ, dX, dZ, hiddenSegments) => {
+        const visited = new Set();
+        const rooms = [];
+        const id = (i, j) => `${i},${j}`;
+        for (let i = 0; i < sortedX.length - 1; i++) {
+            for (let j = 0; j < sortedZ.length - 1; j++) {
+                if (visited.has(id(i, j))) continue;
+                const cells = [];
+                const queue = [{ i, j }];
+                visited.add(id(i, j));
+                while (queue.length) {
+                    const c = queue.pop();
+                    cells.push(c);
+                    [[1, 0, 'X'], [-1, 0, 'X'], [0, 1, 'Z'], [0, -1, 'Z']].forEach(d => {
+                        const ni = c.i + d[0], nj = c.j + d[1];
+                        if (ni < 0 || ni >= sortedX.length - 1 || nj < 0 || nj >= sortedZ.length - 1) return;
+                        let hasWall = true;
+                        if (d[2] === 'X') {
+                            const raw = dX.indexOf(sortedX[Math.max(c.i, ni)]);
+                            if (raw !== -1 && hiddenSegments[`X_${raw}_${Math.min(c.j, nj)}`]) hasWall = false;
+                        } else {
+                            const raw = dZ.indexOf(sortedZ[Math.max(c.j, nj)]);
+                            if (raw !== -1 && hiddenSegments[`Z_${raw}_${Math.min(c.i, ni)}`]) hasWall = false;
+                        }
+                        if (!hasWall && !visited.has(id(ni, nj))) {
+                            visited.add(id(ni, nj));
+                            queue.push({ i: ni, j: nj });
+                        }
+                    });
+                }
+                rooms.push(cells);
+            }
+        }
+        return rooms;
+    };
+
+    const time = (fn, reps) => {
+        const t0 = performance.now();
+        for (let r = 0; r < reps; r++) fn(r);
+        return (performance.now() - t0) / reps;
+    };
+
+    const results = [];
+    for (const n of sizes) {
+        const size = 280;
+        const step = size / n;
+        const dX = [], dZ = [];
+        for (let k = 1; k < n; k++) { dX.push(-size / 2 + k * step); dZ.push(-size / 2 + k * step); }
+        const sortedX = [-size / 2, ...dX, size / 2];
+        const sortedZ = [-size / 2, ...dZ, size / 2];
+
+        // Every fourth segment hidden to produce merged rooms
+        const hidden = {};
+        for (let k = 0; k < dX.length; k++) {
+            for (let j = 0; j < n; j += 4) hidden[`X_${k}_${j}`] = true;
+        }
+
+        // Dividers are already sorted, so legacy raw indices equal line indices
+        const walls = WallState.fromKeys(hidden, dX.length, dZ.length);
+
+        const reps = n <= 15 ? 50 : 10;
+        const legacy = time(() => legacyFlood(sortedX, sortedZ, dX, dZ, hidden), reps);
+        const full = time(() => new RoomTopology().update(sortedX, sortedZ, walls), reps);
+
+        // Incremental: hide one extra wall on a warm index
+        const topo = new RoomTopology();
+        topo.update(sortedX, sortedZ, walls);
+        const variants = [];
+        for (let r = 0; r < reps; r++) {
+            const v = walls.clone();
+            v.setHidden('Z', r % dZ.length, r % n, true);
+            variants.push(v);
+        }
+        const incremental = time((r) => topo.update(sortedX, sortedZ, variants[r]), reps);
+
+        // Divider moved without topology change
+        const moved = time((r) => {
+            const mX = dX.slice();
+            mX[0] += (r % 2) ? 0.5 : -0.5;
+            topo.update([-size / 2, ...mX, size / 2], sortedZ, walls);
+        }, reps);
+
+        results.push({ grid: `${n}x${n}`, legacy, full, incremental, moved });
+    }
+    return results;
+}
+"""
+
+
+def run(playwright, base_url):
+    browser = playwright.chromium.launch(headless=True)
+    page = browser.new_page()
+
+    try:
+        page.goto(base_url)
+        page.wait_for_selector("#main-canvas")
+
+        results = page.evaluate(BENCH_JS, GRID_SIZES)
+
+        print(f"{'grid':>8} {'legacy ms':>10} {'full ms':>10} {'+1 wall ms':>11} {'moved ms':>10}")
+        for r in results:
+            print(f"{r['grid']:>8} {r['legacy']:>10.3f} {r['full']:>10.3f} {r['incremental']:>11.3f} {r['moved']:>10.3f}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        browser.close()
+
+
+if __name__ == "__main__":
+    with serving() as base_url, sync_playwright() as playwright:
+        run(playwright, base_url)
@@ -0,0 +1,86 @@
+from playwright.sync_api import sync_playwright
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
+
+# Wall construction benchmark: one extruded shape with a hole per room ('shape')
+# vs. per-segment prisms with fillet patches ('segments').
+# Every repetition nudges the wall thickness so the room hole cache stays cold.
+# The app is served by serve.py on a free port for the duration of the run.
+
+GRID_SIZES = [2, 4, 6, 8, 10, 15, 20]
+
+BENCH_JS = """
+async (sizes) => {
+    const { buildTrayGeometry } = await import('/src/utils/GeometryFactory.js');
+
+    const design = (n) => {
+        const size = 300;
+        const step = size / n;
+        const dividers = { x: [], z: [] };
+        for (let k = 1; k < n; k++) {
+            dividers.x.push(-size / 2 + k * step);
+            dividers.z.push(-size / 2 + k * step);
+        }
+        // Hide every fifth X segment so merged (non-rectangular) rooms are included
+        const hiddenSegments = {};
+        for (let k = 0; k < n - 1; k++) {
+            for (let j = k % 5; j < n; j += 5) hiddenSegments[`X_${k}_${j}`] = true;
+        }
+        return { l: size, w: size, h: 40, r: 5, wallThickness: 2, dividers, hiddenSegments, quality: 'full' };
+    };
+
+    const run = (base, wallMode, reps) => {
+        let triangles = 0;
+        const t0 = performance.now();
+        for (let r = 0; r < reps; r++) {
+            const { wall, base: baseGeo } = buildTrayGeometry({ ...base, wallThickness: base.wallThickness + r * 0.001, wallMode });
+            triangles = wall.getAttribute('position').count / 3;
+            wall.dispose();
+            baseGeo.dispose();
+        }
+        return { ms: (performance.now() - t0) / reps, triangles };
+    };
+
+    const results = [];
+    for (const n of sizes) {
+        const reps = n <= 8 ? 10 : 3;
+        const base = design(n);
+        run(base, 'segments', 1); // Warm up
+        const shape = run(base, 'shape', reps);
+        const segments = run(base, 'segments', reps);
+        results.push({ grid: `${n}x${n}`, shape, segments });
+    }
+    return results;
+}
+"""
+
+
+def run(playwright, base_url):
+    browser = playwright.chromium.launch(headless=True)
+    page = browser.new_page()
+
+    try:
+        page.goto(base_url)
+        page.wait_for_selector("#main-canvas")
+
+        results = page.evaluate(BENCH_JS, GRID_SIZES)
+
+        print(f"{'grid':>8} {'shape ms':>10} {'shape tris':>11} {'segments ms':>12} {'segments tris':>14} {'speedup':>8}")
+        for r in results:
+            shape, segments = r['shape'], r['segments']
+            speedup = shape['ms'] / segments['ms'] if segments['ms'] > 0 else float('inf')
+            print(f"{r['grid']:>8} {shape['ms']:>10.2f} {shape['triangles']:>11} "
+                  f"{segments['ms']:>12.2f} {segments['triangles']:>14} {speedup:>7.1f}x")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        browser.close()
+
+
+if __name__ == "__main__":
+    with serving() as base_url, sync_playwright() as playwright:
+        run(playwright, base_url)
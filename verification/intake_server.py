@@ -0,0 +1,201 @@
+"""Local stand-in for the order-intake endpoint (see src/systems/OrderIntake.js).
+
+Accepts chunked uploads and assembles them under --dir, one file per order plus
+a <file>.json with the order metadata. --fail-rate makes that share of requests
+answer 503, to exercise the client's retries.
+
+    python verification/intake_server.py --port 8100 --dir intake/ --fail-rate 0.2
+    # then open http://localhost:8000/?intake=http://localhost:8100
+
+From a script:
+
+    from intake_server import intake_serving
+    with intake_serving(directory, fail_rate=0.3) as (url, server):
+        ...
+        server.completed  # [{fileName, size, metadata, path}]
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upload ids may contain dots but not start with one (no "." or ".." folders)
+UPLOAD_PATH = re.compile(r"^/uploads/(\w[\w.-]*)(?:/chunks/(\d+)|/(complete))?$")
+MAX_CHUNK = 16 * 1024 * 1024
+
+
+class IntakeHandler(BaseHTTPRequestHandler):
+    server_version = "tray-intake"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def end_headers(self):
+        # The app is served from another origin
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "PUT, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, Content-Range")
+        super().end_headers()
+
+    def reply(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_CHUNK:
+            return None
+        return self.rfile.read(length)
+
+    def do_OPTIONS(self):
+        self.reply(204)
+
+    def do_PUT(self):
+        self.route("PUT")
+
+    def do_POST(self):
+        self.route("POST")
+
+    def route(self, method):
+        body = self.read_body()
+        match = UPLOAD_PATH.match(self.path)
+        if not match or body is None:
+            self.reply(404 if not match else 413, {"error": "bad request"})
+            return
+
+        if random.random() < self.server.fail_rate:
+            self.reply(503, {"error": "injected failure"})
+            return
+
+        upload_id, chunk, complete = match.groups()
+        server = self.server
+        folder = server.upload_folder(upload_id)
+        if folder is None:
+            self.reply(404, {"error": "bad upload id"})
+            return
+
+        if method == "PUT" and chunk is None and not complete:
+            try:
+                meta = json.loads(body)
+            except ValueError:
+                self.reply(400, {"error": "invalid JSON"})
+                return
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            self.reply(201, {"uploadId": upload_id})
+        elif method == "PUT" and chunk is not None:
+            if not os.path.isdir(folder):
+                self.reply(404, {"error": "unknown upload"})
+                return
+            with open(os.path.join(folder, f"{int(chunk):06d}.part"), "wb") as f:
+                f.write(body)
+            self.reply(204)
+        elif method == "POST" and complete:
+            self.reply(*server.assemble(upload_id, folder))
+        else:
+            self.reply(405, {"error": "method not allowed"})
+
+
+class IntakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, directory, fail_rate=0.0, quiet=True):
+        super().__init__(address, IntakeHandler)
+        self.directory = directory
+        self.fail_rate = fail_rate
+        self.quiet = quiet
+        self.completed = []
+        self.lock = threading.Lock()
+
+    def upload_folder(self, upload_id):
+        """Staging folder of an upload, or None if the id would leave .uploads."""
+        root = os.path.realpath(os.path.join(self.directory, ".uploads"))
+        folder = os.path.realpath(os.path.join(root, upload_id))
+        if os.path.dirname(folder) != root:
+            return None
+        return folder
+
+    def assemble(self, upload_id, folder):
+        """Join the chunks of an upload; completing twice returns the same receipt."""
+        with self.lock:
+            done = next((entry for entry in self.completed if entry["uploadId"] == upload_id), None)
+            if done:
+                return 200, done
+            meta_path = os.path.join(folder, "meta.json")
+            if not os.path.isfile(meta_path):
+                return 404, {"error": "unknown upload"}
+            with open(meta_path) as f:
+                meta = json.load(f)
+
+            parts = [os.path.join(folder, f"{k:06d}.part") for k in range(meta["chunks"])]
+            missing = [k for k, part in enumerate(parts) if not os.path.isfile(part)]
+            if missing:
+                return 409, {"error": "missing chunks", "missing": missing}
+
+            name = os.path.basename(meta["fileName"])
+            path = os.path.join(self.directory, name)
+            with open(path, "wb") as out:
+                for part in parts:
+                    with open(part, "rb") as f:
+                        out.write(f.read())
+            size = os.path.getsize(path)
+            if size != meta["size"]:
+                os.remove(path)
+                return 422, {"error": "size mismatch", "expected": meta["size"], "received": size}
+
+            with open(path + ".json", "w") as f:
+                json.dump(meta.get("metadata", {}), f, indent=2)
+            shutil.rmtree(folder, ignore_errors=True)
+
+            receipt = {"uploadId": upload_id, "fileName": name, "size": size,
+                       "metadata": meta.get("metadata", {}), "path": path}
+            self.completed.append(receipt)
+            return 200, receipt
+
+
+@contextlib.contextmanager
+def intake_serving(directory=None, fail_rate=0.0, host="127.0.0.1", port=0):
+    """Run the stand-in on a background thread; yields (base_url, server)."""
+    with contextlib.ExitStack() as stack:
+        if directory is None:
+            directory = stack.enter_context(tempfile.TemporaryDirectory(prefix="intake-"))
+        os.makedirs(directory, exist_ok=True)
+        server = IntakeServer((host, port), directory, fail_rate)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://{host}:{server.server_address[1]}", server
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Order-intake stand-in for chunked export uploads")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--dir", default="intake", help="where assembled files are written")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    server = IntakeServer((args.host, args.port), args.dir, args.fail_rate, quiet=args.quiet)
+    print(f"Order intake on http://{args.host}:{args.port}, writing to {os.path.abspath(args.dir)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
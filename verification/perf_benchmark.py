@@ -0,0 +1,406 @@
+from playwright.sync_api import sync_playwright
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
+
+# Scripted performance scenarios with regression thresholds.
+# Each scenario runs headlessly against the app with ?perf instrumentation on
+# (window.__trayPerf), and collects:
+#   - frame times and long tasks (Perf.js histograms / PerformanceObserver)
+#   - geometry rebuild latency (geometry:roundtrip) and scenario-specific spans
+#   - JS heap and main-thread task time via CDP Performance.getMetrics
+# Results are written to JSON and compared against a stored baseline; the run
+# exits with status 1 when a metric is worse than baseline by more than its tolerance,
+# and also when there is no baseline for a scenario (record one with --update-baseline).
+#
+# Serves the app through serve.py on a free port unless --url points elsewhere.
+#   python verification/perf_benchmark.py                    # compare with baseline
+#   python verification/perf_benchmark.py --update-baseline  # record a new baseline
+#   python verification/perf_benchmark.py --scenario divider_drag --scenario export
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "perf_baseline.json")
+DEFAULT_RESULTS = os.path.join(HERE, "perf_results.json")
+
+# Relative tolerance per metric (all metrics are lower-is-better).
+# Metrics with an absolute slack also pass while within baseline + slack,
+# which keeps near-zero baselines (e.g. no long tasks) from failing on noise.
+TOLERANCES = {
+    "default": {"relative": 0.25, "absolute": 0.5},
+    "long_tasks": {"relative": 0.5, "absolute": 2},
+    "heap_mb": {"relative": 0.15, "absolute": 4},
+    "frame_p95_ms": {"relative": 0.25, "absolute": 4},
+}
+
+VIEWPORT = {"width": 1440, "height": 900}
+
+# Shared page helpers, installed once per page
+HELPERS_JS = """
+async () => {
+    const { store } = await import('/src/core/Store.js');
+    const { geometryCache } = await import('/src/systems/GeometryCache.js');
+    const frame = () => new Promise(r => requestAnimationFrame(r));
+
+    window.__bench = {
+        store,
+        frame,
+        // Geometry engine drained and one more frame presented
+        async idle() {
+            const engine = window.app.geometryEngine;
+            while (engine.inFlight || engine.queued) await frame();
+            await frame();
+        },
+        // n x n divider grid on the largest tray, all walls visible
+        async grid(n) {
+            const size = 280;
+            const lines = [];
+            for (let k = 1; k < n; k++) lines.push(-size / 2 + k * size / n);
+            store.batch(() => {
+                store.setDimensions({ l: size, w: size, h: 40, radius: 8, wallThickness: 2 });
+                store.updateDividers('x', lines.slice());
+                store.updateDividers('z', lines.slice());
+            });
+            await this.idle();
+            return lines;
+        },
+        clearCaches() {
+            return geometryCache.clear();
+        }
+    };
+}
+"""
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+@scenario("startup")
+def startup(page):
+    """Navigation start to the first frame with the tray (startup:first-render)."""
+    page.wait_for_function("() => performance.getEntriesByName('startup:first-render').length > 0", timeout=30000)
+    page.evaluate("""
+        () => {
+            const [entry] = performance.getEntriesByName('startup:first-render');
+            window.__benchExtra = { first_render_ms: entry.duration };
+        }
+    """)
+
+
+@scenario("divider_drag")
+def divider_drag(page):
+    """Drag one X divider across three cells of a 10x10 grid with the mouse."""
+    start = page.evaluate("""
+        async () => {
+            const lines = await window.__bench.grid(10);
+            const sm = window.app.sceneManager;
+            const cell = lines[1] - lines[0];
+            const from = sm.getScreenCoordsFromTopWorld(lines[2], lines[4] + cell / 2);
+            const to = sm.getScreenCoordsFromTopWorld(lines[2] + 3 * cell, lines[4] + cell / 2);
+            window.__trayPerf.reset();
+            return { from, to };
+        }
+    """)
+    page.mouse.move(start["from"]["x"], start["from"]["y"])
+    page.mouse.down()
+    page.mouse.move(start["to"]["x"], start["to"]["y"], steps=120)
+    page.mouse.up()
+    page.evaluate("() => window.__bench.idle()")
+
+
+@scenario("slider_sweep")
+def slider_sweep(page):
+    """Scrub the radius and wall thickness sliders end to end, one step per frame."""
+    page.evaluate("""
+        async () => {
+            await window.__bench.grid(6);
+            window.__trayPerf.reset();
+            const sweep = async (id, values) => {
+                const input = document.getElementById(id);
+                for (const v of values) {
+                    input.value = v;
+                    input.dispatchEvent(new Event('input'));
+                    await window.__bench.frame();
+                }
+                input.dispatchEvent(new Event('change'));
+                await window.__bench.idle();
+            };
+            const range = (a, b, step) => { const out = []; for (let v = a; v <= b; v += step) out.push(v); return out; };
+            await sweep('radius', [...range(2, 30, 1), ...range(2, 30, 1).reverse()]);
+            await sweep('wall-thickness', [...range(2, 10, 0.5), ...range(2, 10, 0.5).reverse()]);
+        }
+    """)
+
+
+@scenario("remove_segments")
+def remove_segments(page):
+    """Hide 100 wall segments of a 10x10 grid one at a time, a frame apart."""
+    page.evaluate("""
+        async () => {
+            await window.__bench.grid(10);
+            window.__trayPerf.reset();
+            const { store, frame } = window.__bench;
+            let removed = 0;
+            // Alternate axes and skip every third segment so no line disappears entirely
+            for (let k = 0; removed < 100 && k < 9; k++) {
+                for (let seg = 0; removed < 100 && seg < 10; seg++) {
+                    if (seg % 3 === 2) continue;
+                    store.setSegmentHidden(k % 2 ? 'Z' : 'X', k, seg, true);
+                    removed++;
+                    await frame();
+                }
+                for (let seg = 0; removed < 100 && seg < 10; seg++) {
+                    if (seg % 3 !== 1) continue;
+                    store.setSegmentHidden(k % 2 ? 'X' : 'Z', k, seg, true);
+                    removed++;
+                    await frame();
+                }
+            }
+            await window.__bench.idle();
+        }
+    """)
+
+
+@scenario("logo_upload")
+def logo_upload(page):
+    """Upload a 12 MP JPEG through the file input and wait for the logo texture."""
+    page.evaluate("""
+        async () => {
+            await window.__bench.grid(2);
+            // Synthetic phone photo: 4000x3000 with dark shapes on a light background
+            const canvas = document.createElement('canvas');
+            canvas.width = 4000;
+            canvas.height = 3000;
+            const ctx = canvas.getContext('2d');
+            ctx.fillStyle = '#f0f0f0';
+            ctx.fillRect(0, 0, 4000, 3000);
+            ctx.fillStyle = '#202020';
+            for (let k = 0; k < 200; k++) ctx.fillRect((k * 397) % 3800, (k * 211) % 2800, 120, 90);
+            const blob = await new Promise(r => canvas.toBlob(r, 'image/jpeg', 0.92));
+
+            window.__trayPerf.reset();
+            const input = document.getElementById('logo-file-input');
+            const transfer = new DataTransfer();
+            transfer.items.add(new File([blob], 'photo.jpg', { type: 'image/jpeg' }));
+            input.files = transfer.files;
+
+            const t0 = performance.now();
+            input.dispatchEvent(new Event('change'));
+            // LogoSystem is lazy loaded on the first logo; time includes the import
+            const logoSystem = await window.app.loadFeature('logo');
+            while (!(logoSystem.logoMesh && logoSystem.logoMesh.material.map)) await window.__bench.frame();
+            await window.__bench.frame();
+            window.__benchExtra = { logo_ready_ms: performance.now() - t0 };
+        }
+    """)
+
+
+@scenario("export")
+def export_worst_case(page):
+    """Binary STL export of a 15x15 grid on the largest tray, cold caches."""
+    page.evaluate("""
+        async () => {
+            const lines = await window.__bench.grid(15);
+            const { store } = window.__bench;
+            store.batch(() => {
+                for (let k = 0; k < lines.length; k++) {
+                    for (let seg = k % 4; seg < 15; seg += 4) store.setSegmentHidden('X', k, seg, true);
+                }
+            });
+            await window.__bench.idle();
+            await window.__bench.clearCaches();
+            window.__trayPerf.reset();
+        }
+    """)
+    with page.expect_download(timeout=120000):
+        page.evaluate("async () => (await window.app.loadFeature('export')).exportModel('stl')")
+
+
+@scenario("plate")
+def plate(page):
+    """Fill a large bed with 12 trays of 4 designs, show it, then re-pack 40 times."""
+    page.evaluate("""
+        async () => {
+            await window.__bench.clearCaches();
+            const { store, frame } = window.__bench;
+            const { designFromState } = await import('/src/core/Design.js');
+            window.__trayPerf.reset();
+
+            const t0 = performance.now();
+            const plateSystem = await window.app.loadFeature('plate');
+            store.setPlateLayout({ bed: { preset: 'large', width: 350, depth: 350 }, spacing: 5 });
+            const sizes = [[100, 80, 3], [80, 60, 2], [60, 60, 3], [120, 50, 2]];
+            for (const [l, w, divisions] of sizes) {
+                const lines = [];
+                for (let k = 1; k < divisions; k++) lines.push(-l / 2 + k * l / divisions);
+                store.batch(() => {
+                    store.setDimensions({ l, w, h: 40, radius: 6, wallThickness: 2 });
+                    store.updateDividers('x', lines);
+                    store.updateDividers('z', []);
+                });
+                store.addPlateItems(designFromState(store.getState(), 'full'), store.getState().colorTheme, 3);
+            }
+            store.setPlateMode(true);
+            await frame();
+            while (plateSystem.view.pendingBuilds) await frame();
+            await frame();
+            window.__benchExtra = { plate_ready_ms: performance.now() - t0 };
+
+            // Re-packing only moves instances
+            for (let k = 0; k < 40; k++) {
+                store.setPlateLayout({ spacing: 2 + (k % 10) });
+                await frame();
+            }
+            const stats = plateSystem.view.getStats();
+            if (stats.trays !== 12 || stats.batches !== 4) throw new Error(`Unexpected plate ${JSON.stringify(stats)}`);
+            store.setPlateMode(false);
+            await window.__bench.idle();
+        }
+    """)
+
+
+def cdp_metrics(client):
+    metrics = client.send("Performance.getMetrics")["metrics"]
+    return {m["name"]: m["value"] for m in metrics}
+
+
+def collect(page, client, before):
+    snapshot = page.evaluate("() => window.__trayPerf.snapshot()")
+    extra = page.evaluate("() => { const e = window.__benchExtra || {}; window.__benchExtra = null; return e; }")
+    client.send("HeapProfiler.collectGarbage")
+    after = cdp_metrics(client)
+
+    timings = snapshot["timings"]
+    result = {
+        "frame_p50_ms": timings.get("frame", {}).get("p50", 0),
+        "frame_p95_ms": timings.get("frame", {}).get("p95", 0),
+        "frame_max_ms": timings.get("frame", {}).get("max", 0),
+        "long_tasks": snapshot["longTasks"],
+        "heap_mb": round(after["JSHeapUsedSize"] / (1024 * 1024), 2),
+        "task_ms": round((after["TaskDuration"] - before["TaskDuration"]) * 1000, 1),
+    }
+    rebuild = timings.get("geometry:roundtrip") or timings.get("geometry:build")
+    if rebuild:
+        result["rebuild_p50_ms"] = rebuild["p50"]
+        result["rebuild_p95_ms"] = rebuild["p95"]
+        result["rebuilds"] = rebuild["count"]
+    for name in ("export:stl", "export:build:stl", "estimate"):
+        if name in timings:
+            result[name.replace(":", "_") + "_ms"] = timings[name]["max"]
+    result.update({k: round(v, 1) for k, v in extra.items()})
+    return result
+
+
+def tolerance_for(metric):
+    return TOLERANCES.get(metric, TOLERANCES["default"])
+
+
+def compare(results, baseline):
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            regressions.append(f"{name}: no baseline (run with --update-baseline)")
+            continue
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if base is None or metric == "rebuilds":
+                continue
+            tol = tolerance_for(metric)
+            limit = max(base * (1 + tol["relative"]), base + tol["absolute"])
+            if value > limit:
+                regressions.append(f"{name}.{metric}: {value} > {limit:.2f} (baseline {base})")
+    return regressions
+
+
+def run(playwright, args):
+    browser = playwright.chromium.launch(headless=True)
+    # No service worker, so every scenario (startup included) loads from the server
+    context = browser.new_context(viewport=VIEWPORT, accept_downloads=True, service_workers="block")
+    # Skip the first-visit tutorial
+    context.add_init_script("sessionStorage.setItem('tutorial_seen', 'true')")
+
+    results = {}
+    try:
+        for name in args.scenario or SCENARIOS.keys():
+            page = context.new_page()
+            client = context.new_cdp_session(page)
+            client.send("Performance.enable")
+
+            page.goto(f"{args.url}/?perf")
+            page.wait_for_selector("#main-canvas")
+            page.wait_for_function("() => window.app && window.__trayPerf")
+            page.evaluate(HELPERS_JS)
+
+            before = cdp_metrics(client)
+            t0 = time.perf_counter()
+            SCENARIOS[name](page)
+            wall = (time.perf_counter() - t0) * 1000
+
+            results[name] = collect(page, client, before)
+            results[name]["wall_ms"] = round(wall, 1)
+            print(f"{name:>16}: " + ", ".join(f"{k}={v}" for k, v in results[name].items()))
+            page.close()
+    except Exception as e:
+        print(f"Error: {e}")
+        browser.close()
+        sys.exit(1)
+
+    browser.close()
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.out}")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline recorded in {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline)
+    if regressions:
+        print("FAIL: performance regressions")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("SUCCESS: all metrics within tolerance of baseline")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tray designer performance benchmark")
+    parser.add_argument("--url", help="app URL (default: serve the repository with serve.py)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--out", default=DEFAULT_RESULTS)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS.keys()))
+    args = parser.parse_args()
+
+    # A missing baseline must not pass as "no regressions" (e.g. on a fresh CI checkout)
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --update-baseline")
+        sys.exit(1)
+
+    with contextlib.ExitStack() as stack:
+        if not args.url:
+            args.url = stack.enter_context(serving())
+        with sync_playwright() as playwright:
+            run(playwright, args)
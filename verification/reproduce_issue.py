@@ -1,32 +1,17 @@
 import sys
 import os
-import threading
-import time
-from http.server import SimpleHTTPRequestHandler, HTTPServer
 from playwright.sync_api import sync_playwright
 
-# Start a simple HTTP server to serve the project files
-def start_server():
-    # Serve from the current directory (repo root)
-    server_address = ('', 8081) # Use 8081 to avoid conflict with potential 8000
-    httpd = HTTPServer(server_address, SimpleHTTPRequestHandler)
-    print("Serving on port 8081...")
-    httpd.serve_forever()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
 
 def run_test():
-    # Start server in background
-    thread = threading.Thread(target=start_server)
-    thread.daemon = True
-    thread.start()
-
-    # Give it a moment to start
-    time.sleep(2)
-
-    with sync_playwright() as p:
+    # Shared static server (serve.py) on a free port
+    with serving() as base_url, sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
 
-        url = "http://localhost:8081/verification/reproduce_issue.html"
+        url = f"{base_url}/verification/reproduce_issue.html"
         print(f"Navigating to {url}")
         try:
             page.goto(url)
@@ -0,0 +1,89 @@
+from playwright.sync_api import sync_playwright
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
+from intake_server import intake_serving  # noqa: E402
+
+# Background export queue: repeated clicks on an unchanged design share one job,
+# a changed design supersedes the running job, the UI keeps rendering frames
+# while the export builds, and the finished file reaches the order-intake
+# stand-in through chunked uploads despite injected 503s.
+
+
+def run(playwright, base_url, intake_url, intake):
+    browser = playwright.chromium.launch(headless=True)
+    page = browser.new_page(viewport={"width": 1280, "height": 800})
+    page.on("console", lambda msg: print(f"  console: {msg.text}") if msg.type in ("error", "warning") else None)
+    page.goto(f"{base_url}/?sw=0&intake={intake_url}")
+    page.wait_for_selector("#export-btn")
+    page.evaluate("async () => { await window.app.loadFeature('export'); }")
+
+    # A busy design so the build takes a while
+    page.evaluate("""
+        async () => {
+            const { store } = await import('/src/core/Store.js');
+            const lines = [];
+            for (let k = 1; k < 12; k++) lines.push(-150 + k * 25);
+            store.batch(() => {
+                store.setDimensions({ l: 300, w: 300 });
+                store.updateDividers('x', lines);
+                store.updateDividers('z', lines);
+            });
+        }
+    """)
+    time.sleep(1)
+
+    with page.expect_download(timeout=120000) as download_info:
+        page.evaluate("""
+            async () => {
+                const { store } = await import('/src/core/Store.js');
+                const exporter = await window.app.loadFeature('export');
+                const first = exporter.exportModel('stl');
+                const again = exporter.exportModel('stl');
+                window.__queueCheck = { deduped: first === again, jobs: exporter.jobs.length };
+
+                // Changing the design supersedes the running export
+                store.setDimensions({ h: 45 });
+                const latest = exporter.exportModel('stl');
+                await first;
+                window.__queueCheck.superseded = exporter.jobs[0].stage === 'superseded';
+
+                // Count frames while the export builds
+                let frames = 0;
+                const count = () => { frames++; if (!window.__queueCheck.done) requestAnimationFrame(count); };
+                requestAnimationFrame(count);
+                const t0 = performance.now();
+                await latest;
+                window.__queueCheck.done = true;
+                window.__queueCheck.fps = frames / ((performance.now() - t0) / 1000);
+                window.__queueCheck.stage = exporter.jobs[exporter.jobs.length - 1].stage;
+            }
+        """)
+    download = download_info.value
+    check = page.evaluate("() => window.__queueCheck")
+    print(f"download: {download.suggested_filename}")
+    print(f"queue: {check}")
+
+    ok = True
+    ok &= check["deduped"] and check["jobs"] == 1
+    ok &= check["superseded"]
+    ok &= check["stage"] == "done"
+    ok &= check["fps"] > 20
+
+    received = [entry for entry in intake.completed if entry["fileName"] == download.suggested_filename]
+    size = os.path.getsize(download.path())
+    print(f"intake: {[(entry['fileName'], entry['size']) for entry in intake.completed]}, downloaded {size} bytes")
+    ok &= len(received) == 1 and received[0]["size"] == size
+
+    page.screenshot(path="verification/export_queue.png")
+    browser.close()
+    print("OK" if ok else "FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    with sync_playwright() as p, serving() as base_url, intake_serving(fail_rate=0.25) as (intake_url, intake):
+        sys.exit(0 if run(p, base_url, intake_url, intake) else 1)
@@ -1,28 +1,18 @@
 import sys
 import os
-import threading
-import time
-from http.server import SimpleHTTPRequestHandler, HTTPServer
 from playwright.sync_api import sync_playwright
 
-def start_server():
-    server_address = ('', 8083)
-    httpd = HTTPServer(server_address, SimpleHTTPRequestHandler)
-    print("Serving on port 8083...")
-    httpd.serve_forever()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
 
 def run_test():
-    thread = threading.Thread(target=start_server)
-    thread.daemon = True
-    thread.start()
-    time.sleep(2)
-
-    with sync_playwright() as p:
+    # Shared static server (serve.py) on a free port
+    with serving() as base_url, sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
         page.set_viewport_size({"width": 1400, "height": 900})
 
-        url = "http://localhost:8083/index.html"
+        url = f"{base_url}/index.html"
         print(f"Navigating to {url}")
 
         try:
@@ -1,35 +1,19 @@
 import sys
 import os
-import threading
-import time
-from http.server import SimpleHTTPRequestHandler, HTTPServer
 from playwright.sync_api import sync_playwright
 
-# Start a simple HTTP server to serve the project files
-def start_server():
-    # Serve from the current directory (repo root)
-    # Use a different port to avoid conflicts
-    server_address = ('', 8082)
-    httpd = HTTPServer(server_address, SimpleHTTPRequestHandler)
-    print("Serving on port 8082...")
-    httpd.serve_forever()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
 
 def run_test():
-    # Start server in background
-    thread = threading.Thread(target=start_server)
-    thread.daemon = True
-    thread.start()
-
-    # Give it a moment to start
-    time.sleep(2)
-
-    with sync_playwright() as p:
+    # Shared static server (serve.py) on a free port
+    with serving() as base_url, sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
         # Set viewport large enough for desktop view to ensure Top View is visible
         page.set_viewport_size({"width": 1280, "height": 800})
 
-        url = "http://localhost:8082/index.html"
+        url = f"{base_url}/index.html"
         print(f"Navigating to {url}")
 
         try:
@@ -0,0 +1,53 @@
+from playwright.sync_api import sync_playwright
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
+
+# Dividers added out of order while the tutorial is running stay numerically
+# sorted, and the hidden wall segments stay on the line they were hidden on.
+
+
+def run(playwright, base_url):
+    browser = playwright.chromium.launch(headless=True)
+    page = browser.new_page(viewport={"width": 1280, "height": 800})
+    page.on("console", lambda msg: print(f"  console: {msg.text}") if msg.type in ("error", "warning") else None)
+    # First visit (fresh session storage): the tutorial starts on its own
+    page.goto(f"{base_url}/?sw=0")
+    page.wait_for_selector("#export-btn")
+
+    check = page.evaluate("""
+        async () => {
+            const { store } = await import('/src/core/Store.js');
+            const tutorial = await window.app.loadFeature('tutorial');
+            const active = tutorial.isActive;
+
+            store.updateDividers('x', []);
+            store.addDivider('x', 10);
+            store.setSegmentHidden('X', 0, 0, true);
+            store.addDivider('x', 5);
+            store.addDivider('x', 7);
+            store.addDivider('x', -40);
+
+            const { dividers, walls } = store.getState();
+            const hidden = dividers.x.map((v, k) => walls.isHidden('X', k, 0));
+            return { active, x: [...dividers.x], rows: walls.lineCount('X'), hidden };
+        }
+    """)
+    print(f"tutorial dividers: {check}")
+
+    ok = check["active"]
+    ok &= check["x"] == [-40, 5, 7, 10]
+    ok &= check["rows"] == 4
+    # Only the line at 10 (now the last one) has its first segment hidden
+    ok &= check["hidden"] == [False, False, False, True]
+
+    browser.close()
+    print("OK" if ok else "FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    with sync_playwright() as p, serving() as base_url:
+        sys.exit(0 if run(p, base_url) else 1)
@@ -1,26 +1,19 @@
-import threading
-import time
-from http.server import SimpleHTTPRequestHandler, HTTPServer
+import sys
+import os
 from playwright.sync_api import sync_playwright
 
-def start_server():
-    server_address = ('', 8082)
-    httpd = HTTPServer(server_address, SimpleHTTPRequestHandler)
-    httpd.serve_forever()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serve import serving  # noqa: E402
 
 def run_visual_verify():
-    thread = threading.Thread(target=start_server)
-    thread.daemon = True
-    thread.start()
-    time.sleep(2)
-
-    with sync_playwright() as p:
+    # Shared static server (serve.py) on a free port
+    with serving() as base_url, sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
         page.set_viewport_size({"width": 1280, "height": 720})
 
         # Load the main app
-        page.goto("http://localhost:8082/index.html")
+        page.goto(f"{base_url}/index.html")
 
         # Wait for 3D view to load (canvas)
         page.wait_for_selector("canvas", state="visible")